@@ -1,6 +1,16 @@
 from fastapi import FastAPI, HTTPException, Body, Query
+import os
+import sys
 
-app = FastAPI()
+# תיקיית השורש של הפרויקט - בשביל ה-middlewares המשותפים
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from middlewares import MetricsMiddleware, FastJSONResponse, trusted_response
+
+# סריאליזציה מהירה עם orjson (אם מותקן)
+app = FastAPI(default_response_class=FastJSONResponse)
+
+# מדדים (מספר בקשות, זמני תגובה) זמינים ב-/metrics
+app.add_middleware(MetricsMiddleware)
 
 # Database mock - רשימה פשוטה במקום מסד נתונים
 items = [
@@ -19,7 +29,7 @@ def get_all_items():
     Path: /items
     לא מקבל פרמטרים
     """
-    return {"items": items}
+    return trusted_response({"items": items})
 
 # GET - עם Query Parameters (פרמטרים בשאילתא)
 @app.get("/items/search")
@@ -0,0 +1,297 @@
+"""
+הרצת benchmark על כל האפליקציות בפרויקט
+
+לכל אפליקציה: מעלה אותה (בתוך התהליך או כשרת uvicorn), מריץ את בקשות ה-setup,
+ואז שולח תמהיל בקשות משוקלל (request_mix.jsonl) ברמת concurrency קבועה.
+מדווח RPS ו-p50/p95/p99, ושומר את התוצאות כ-JSON כדי להשוות בין commits.
+
+דוגמאות (מתיקיית השורש):
+    python bench/run.py
+    python bench/run.py --apps todos strings --mode uvicorn --workers 2 --concurrency 32
+    python bench/run.py --compare bench/results/previous.json --threshold 10
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(ROOT, "bench")
+APPS = ["todos", "basic_crud", "http_methods", "json_storage", "strings", "exampleStandart"]
+
+
+# ==================== תמהיל הבקשות ====================
+
+def load_mix(path: str) -> dict:
+    """app -> {"setup": [...], "requests": [...], "weights": [...]}"""
+    mixes = defaultdict(lambda: {"setup": [], "requests": [], "weights": []})
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            mix = mixes[entry["app"]]
+            if entry.get("setup"):
+                mix["setup"].extend([entry] * entry.get("repeat", 1))
+            else:
+                mix["requests"].append(entry)
+                mix["weights"].append(entry.get("weight", 1))
+    return mixes
+
+
+def endpoint_name(entry: dict) -> str:
+    return f"{entry['method']} {entry['path']}"
+
+
+# ==================== העלאת האפליקציה ====================
+
+class InProcessApp:
+    """טוען את main.py של האפליקציה ומריץ בקשות ישירות דרך ASGI, בלי רשת"""
+
+    def __init__(self, name: str, workdir: str):
+        self.name = name
+        self.workdir = workdir
+
+    async def __aenter__(self) -> httpx.AsyncClient:
+        app_dir = os.path.join(ROOT, self.name)
+        sys.path.insert(0, app_dir)
+        os.chdir(self.workdir)
+        spec = importlib.util.spec_from_file_location(f"bench_{self.name}_main", os.path.join(app_dir, "main.py"))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        self.app = module.app
+        self._lifespan = self.app.router.lifespan_context(self.app)
+        await self._lifespan.__aenter__()
+        # חריגה באפליקציה נספרת כ-500 ולא עוצרת את ההרצה
+        transport = httpx.ASGITransport(app=self.app, raise_app_exceptions=False)
+        self.client = httpx.AsyncClient(transport=transport, base_url="http://bench")
+        return self.client
+
+    async def __aexit__(self, *exc_info):
+        await self.client.aclose()
+        await self._lifespan.__aexit__(*exc_info)
+        os.chdir(ROOT)
+
+
+class UvicornApp:
+    """מריץ את האפליקציה כשרת uvicorn אמיתי בתהליך נפרד"""
+
+    def __init__(self, name: str, workdir: str, workers: int, concurrency: int):
+        self.name = name
+        self.workdir = workdir
+        self.workers = workers
+        self.concurrency = concurrency
+
+    async def __aenter__(self) -> httpx.AsyncClient:
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", os.path.join(ROOT, self.name),
+             "--host", "127.0.0.1", "--port", str(port), "--workers", str(self.workers),
+             "--log-level", "warning", "--no-access-log"],
+            cwd=self.workdir,
+        )
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        self.client = httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=30)
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                await self.client.get("/openapi.json")
+                return self.client
+            except httpx.TransportError:
+                if time.monotonic() > deadline or self.proc.poll() is not None:
+                    self.proc.kill()
+                    raise RuntimeError(f"{self.name}: uvicorn did not start")
+                await asyncio.sleep(0.05)
+
+    async def __aexit__(self, *exc_info):
+        await self.client.aclose()
+        self.proc.terminate()
+        self.proc.wait()
+
+
+# ==================== הרצה ומדידה ====================
+
+async def send(client: httpx.AsyncClient, entry: dict) -> int:
+    response = await client.request(entry["method"], entry["path"], params=entry.get("params"), json=entry.get("json"))
+    return response.status_code
+
+
+def percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, statuses, elapsed: float, errors: int) -> dict:
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        "requests": count,
+        "rps": round(count / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / count * 1000, 3) if count else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3) if count else 0.0,
+        "errors": errors,
+        "statuses": dict(sorted(Counter(str(status) if status else "error" for status in statuses).items())),
+    }
+
+
+async def run_app(name: str, mix: dict, args) -> dict:
+    with tempfile.TemporaryDirectory(prefix=f"bench_{name}_") as workdir:
+        if args.mode == "uvicorn":
+            runner = UvicornApp(name, workdir, args.workers, args.concurrency)
+        else:
+            runner = InProcessApp(name, workdir)
+
+        async with runner as client:
+            for entry in mix["setup"]:
+                await send(client, entry)
+
+            rng = random.Random(args.seed)
+            plan = rng.choices(mix["requests"], weights=mix["weights"], k=args.requests)
+            for entry in plan[: args.warmup]:
+                await send(client, entry)
+
+            results = []
+            next_index = 0
+
+            async def worker():
+                nonlocal next_index
+                while next_index < len(plan):
+                    entry = plan[next_index]
+                    next_index += 1
+                    start = time.perf_counter()
+                    try:
+                        status = await send(client, entry)
+                    except httpx.HTTPError:
+                        status = None
+                    results.append((endpoint_name(entry), time.perf_counter() - start, status))
+
+            start = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+            elapsed = time.perf_counter() - start
+
+    per_endpoint = defaultdict(lambda: ([], []))
+    for endpoint, latency, status in results:
+        per_endpoint[endpoint][0].append(latency)
+        per_endpoint[endpoint][1].append(status)
+
+    summary = summarize(
+        [latency for _, latency, _ in results],
+        [status for _, _, status in results],
+        elapsed,
+        sum(1 for _, _, status in results if status is None or status >= 500),
+    )
+    summary["endpoints"] = {
+        endpoint: summarize(latencies, statuses, elapsed, sum(1 for s in statuses if s is None or s >= 500))
+        for endpoint, (latencies, statuses) in sorted(per_endpoint.items())
+    }
+    return summary
+
+
+# ==================== השוואה ושמירה ====================
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(previous: dict, current: dict, threshold: float) -> list:
+    """מחזיר רשימת רגרסיות - ירידה ב-RPS או עלייה ב-p95 מעבר ל-threshold אחוזים"""
+    regressions = []
+    for name, now in current["apps"].items():
+        before = previous.get("apps", {}).get(name)
+        if not before:
+            continue
+        rps_change = (now["rps"] - before["rps"]) / before["rps"] * 100 if before["rps"] else 0.0
+        p95_change = (now["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100 if before["p95_ms"] else 0.0
+        flag = rps_change < -threshold or p95_change > threshold
+        print(f"  {name:<16} rps {rps_change:+7.1f}%   p95 {p95_change:+7.1f}%   {'REGRESSION' if flag else 'ok'}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the example FastAPI apps")
+    parser.add_argument("--apps", nargs="+", default=APPS, choices=APPS)
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers (uvicorn mode)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per app")
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mix", default=os.path.join(BENCH_DIR, "request_mix.jsonl"))
+    parser.add_argument("--output", help="results file (default: bench/results/<time>_<commit>.json)")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold in percent")
+    args = parser.parse_args()
+
+    mixes = load_mix(args.mix)
+    commit = git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "mode": args.mode,
+            "workers": args.workers if args.mode == "uvicorn" else None,
+            "concurrency": args.concurrency,
+            "requests_per_app": args.requests,
+            "seed": args.seed,
+        },
+        "apps": {},
+    }
+
+    print(f"{'app':<16}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}  statuses")
+    for name in args.apps:
+        result = asyncio.run(run_app(name, mixes[name], args))
+        report["apps"][name] = result
+        print(f"{name:<16}{result['rps']:>10}{result['p50_ms']:>10}{result['p95_ms']:>10}"
+              f"{result['p99_ms']:>10}{result['errors']:>8}  {result['statuses']}")
+
+    output = args.output or os.path.join(
+        BENCH_DIR, "results", f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{commit}.json"
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nresults saved to {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+        previous_meta = previous.get("meta", {})
+        print(f"\ncompared with {args.compare} (commit {previous_meta.get('commit')}):")
+        for key in ("mode", "workers", "concurrency", "requests_per_app"):
+            if previous_meta.get(key) != report["meta"][key]:
+                print(f"  warning: {key} differs ({previous_meta.get(key)} -> {report['meta'][key]})")
+        if compare(previous, report, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
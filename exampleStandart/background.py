@@ -0,0 +1,204 @@
+"""
+משימות רקע עם גבול - במקום BackgroundTasks של FastAPI
+
+- BackgroundExecutor: תור חסום (max_queue) ומספר קבוע של workers (tasks ב-event loop).
+  כשהתור מלא submit זורק QueueFull - הבקשה מקבלת 503 במקום לצבור משימות בלי סוף,
+  ובכיבוי drain מחכה שהתור יתרוקן. פונקציה רגילה (def) רצה ב-threadpool, async רצה ב-event loop.
+  אין כאן ניסיונות חוזרים: משימה שנכשלה נספרת ב-failed (וה-worker ממשיך). מי שיכול
+  להיכשל אחראי לנסות שוב בעצמו - למשל BatchedLogWriter משאיר שורות שלא נכתבו לניסיון הבא.
+- BatchedLogWriter: קובץ log אחד שנשאר פתוח. שורות מצטברות בזיכרון ונכתבות יחד
+  (כל flush_interval שניות או כשיש max_batch שורות) - write אחד במקום open/write/close לכל שורה.
+
+שניהם מחזירים stats() - עומק התור, זמני המתנה וריצה, כמה נכשלו וכו'.
+"""
+import asyncio
+import inspect
+import time
+from collections import deque
+
+from starlette.concurrency import run_in_threadpool
+
+
+class QueueFull(Exception):
+    pass
+
+
+def _summary(values) -> dict:
+    """ms - ממוצע, p50, p99 ומקסימום על החלון האחרון"""
+    if not values:
+        return {"avg_ms": 0.0, "p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+    ordered = sorted(values)
+    return {
+        "avg_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+class BackgroundExecutor:
+    def __init__(self, workers: int = 4, max_queue: int = 10_000, latency_window: int = 1000):
+        self.workers = workers
+        self._queue = None
+        self._max_queue = max_queue
+        self._tasks = []
+        self._accepting = False
+        # זמני המתנה בתור וזמני ריצה של המשימות האחרונות
+        self._waits = deque(maxlen=latency_window)
+        self._runs = deque(maxlen=latency_window)
+        self._counts = {"submitted": 0, "rejected": 0, "completed": 0, "failed": 0, "dropped": 0}
+        self._max_depth = 0
+
+    def start(self):
+        """נקרא ב-lifespan - התור וה-workers שייכים ל-event loop שרץ"""
+        self._queue = asyncio.Queue(maxsize=self._max_queue)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._accepting = True
+
+    def submit(self, func, *args, **kwargs):
+        """מוסיף משימה לתור בלי לחכות. QueueFull אם התור מלא או שהשרת נסגר"""
+        if not self._accepting:
+            self._counts["rejected"] += 1
+            raise QueueFull("background executor is not accepting jobs")
+        try:
+            self._queue.put_nowait((func, args, kwargs, time.perf_counter()))
+        except asyncio.QueueFull:
+            self._counts["rejected"] += 1
+            raise QueueFull(f"background queue is full ({self._max_queue} jobs)") from None
+        self._counts["submitted"] += 1
+        self._max_depth = max(self._max_depth, self._queue.qsize())
+
+    async def drain(self, timeout: float = 10.0):
+        """כיבוי: לא מקבלים משימות חדשות, מחכים (עד timeout) שהתור יתרוקן, ועוצרים את ה-workers"""
+        self._accepting = False
+        if self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        # מה שלא הספיק להתחיל לרוץ עד ה-timeout
+        self._counts["dropped"] += self._queue.qsize()
+        self._tasks = []
+
+    async def _worker(self):
+        while True:
+            func, args, kwargs, enqueued = await self._queue.get()
+            started = time.perf_counter()
+            self._waits.append(started - enqueued)
+            try:
+                await self._run(func, args, kwargs)
+            finally:
+                self._runs.append(time.perf_counter() - started)
+                self._queue.task_done()
+
+    async def _run(self, func, args, kwargs):
+        try:
+            if inspect.iscoroutinefunction(func):
+                await func(*args, **kwargs)
+            else:
+                await run_in_threadpool(func, *args, **kwargs)
+        except asyncio.CancelledError:
+            # drain נגמר ה-timeout באמצע המשימה
+            self._counts["dropped"] += 1
+            raise
+        except Exception:
+            # שגיאה במשימה לא מפילה את ה-worker
+            self._counts["failed"] += 1
+            return
+        self._counts["completed"] += 1
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue_depth": self._max_depth,
+            "queue_capacity": self._max_queue,
+            **self._counts,
+            "wait": _summary(self._waits),
+            "run": _summary(self._runs),
+        }
+
+
+class BatchedLogWriter:
+    def __init__(self, path: str, flush_interval: float = 0.05, max_batch: int = 1000,
+                 max_pending: int = 100_000):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        # אם הדיסק נכשל לאורך זמן - לא צוברים יותר מזה בזיכרון (הישנות נזרקות)
+        self.max_pending = max_pending
+        self._file = None
+        self._pending = []
+        self._wakeup = None
+        self._task = None
+        self._closing = False
+        self._counts = {"lines": 0, "batches": 0, "write_errors": 0, "dropped": 0}
+
+    async def start(self):
+        self._file = await run_in_threadpool(open, self.path, "a", encoding="utf-8")
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._flush_loop())
+
+    def write(self, message: str):
+        """מוסיף שורה - לא נוגע בדיסק. נכתבת ב-flush הבא"""
+        self._pending.append(message)
+        if len(self._pending) > self.max_pending:
+            overflow = len(self._pending) - self.max_pending
+            del self._pending[:overflow]
+            self._counts["dropped"] += overflow
+        if len(self._pending) >= self.max_batch and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def close(self):
+        """כיבוי: flush אחרון וסגירת הקובץ"""
+        if self._task is None:
+            return
+        # לא cancel - כתיבה שכבר באמצע צריכה להסתיים לפני שהקובץ נסגר
+        self._closing = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+        await run_in_threadpool(self._file.close)
+        self._file = None
+
+    async def flush(self):
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        try:
+            await run_in_threadpool(self._write_batch, batch)
+        except OSError:
+            # נשארות בתור ונכתבות בניסיון הבא
+            self._counts["write_errors"] += 1
+            self._pending[:0] = batch
+            return
+        self._counts["lines"] += len(batch)
+        self._counts["batches"] += 1
+
+    def _write_batch(self, batch):
+        self._file.write("\n".join(batch) + "\n")
+        self._file.flush()
+
+    async def _flush_loop(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+        # מה שנוסף בזמן ה-flush האחרון
+        await self.flush()
+
+    def stats(self) -> dict:
+        batches = self._counts["batches"]
+        return {
+            "path": self.path,
+            "pending": len(self._pending),
+            **self._counts,
+            "avg_batch": round(self._counts["lines"] / batches, 1) if batches else 0.0,
+        }
@@ -0,0 +1,74 @@
+"""
+כתיבת log ברקע: open/write/close לכל הודעה (write_log הקודם דרך BackgroundTasks)
+מול BackgroundExecutor + BatchedLogWriter
+
+הרצה: python bench_background.py
+"""
+import asyncio
+import os
+import tempfile
+import time
+
+from starlette.background import BackgroundTasks
+
+from background import BackgroundExecutor, BatchedLogWriter
+
+MESSAGES = 20_000
+
+
+def write_log_per_message(path: str, message: str):
+    with open(path, "a") as log:
+        log.write(f"{message}\n")
+
+
+async def per_message(path: str) -> float:
+    start = time.perf_counter()
+    for i in range(MESSAGES):
+        # כמו קודם: BackgroundTasks עם פונקציה רגילה - threadpool ו-open לכל הודעה
+        tasks = BackgroundTasks()
+        tasks.add_task(write_log_per_message, path, f"Notification sent to user{i}@example.com")
+        await tasks()
+    return time.perf_counter() - start
+
+
+async def batched(path: str) -> float:
+    log_writer = BatchedLogWriter(path)
+    executor = BackgroundExecutor(workers=4, max_queue=MESSAGES)
+
+    async def write_log(message: str):
+        log_writer.write(message)
+
+    await log_writer.start()
+    executor.start()
+    start = time.perf_counter()
+    for i in range(MESSAGES):
+        executor.submit(write_log, f"Notification sent to user{i}@example.com")
+    await executor.drain()
+    await log_writer.close()
+    elapsed = time.perf_counter() - start
+    stats = log_writer.stats()
+    print(f"  ({stats['batches']} writes, {stats['avg_batch']:.0f} lines each)")
+    return elapsed
+
+
+def count_lines(path: str) -> int:
+    with open(path) as f:
+        return sum(1 for _ in f)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        results = []
+        for label, run in [("open per message", per_message), ("batched, open once", batched)]:
+            path = os.path.join(directory, f"{run.__name__}.log")
+            elapsed = asyncio.run(run(path))
+            assert count_lines(path) == MESSAGES, label
+            results.append((label, elapsed))
+    print(f"\n{MESSAGES:,} log messages\n")
+    baseline = results[0][1]
+    for label, elapsed in results:
+        print(f"{label:<22}{elapsed * 1000:>10.1f}ms{MESSAGES / elapsed:>12,.0f} msg/s{baseline / elapsed:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+/search ו-/users/{id}/items: האינדקסים של catalog.py מול סינון של כל הרשימה ו-slice
+
+הגרסה הנאיבית בונה רשימה של כל ההתאמות (או כל הפריטים של המשתמש) ורק אז חותכת
+[skip:skip + limit] - הזמן שלה גדל עם גודל הקטלוג ועם skip. בודק גם שתוצאות שתי
+הגרסאות זהות.
+
+הרצה: python bench_search.py [--size 200000] [--users 1000]
+"""
+import argparse
+import time
+
+from catalog import Catalog, seed_catalog
+
+LIMIT = 20
+
+
+def naive_search(items, q, skip, limit):
+    if not q:
+        matches = list(items)
+    else:
+        key = q.casefold()
+        matches = [item for item in items if key in item.name.casefold()]
+    return matches[skip:skip + limit]
+
+
+def naive_user_items(items, user_id, skip, limit):
+    return [item for item in items if item.user_id == user_id][skip:skip + limit]
+
+
+def timed(func, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - started) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    catalog = Catalog()
+    started = time.perf_counter()
+    seed_catalog(catalog, args.size, args.users)
+    print(f"{args.size:,} items, {args.users:,} users - index built in {time.perf_counter() - started:.2f}s\n")
+    items = [catalog.get(item_id) for item_id in range(1, len(catalog) + 1)]
+
+    cases = [
+        ("no q, skip=0", lambda c: c.search(None, 0, LIMIT), lambda: naive_search(items, None, 0, LIMIT)),
+        ("no q, skip=150000", lambda c: c.search(None, 150_000, LIMIT),
+         lambda: naive_search(items, None, 150_000, LIMIT)),
+        ("q=phone, skip=0", lambda c: c.search("phone", 0, LIMIT), lambda: naive_search(items, "phone", 0, LIMIT)),
+        ("q=phone, skip=5000", lambda c: c.search("phone", 5_000, LIMIT),
+         lambda: naive_search(items, "phone", 5_000, LIMIT)),
+        ("q=p (1 char), skip=0", lambda c: c.search("p", 0, LIMIT), lambda: naive_search(items, "p", 0, LIMIT)),
+        ("q=bamboo desk, skip=0", lambda c: c.search("bamboo desk", 0, LIMIT),
+         lambda: naive_search(items, "bamboo desk", 0, LIMIT)),
+        ("q=4242 (rare)", lambda c: c.search("4242", 0, LIMIT), lambda: naive_search(items, "4242", 0, LIMIT)),
+        ("q=zzz (no match)", lambda c: c.search("zzz", 0, LIMIT), lambda: naive_search(items, "zzz", 0, LIMIT)),
+        ("user 7, skip=0", lambda c: c.user_items(7, 0, LIMIT), lambda: naive_user_items(items, 7, 0, LIMIT)),
+        ("user 7, skip=150", lambda c: c.user_items(7, 150, LIMIT), lambda: naive_user_items(items, 7, 150, LIMIT)),
+    ]
+
+    print(f"{'query':<24}{'naive ms':>10}{'indexed ms':>12}{'speedup':>10}")
+    for label, indexed, naive in cases:
+        naive_ms, expected = timed(naive, args.repeat)
+        indexed_ms, result = timed(lambda: indexed(catalog), args.repeat)
+        assert [item.id for item in result] == [item.id for item in expected], label
+        print(f"{label:<24}{naive_ms:>10.3f}{indexed_ms:>12.3f}{naive_ms / indexed_ms:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+RPS של ה-routes הסטטיים: בלי ResponseCacheMiddleware (RESPONSE_CACHE=0 - handler + סריאליזציה
+בכל בקשה) מול התשובות המוכנות מראש, ומול 304 כשהלקוח שולח If-None-Match
+
+הבקשות נשלחות ישירות דרך ממשק ASGI (בלי רשת), בתהליך אחד - כך שנמדדת רק העבודה של השרת.
+
+הרצה: python bench_static.py [--requests 20000]
+"""
+import argparse
+import asyncio
+import importlib.util
+import os
+import time
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+PATHS = ["/", "/info?detailed=true", "/users", "/admin/users", "/public/posts", "/items-list"]
+
+
+def load_app(cache_enabled: bool):
+    os.environ["RESPONSE_CACHE"] = "1" if cache_enabled else "0"
+    os.environ.setdefault("CATALOG_SIZE", "100")
+    name = f"example_main_{'cached' if cache_enabled else 'plain'}"
+    spec = importlib.util.spec_from_file_location(name, os.path.join(APP_DIR, "main.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.app
+
+
+async def get(app, target: str, headers=()):
+    path, _, query = target.partition("?")
+    result = {}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            result["status"] = message["status"]
+            result["headers"] = dict(message["headers"])
+        else:
+            result["body"] = result.get("body", b"") + message.get("body", b"")
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": query.encode(), "headers": list(headers), "client": ("127.0.0.1", 1234),
+        "server": ("127.0.0.1", 8000),
+    }
+    await app(scope, receive, send)
+    return result
+
+
+async def rps(app, target: str, count: int, headers=()) -> float:
+    best = 0.0
+    for _ in range(3):
+        started = time.perf_counter()
+        for _ in range(count):
+            await get(app, target, headers)
+        best = max(best, count / (time.perf_counter() - started))
+    return best
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20_000)
+    args = parser.parse_args()
+
+    plain = load_app(cache_enabled=False)
+    cached = load_app(cache_enabled=True)
+
+    print(f"{'route':<22}{'plain RPS':>12}{'cached RPS':>12}{'speedup':>9}{'304 RPS':>12}")
+    for target in PATHS:
+        expected = await get(plain, target)
+        first = await get(cached, target)
+        assert first["status"] == expected["status"] == 200 and first["body"] == expected["body"], target
+        etag = first["headers"][b"etag"]
+        assert (await get(cached, target, [(b"if-none-match", etag)]))["status"] == 304, target
+
+        before = await rps(plain, target, args.requests)
+        after = await rps(cached, target, args.requests)
+        revalidated = await rps(cached, target, args.requests, [(b"if-none-match", etag)])
+        print(f"{target:<22}{before:>12,.0f}{after:>12,.0f}{after / before:>8.1f}x{revalidated:>12,.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
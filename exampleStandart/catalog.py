@@ -0,0 +1,129 @@
+"""
+קטלוג פריטים בזיכרון עם אינדקסים - בשביל /search ו-/users/{user_id}/items
+
+- הפריטים ברשימה לפי ID (ה-ID הוא המיקום ברשימה + 1), כך ש-skip בלי חיפוש הוא slice.
+- אינדקס n-gram לחיפוש q בתוך השם: לכל רצף של 2 ו-3 תווים (באותיות קטנות) רשימת
+  ה-IDs שמכילים אותו, ממוינת (array של int - 4 bytes לכל הופעה). חיפוש עובר על הרשימה
+  הקצרה מבין ה-n-grams של q, בודק את השאר ב-bisect, ומאמת את ההתאמה המלאה.
+  התוצאות יוצאות לפי סדר ה-ID ובעצלות - skip רק סופר התאמות, בלי לבנות אותן,
+  והמעבר עוצר ברגע שיש limit תוצאות.
+- אינדקס לפי משתמש: לכל user_id רשימת ה-IDs שלו, כך ש-skip/limit הוא slice.
+
+משתני סביבה (seed_catalog ב-main.py):
+    CATALOG_SIZE=10000    כמה פריטים לדוגמה נוצרים בעלייה
+    CATALOG_USERS=100     בין כמה משתמשים הם מחולקים
+"""
+import bisect
+import random
+from array import array
+from itertools import islice
+from typing import Iterator, List, Optional
+
+NGRAM_SIZES = (2, 3)
+
+
+def _key(text: str) -> str:
+    return text.casefold()
+
+
+def _ngrams(key: str, size: int):
+    return {key[i:i + size] for i in range(len(key) - size + 1)}
+
+
+class CatalogItem:
+    __slots__ = ("id", "user_id", "name", "price")
+
+    def __init__(self, id: int, user_id: int, name: str, price: float):
+        self.id = id
+        self.user_id = user_id
+        self.name = name
+        self.price = price
+
+    def to_dict(self) -> dict:
+        return {"id": self.id, "user_id": self.user_id, "name": self.name, "price": self.price}
+
+
+class Catalog:
+    def __init__(self):
+        self._items: List[CatalogItem] = []
+        self._ngrams = {}
+        self._by_user = {}
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, user_id: int, name: str, price: float) -> CatalogItem:
+        item = CatalogItem(len(self._items) + 1, user_id, name, price)
+        self._items.append(item)
+        # IDs עולים - append משאיר את כל הרשימות ממוינות
+        key = _key(name)
+        for size in NGRAM_SIZES:
+            for gram in _ngrams(key, size):
+                postings = self._ngrams.get(gram)
+                if postings is None:
+                    postings = self._ngrams[gram] = array("I")
+                postings.append(item.id)
+        self._by_user.setdefault(user_id, array("I")).append(item.id)
+        return item
+
+    def get(self, item_id: int) -> Optional[CatalogItem]:
+        if 1 <= item_id <= len(self._items):
+            return self._items[item_id - 1]
+        return None
+
+    # ==================== שאילתות ====================
+
+    def search(self, q: Optional[str], skip: int, limit: int) -> List[CatalogItem]:
+        """פריטים ששמם מכיל את q (בלי הבדל אותיות גדולות/קטנות), לפי סדר ה-ID"""
+        if not q:
+            return self._items[skip:skip + limit]
+        ids = self._matching_ids(_key(q))
+        return [self._items[item_id - 1] for item_id in islice(ids, skip, skip + limit)]
+
+    def user_items(self, user_id: int, skip: int, limit: int) -> List[CatalogItem]:
+        ids = self._by_user.get(user_id)
+        if ids is None:
+            return []
+        return [self._items[item_id - 1] for item_id in ids[skip:skip + limit]]
+
+    def _matching_ids(self, key: str) -> Iterator[int]:
+        if len(key) < min(NGRAM_SIZES):
+            # תו אחד - כמעט כל פריט מתאים, אז סריקה לפי הסדר מגיעה ל-limit מהר
+            return (item.id for item in self._items if key in _key(item.name))
+        size = min(len(key), max(NGRAM_SIZES))
+        postings = []
+        for gram in _ngrams(key, size):
+            ids = self._ngrams.get(gram)
+            if ids is None:
+                return iter(())
+            postings.append(ids)
+        postings.sort(key=len)
+        return self._intersect(key, postings[0], postings[1:])
+
+    def _intersect(self, key: str, shortest, others) -> Iterator[int]:
+        items = self._items
+        for item_id in shortest:
+            if all(_contains(ids, item_id) for ids in others) and key in _key(items[item_id - 1].name):
+                # n-grams משותפים לא מבטיחים שהם באותו סדר - מאמתים מול השם עצמו
+                yield item_id
+
+
+def _contains(ids, item_id: int) -> bool:
+    index = bisect.bisect_left(ids, item_id)
+    return index < len(ids) and ids[index] == item_id
+
+
+# ==================== נתוני דוגמה ====================
+
+ADJECTIVES = ["Smart", "Wireless", "Portable", "Classic", "Compact", "Premium", "Ergonomic", "Vintage",
+              "Digital", "Foldable", "Waterproof", "Magnetic", "Solar", "Bamboo", "Leather", "Steel"]
+PRODUCTS = ["Phone", "Phone Case", "Laptop", "Laptop Stand", "Headphones", "Keyboard", "Mouse", "Monitor",
+            "Backpack", "Water Bottle", "Desk Lamp", "Charger", "Speaker", "Camera", "Notebook", "Watch"]
+
+
+def seed_catalog(catalog: Catalog, size: int, users: int, seed: int = 42):
+    """פריטים לדוגמה - אותו seed נותן תמיד את אותם פריטים"""
+    rng = random.Random(seed)
+    for i in range(size):
+        name = f"{rng.choice(ADJECTIVES)} {rng.choice(PRODUCTS)} {rng.randint(100, 9999)}"
+        catalog.add(rng.randint(1, users), name, round(rng.uniform(5, 2000), 2))
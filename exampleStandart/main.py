@@ -1,9 +1,38 @@
 from fastapi import FastAPI, Query, Path, Body
 from typing import Optional, Dict, Any
 from pydantic import BaseModel
+from contextlib import asynccontextmanager
 import uvicorn
+import os
+import sys
 
-app = FastAPI(title="FastAPI Examples", version="1.0.0")
+# מאפשר לייבא את המודולים של התיקייה גם כשמריצים מתיקייה אחרת
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# תיקיית השורש של הפרויקט - בשביל ה-middlewares המשותפים
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from middlewares import FastJSONResponse, ResponseCacheMiddleware, ResponseCache, static_response, cached_response
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """משימות הרקע (דוגמה 20): מתחילים בעלייה, ובכיבוי מסיימים את מה שבתור וכותבים את ה-log"""
+    await log_writer.start()
+    background.start()
+    yield
+    await background.drain(timeout=10)
+    await log_writer.close()
+
+
+# default_response_class - סריאליזציה מהירה עם orjson (אם מותקן)
+app = FastAPI(title="FastAPI Examples", version="1.0.0", default_response_class=FastJSONResponse,
+              lifespan=lifespan)
+
+# routes שמסומנים ב-@static_response / @cached_response(ttl=...) מחושבים פעם אחת -
+# מכאן ה-bytes המוכנים (עם ETag) נשלחים ישירות, בלי להריץ את ה-handler ובלי סריאליזציה
+# RESPONSE_CACHE=0 במשתני הסביבה מכבה את זה (בשביל השוואה - bench_static.py)
+response_cache = ResponseCache()
+if os.environ.get("RESPONSE_CACHE", "1") != "0":
+    app.add_middleware(ResponseCacheMiddleware, cache=response_cache)
 
 # ============================================
 # דוגמה 1: GET פשוט
@@ -11,6 +40,7 @@ app = FastAPI(title="FastAPI Examples", version="1.0.0")
 # הדוגמה הבסיסית ביותר - מחזיר JSON פשוט
 # URL: http://localhost:8000/
 @app.get("/")
+@static_response
 def read_root():
     return {"message": "Welcome to FastAPI!", "status": "success"}
 
@@ -32,17 +62,25 @@ def read_item(item_id: int):
 # Query parameters = פרמטרים שמגיעים אחרי ? ב-URL
 # Optional[str] = None פירושו שהפרמטר לא חובה
 # URL: http://localhost:8000/search?q=phone&skip=0&limit=10
+# הנתונים מגיעים מקטלוג בזיכרון (catalog.py): אינדקס n-gram ל-q ואינדקס לפי משתמש,
+# כך ש-skip גדול לא בונה את כל השורות שמדלגים עליהן
+from catalog import Catalog, seed_catalog
+
+catalog = Catalog()
+seed_catalog(catalog, size=int(os.environ.get("CATALOG_SIZE", 10_000)),
+             users=int(os.environ.get("CATALOG_USERS", 100)))
+
 @app.get("/search")
 def search_items(
-    q: Optional[str] = None,  # אופציונלי - חיפוש
-    skip: int = 0,            # ברירת מחדל 0 - דילוג על תוצאות
-    limit: int = 10           # ברירת מחדל 10 - מגבלת תוצאות
+    q: Optional[str] = None,               # אופציונלי - חיפוש בתוך שם הפריט
+    skip: int = Query(default=0, ge=0),    # ברירת מחדל 0 - דילוג על תוצאות
+    limit: int = Query(default=10, ge=1, le=100)  # ברירת מחדל 10 - מגבלת תוצאות
 ):
     return {
         "query": q,
         "skip": skip,
         "limit": limit,
-        "results": ["item1", "item2", "item3"]
+        "results": [item.to_dict() for item in catalog.search(q, skip, limit)]
     }
 
 
@@ -54,13 +92,13 @@ def search_items(
 # URL: http://localhost:8000/users/1/items?skip=0&limit=5
 @app.get("/users/{user_id}/items")
 def read_user_items(
-    user_id: int,                              # path parameter
-    skip: int = 0,                             # query parameter
-    limit: int = Query(default=10, le=100)     # query עם validation
+    user_id: int,                                   # path parameter
+    skip: int = Query(default=0, ge=0),             # query parameter
+    limit: int = Query(default=10, ge=1, le=100)    # query עם validation
 ):
     return {
         "user_id": user_id,
-        "items": [f"item_{i}" for i in range(skip, skip + limit)]
+        "items": [item.to_dict() for item in catalog.user_items(user_id, skip, limit)]
     }
 
 
@@ -176,6 +214,7 @@ def register_user(user: User):
 # החזרת response שונה בהתאם לquery parameter
 # URL: http://localhost:8000/info?detailed=true
 @app.get("/info")
+@static_response
 def get_info(detailed: bool = False):
     if detailed:
         return {
@@ -194,6 +233,7 @@ def get_info(detailed: bool = False):
 # שימושי לרשימות משתמשים, מוצרים וכו'
 # URL: http://localhost:8000/users
 @app.get("/users")
+@static_response
 def get_users():
     return [
         {"id": 1, "name": "Alice", "email": "alice@example.com"},
@@ -243,6 +283,7 @@ def create_user_with_address(user: User, address: Address):
 from fastapi import Response
 
 @app.get("/items-list", response_model=list[Item])
+@static_response
 def get_items_list():
     return [
         Item(name="Item 1", price=10.5),
@@ -253,20 +294,88 @@ def get_items_list():
 # ============================================
 # דוגמה 16: File upload
 # ============================================
-# UploadFile מאפשר העלאת קבצים
-# async כי קריאת קבצים היא פעולה אסינכרונית
-# שימוש: בחר קובץ ב-multipart/form-data
-from fastapi import File, UploadFile
+# כמו UploadFile (multipart/form-data עם שדה file) - אבל UploadFile שומר קודם את כל הקובץ,
+# ורק אז ה-handler רץ. כאן הקובץ נכתב ליעד בחלקים תוך כדי שהוא מגיע (uploads.py):
+# זיכרון קבוע גם לקובץ של כמה GB, sha256/crc32 בדרך, ו-413 מעל UPLOAD_MAX_SIZE
+# async כי קוראים את הגוף בזרימה
+# שימוש: curl -F "file=@photo.jpg" http://localhost:8000/upload
+# בלי multipart (הגוף הוא הקובץ עצמו):
+#        curl --data-binary @photo.jpg "http://localhost:8000/upload/raw?filename=photo.jpg"
+from fastapi import HTTPException, Request
+from uploads import UploadSessions, receive_multipart_upload, receive_upload
+
+# ה-handler קורא את הגוף בעצמו - כאן רק מתארים אותו לתיעוד (Swagger), כמו File(...)
+_MULTIPART_FILE_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {"multipart/form-data": {"schema": {
+            "type": "object", "required": ["file"],
+            "properties": {"file": {"type": "string", "format": "binary"}},
+        }}},
+    }
+}
+
+@app.post("/upload", openapi_extra=_MULTIPART_FILE_BODY)
+async def upload_file(request: Request):
+    upload = await receive_multipart_upload(request, field="file")
+    return {
+        "filename": upload["filename"],
+        "content_type": upload["content_type"],
+        "size": upload["size"],
+        "sha256": upload["sha256"],
+        "crc32": upload["crc32"]
+    }
 
-@app.post("/upload")
-async def upload_file(file: UploadFile = File(...)):
+@app.post("/upload/raw")
+async def upload_raw_file(request: Request, filename: str = Query(...)):
+    upload = await receive_upload(request, filename)
     return {
-        "filename": file.filename,
-        "content_type": file.content_type,
-        "size": file.size
+        "filename": upload["filename"],
+        "content_type": request.headers.get("content-type", "application/octet-stream"),
+        "size": upload["size"],
+        "sha256": upload["sha256"],
+        "crc32": upload["crc32"]
     }
 
 
+# ============================================
+# דוגמה 16ב: העלאה בחלקים שאפשר להמשיך
+# ============================================
+# לקבצים גדולים: פותחים העלאה עם הגודל הכולל, ושולחים חלקים עם Upload-Offset.
+# אחרי ניתוק - HEAD מחזיר כמה כבר הגיע (Upload-Offset), וממשיכים משם.
+# POST /uploads  Body: {"filename": "big.iso", "size": 4294967296}
+# PATCH /uploads/{upload_id}  Header: Upload-Offset: 0  Body: החלק עצמו
+upload_sessions = UploadSessions()
+
+def _upload_headers(response: Response, upload: dict):
+    response.headers["Upload-Offset"] = str(upload["offset"])
+    response.headers["Upload-Length"] = str(upload["size"])
+
+@app.post("/uploads", status_code=201)
+def create_upload(response: Response, filename: str = Body(...), size: int = Body(..., ge=0)):
+    upload = upload_sessions.create(filename, size)
+    response.headers["Location"] = f"/uploads/{upload['upload_id']}"
+    _upload_headers(response, upload)
+    return upload
+
+@app.api_route("/uploads/{upload_id}", methods=["GET", "HEAD"])
+def get_upload(upload_id: str, response: Response):
+    upload = upload_sessions.status(upload_id)
+    _upload_headers(response, upload)
+    return upload
+
+@app.patch("/uploads/{upload_id}")
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    response: Response,
+    upload_offset: int = Header(..., ge=0)    # נקרא מה-header Upload-Offset
+):
+    upload = await upload_sessions.append(request, upload_id, upload_offset)
+    _upload_headers(response, upload)
+    return upload
+
+
 # ============================================
 # דוגמה 17: Form data
 # ============================================
@@ -311,20 +420,32 @@ def get_item_with_check(item_id: int):
 # ============================================
 # דוגמה 20: Background tasks
 # ============================================
-# BackgroundTasks מאפשר הרצת משימות ברקע אחרי החזרת התגובה
-# שימושי לשליחת מיילים, logging, עיבוד כבד וכו'
-# המשימה תרוץ אחרי שהתגובה נשלחת ללקוח
-from fastapi import BackgroundTasks
+# משימות שרצות ברקע אחרי החזרת התגובה - שימושי לשליחת מיילים, logging, עיבוד כבד וכו'
+# במקום BackgroundTasks: תור חסום עם מספר קבוע של workers (background.py) -
+# תחת עומס מקבלים 503 במקום לצבור משימות בלי סוף,
+# ובכיבוי השרת מחכה שהתור יתרוקן (ראו lifespan למעלה)
+# ה-log נכתב בקבוצות לקובץ שנשאר פתוח - לא open/close לכל הודעה
+# מדדים (עומק התור, זמני המתנה וריצה): GET /background/metrics
+from background import BackgroundExecutor, BatchedLogWriter, QueueFull
 
-def write_log(message: str):
-    with open("log.txt", "a") as log:
-        log.write(f"{message}\n")
+log_writer = BatchedLogWriter("log.txt")
+background = BackgroundExecutor(workers=4, max_queue=10_000)
+
+async def write_log(message: str):
+    log_writer.write(message)
 
 @app.post("/send-notification/{email}")
-def send_notification(email: str, background_tasks: BackgroundTasks):
-    background_tasks.add_task(write_log, f"Notification sent to {email}")
+async def send_notification(email: str):
+    try:
+        background.submit(write_log, f"Notification sent to {email}")
+    except QueueFull:
+        raise HTTPException(status_code=503, detail="Too many pending notifications", headers={"Retry-After": "1"})
     return {"message": "Notification will be sent"}
 
+@app.get("/background/metrics")
+def background_metrics():
+    return {"executor": background.stats(), "log": log_writer.stats()}
+
 
 # ============================================
 # דוגמה 21: Dependency injection
@@ -350,10 +471,13 @@ def read_with_dependency(commons: dict = Depends(common_parameters)):
 # עוזר לארגן API גדול לקטגוריות
 # בתיעוד יופיעו תחת "admin" ו-"public"
 @app.get("/admin/users", tags=["admin"])
+@static_response
 def get_admin_users():
     return {"users": ["admin1", "admin2"]}
 
+# פוסטים מתעדכנים - נשמרים ל-60 שניות בלבד (או עד response_cache.invalidate("/public/posts"))
 @app.get("/public/posts", tags=["public"])
+@cached_response(ttl=60)
 def get_public_posts():
     return {"posts": ["post1", "post2", "post3"]}
 
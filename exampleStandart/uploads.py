@@ -0,0 +1,402 @@
+"""
+העלאת קבצים בזרימה (streaming) - הגוף נכתב לדיסק בחלקים, תוך כדי שהוא מגיע
+
+- זיכרון קבוע: לא יותר מ-WRITE_BUFFER_SIZE בזיכרון, גם לקובץ של כמה GB
+  (UploadFile של Starlette שומר קודם את כל הקובץ, ורק אז ה-handler רץ).
+- sha256 ו-crc32 מחושבים על אותם חלקים בדרך - בלי לקרוא את הקובץ שוב.
+- גבול גודל: 413 לפי Content-Length לפני שקוראים בכלל, או ברגע שהגוף עובר את הגבול.
+- multipart/form-data (כמו UploadFile) או גוף גולמי: ב-multipart החלק של הקובץ
+  נכתב ישר ליעד תוך כדי ה-parsing - בלי קובץ זמני באמצע.
+- העלאה שאפשר להמשיך (resumable): POST /uploads פותח העלאה עם הגודל הכולל, וכל
+  PATCH שולח חלק שמתחיל ב-Upload-Offset. אחרי ניתוק, HEAD מחזיר כמה כבר הגיע
+  וממשיכים משם. ההתקדמות נשמרת בדיסק (הקובץ החלקי + קובץ json קטן), כך שאפשר
+  להמשיך גם אחרי הפעלה מחדש של השרת או מול worker אחר.
+
+משתני סביבה:
+    UPLOAD_DIR=uploads            לאן נכתבים הקבצים
+    UPLOAD_MAX_SIZE=1073741824    גודל מקסימלי לקובץ (bytes)
+"""
+import hashlib
+import json
+import os
+import re
+import uuid
+import zlib
+from typing import Optional
+
+from fastapi import HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+
+try:
+    import fcntl
+except ImportError:
+    # Windows - בלי נעילה בין workers
+    fcntl = None
+
+# parser של multipart שעובד בזרימה (אותה חבילה ש-FastAPI משתמש בה ל-Form/File)
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:
+    try:
+        from multipart.multipart import MultipartParser, parse_options_header
+    except ImportError:
+        MultipartParser = parse_options_header = None
+
+UPLOAD_DIR = os.environ.get("UPLOAD_DIR", "uploads")
+MAX_UPLOAD_SIZE = int(os.environ.get("UPLOAD_MAX_SIZE", 1024 ** 3))
+# כמה bytes מצטברים לפני כתיבה - הכתיבה וה-hash רצים ב-thread, לא ב-event loop
+WRITE_BUFFER_SIZE = 1024 * 1024
+# כמה לקרוא בכל פעם כשמחשבים מחדש את ה-hash של העלאה חלקית
+HASH_READ_SIZE = 4 * 1024 * 1024
+
+_UPLOAD_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+def safe_filename(filename: Optional[str]) -> str:
+    """רק שם הקובץ, בלי תיקיות (../) - 400 אם לא נשאר שם"""
+    name = os.path.basename((filename or "").replace("\\", "/")).strip()
+    if not name or name.startswith("."):
+        raise HTTPException(status_code=400, detail="A valid filename is required")
+    return name
+
+
+def _too_large(limit: int):
+    return HTTPException(status_code=413, detail=f"Upload larger than {limit} bytes")
+
+
+class Checksums:
+    """sha256 + crc32 מצטברים"""
+
+    def __init__(self):
+        self.sha256 = hashlib.sha256()
+        self.crc32 = 0
+        self.size = 0
+
+    def update(self, data: bytes):
+        self.sha256.update(data)
+        self.crc32 = zlib.crc32(data, self.crc32)
+        self.size += len(data)
+
+    def to_dict(self) -> dict:
+        return {"size": self.size, "sha256": self.sha256.hexdigest(), "crc32": f"{self.crc32:08x}"}
+
+    @classmethod
+    def of_file(cls, path: str, size: int) -> "Checksums":
+        """ה-hash של size ה-bytes הראשונים של קובץ קיים (להמשך העלאה שה-hash שלה לא בזיכרון)"""
+        checksums = cls()
+        with open(path, "rb") as f:
+            while checksums.size < size:
+                data = f.read(min(HASH_READ_SIZE, size - checksums.size))
+                if not data:
+                    break
+                checksums.update(data)
+        return checksums
+
+
+def _write(f, checksums: Checksums, data: bytes):
+    # hashlib משחרר את ה-GIL על חלקים גדולים - ה-hash והכתיבה לא עוצרים בקשות אחרות
+    checksums.update(data)
+    f.write(data)
+
+
+async def stream_to_file(request: Request, f, checksums: Checksums, limit: int, complete: bool = True) -> bool:
+    """
+    כותב את גוף הבקשה ל-f בחלקים. 413 אם הגוף עובר את limit.
+    מחזיר False אם הלקוח התנתק באמצע (מה שהגיע עד אז כבר נכתב) - אלא אם complete,
+    ואז הניתוק עובר הלאה
+    """
+    buffer = bytearray()
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > limit:
+                raise _too_large(limit)
+            buffer += chunk
+            if len(buffer) >= WRITE_BUFFER_SIZE:
+                await run_in_threadpool(_write, f, checksums, bytes(buffer))
+                buffer.clear()
+    except ClientDisconnect:
+        if complete:
+            raise
+        await run_in_threadpool(_write, f, checksums, bytes(buffer))
+        return False
+    if buffer:
+        await run_in_threadpool(_write, f, checksums, bytes(buffer))
+    return True
+
+
+def _try_lock(f) -> bool:
+    """נעילה בלעדית על הקובץ בלי לחכות - False אם תהליך או בקשה אחרים מחזיקים אותה"""
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+
+def _declared_length(request: Request) -> Optional[int]:
+    value = request.headers.get("content-length")
+    return int(value) if value is not None and value.isdigit() else None
+
+
+# ==================== העלאה בבקשה אחת ====================
+
+async def receive_upload(request: Request, filename: str, max_size: int = None) -> dict:
+    """מקבל קובץ שלם בגוף הבקשה, ושומר אותו ב-UPLOAD_DIR רק אם הגיע כולו"""
+    max_size = max_size if max_size is not None else MAX_UPLOAD_SIZE
+    name = safe_filename(filename)
+    length = _declared_length(request)
+    if length is not None and length > max_size:
+        raise _too_large(max_size)
+
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    upload_id = uuid.uuid4().hex
+    path = os.path.join(UPLOAD_DIR, f"{upload_id}-{name}")
+    part_path = path + ".part"
+    checksums = Checksums()
+    try:
+        with open(part_path, "wb") as f:
+            await stream_to_file(request, f, checksums, max_size)
+        os.replace(part_path, path)
+    except BaseException:
+        # גוף גדול מדי, ניתוק באמצע או שגיאה - לא משאירים קובץ חלקי
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+    return {"upload_id": upload_id, "filename": name, "path": path, **checksums.to_dict()}
+
+
+# ==================== multipart/form-data ====================
+
+class _MultipartFile:
+    """ה-callbacks של MultipartParser - החלק ששמו field (ויש לו filename) נכתב ל-.part"""
+
+    def __init__(self, field: str):
+        self.field = field.encode()
+        self.upload_id = None
+        self.filename = None
+        self.content_type = None
+        self.part_path = None
+        self.checksums = Checksums()
+        self._file = None
+        self._headers = {}
+        self._header_field = bytearray()
+        self._header_value = bytearray()
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self._part_begin,
+            "on_header_field": lambda data, start, end: self._header_field.extend(data[start:end]),
+            "on_header_value": lambda data, start, end: self._header_value.extend(data[start:end]),
+            "on_header_end": self._header_end,
+            "on_headers_finished": self._headers_finished,
+            "on_part_data": self._part_data,
+            "on_part_end": self._part_end,
+        }
+
+    def _part_begin(self):
+        self._headers = {}
+
+    def _header_end(self):
+        self._headers[bytes(self._header_field).lower()] = bytes(self._header_value)
+        self._header_field.clear()
+        self._header_value.clear()
+
+    def _headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if options.get(b"name") != self.field or b"filename" not in options or self.filename is not None:
+            return
+        self.filename = safe_filename(options[b"filename"].decode("utf-8", "replace"))
+        self.content_type = self._headers.get(b"content-type", b"application/octet-stream").decode("latin-1")
+        self.upload_id = uuid.uuid4().hex
+        self.part_path = os.path.join(UPLOAD_DIR, f"{self.upload_id}-{self.filename}.part")
+        self._file = open(self.part_path, "wb")
+
+    def _part_data(self, data: bytes, start: int, end: int):
+        if self._file is not None:
+            _write(self._file, self.checksums, data[start:end])
+
+    def _part_end(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @property
+    def writing(self) -> bool:
+        return self._file is not None
+
+    def discard(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.part_path is not None and os.path.exists(self.part_path):
+            os.remove(self.part_path)
+
+
+async def receive_multipart_upload(request: Request, field: str = "file", max_size: int = None) -> dict:
+    """
+    כמו UploadFile: multipart/form-data עם קובץ בשדה field. ה-parsing והכתיבה רצים
+    ב-threadpool על חלקים של WRITE_BUFFER_SIZE, ושאר השדות בטופס מתעלמים מהם
+    """
+    max_size = max_size if max_size is not None else MAX_UPLOAD_SIZE
+    if MultipartParser is None:
+        raise HTTPException(status_code=415, detail="multipart/form-data uploads require python-multipart")
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in options:
+        raise HTTPException(status_code=415, detail="Expected multipart/form-data with a file field")
+    length = _declared_length(request)
+    if length is not None and length > max_size:
+        raise _too_large(max_size)
+
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    target = _MultipartFile(field)
+    parser = MultipartParser(options[b"boundary"], target.callbacks())
+    buffer = bytearray()
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_size:
+                raise _too_large(max_size)
+            buffer += chunk
+            if len(buffer) >= WRITE_BUFFER_SIZE:
+                await run_in_threadpool(parser.write, bytes(buffer))
+                buffer.clear()
+        if buffer:
+            await run_in_threadpool(parser.write, bytes(buffer))
+        parser.finalize()
+        if target.writing:
+            # הגוף נגמר באמצע החלק של הקובץ (בלי ה-boundary הסוגר)
+            raise HTTPException(status_code=400, detail="Incomplete multipart body")
+    except ValueError:
+        # MultipartParseError - גוף שלא תואם ל-boundary
+        target.discard()
+        raise HTTPException(status_code=400, detail="Malformed multipart body") from None
+    except BaseException:
+        # גוף גדול מדי, ניתוק או שגיאה - לא משאירים קובץ חלקי
+        target.discard()
+        raise
+    if target.filename is None:
+        raise HTTPException(status_code=422, detail=f"Missing file field '{field}'")
+    path = target.part_path[:-len(".part")]
+    os.replace(target.part_path, path)
+    return {"upload_id": target.upload_id, "filename": target.filename, "content_type": target.content_type,
+            "path": path, **target.checksums.to_dict()}
+
+
+# ==================== העלאה שאפשר להמשיך ====================
+
+class UploadSessions:
+    """
+    העלאות בחלקים. המצב בדיסק: <id>.part (מה שהגיע - הגודל שלו הוא ה-offset)
+    ו-<id>.json (שם וגודל כולל). ה-hash של כל העלאה נשמר בזיכרון בין החלקים,
+    ואם הוא חסר (הפעלה מחדש / worker אחר) מחושב מחדש מהקובץ החלקי
+    """
+
+    def __init__(self, directory: str = None, max_size: int = None):
+        self.directory = directory or UPLOAD_DIR
+        self.max_size = max_size if max_size is not None else MAX_UPLOAD_SIZE
+        self._checksums = {}
+
+    def _paths(self, upload_id: str):
+        if not _UPLOAD_ID.match(upload_id):
+            raise HTTPException(status_code=404, detail="Upload not found")
+        base = os.path.join(self.directory, ".sessions", upload_id)
+        return base + ".json", base + ".part"
+
+    def create(self, filename: str, size: int) -> dict:
+        name = safe_filename(filename)
+        if size > self.max_size:
+            raise _too_large(self.max_size)
+        upload_id = uuid.uuid4().hex
+        meta_path, part_path = self._paths(upload_id)
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        open(part_path, "wb").close()
+        meta = {"upload_id": upload_id, "filename": name, "size": size, "complete": False}
+        self._save(meta_path, meta)
+        self._checksums[upload_id] = Checksums()
+        return {**meta, "offset": 0}
+
+    def status(self, upload_id: str) -> dict:
+        meta_path, part_path = self._paths(upload_id)
+        meta = self._load(meta_path)
+        offset = meta["size"] if meta["complete"] else os.path.getsize(part_path)
+        return {**meta, "offset": offset}
+
+    async def append(self, request: Request, upload_id: str, offset: int) -> dict:
+        """
+        מוסיף את גוף הבקשה החל מ-offset. 409 אם offset לא תואם למה שכבר הגיע
+        (הלקוח צריך לשאול מחדש עם HEAD). כשמגיעים לגודל הכולל הקובץ עובר ל-UPLOAD_DIR
+        """
+        meta_path, part_path = self._paths(upload_id)
+        meta = self._load(meta_path)
+        if meta["complete"]:
+            raise HTTPException(status_code=409, detail="Upload already complete")
+        try:
+            # לא "ab" - זה היה יוצר קובץ חלקי חדש אם ההעלאה הסתיימה בינתיים
+            f = open(part_path, "r+b")
+        except FileNotFoundError:
+            raise HTTPException(status_code=409, detail="Upload already complete") from None
+        with f:
+            # PATCH אחד בכל פעם לכל העלאה - גם מול workers אחרים, לכן הנעילה על הקובץ עצמו
+            if not _try_lock(f):
+                raise HTTPException(status_code=409, detail="Another chunk is being uploaded")
+            # מה שנבדק לפני הנעילה יכול היה להשתנות - PATCH אחר סיים את ההעלאה בינתיים
+            if self._load(meta_path)["complete"]:
+                raise HTTPException(status_code=409, detail="Upload already complete")
+            current = f.seek(0, os.SEEK_END)
+            if offset != current:
+                raise HTTPException(
+                    status_code=409, detail="Offset mismatch", headers={"Upload-Offset": str(current)}
+                )
+            remaining = meta["size"] - current
+            length = _declared_length(request)
+            if length is not None and length > remaining:
+                raise _too_large(remaining)
+
+            checksums = self._checksums.get(upload_id)
+            if checksums is None or checksums.size != current:
+                checksums = await run_in_threadpool(Checksums.of_file, part_path, current)
+            self._checksums[upload_id] = checksums
+
+            try:
+                await stream_to_file(request, f, checksums, remaining, complete=False)
+            except HTTPException:
+                # חלק גדול מהגודל שהוצהר - מבטלים את כל החלק, ה-offset חוזר למה שהיה
+                f.flush()
+                f.truncate(current)
+                self._checksums.pop(upload_id, None)
+                raise
+            f.flush()
+
+            if checksums.size < meta["size"]:
+                return {**meta, "offset": checksums.size}
+            # עדיין תחת הנעילה - PATCH שמחכה יראה complete ולא יכתוב לקובץ שהועבר
+            return self._finish(meta, meta_path, part_path, checksums)
+
+    def _finish(self, meta: dict, meta_path: str, part_path: str, checksums: Checksums) -> dict:
+        path = os.path.join(self.directory, f"{meta['upload_id']}-{meta['filename']}")
+        os.replace(part_path, path)
+        meta.update(complete=True, path=path, **checksums.to_dict())
+        self._save(meta_path, meta)
+        del self._checksums[meta["upload_id"]]
+        return {**meta, "offset": meta["size"]}
+
+    @staticmethod
+    def _load(meta_path: str) -> dict:
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Upload not found") from None
+
+    @staticmethod
+    def _save(meta_path: str, meta: dict):
+        tmp_path = meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_path, meta_path)
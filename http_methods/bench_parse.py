@@ -0,0 +1,55 @@
+"""
+השוואת עלות הפענוח של גוף הבקשה: הדרך הישנה (json.loads + .get, בלי בדיקת טיפוסים)
+מול decode_model (msgspec אם מותקן, אחרת orjson + בדיקה ידנית)
+
+הרצה: python bench_parse.py
+"""
+import json
+import timeit
+
+import item_models
+from item_models import ItemCreate, ItemPatch, decode_model
+
+
+def legacy_create(body: bytes):
+    data = json.loads(body)
+    return {"name": data.get("name", "Unknown"), "price": data.get("price", 0.0)}
+
+
+def legacy_patch(body: bytes):
+    data = json.loads(body)
+    return {key: data[key] for key in ("name", "price") if key in data}
+
+
+BODIES = {
+    "small": json.dumps({"name": "New Item", "price": 15.5}).encode(),
+    "unicode": json.dumps({"name": "פריט חדש עם תיאור ארוך " * 20, "price": 99}, ensure_ascii=False).encode(),
+    # שדות מיותרים - הישן מפענח הכל, msgspec מדלג עליהם
+    "extra fields 8KB": json.dumps({"name": "x", "price": 1.0, "meta": [{"k": i, "v": "value"} for i in range(300)]}).encode(),
+}
+
+CASES = [
+    ("create", legacy_create, lambda body: decode_model(ItemCreate, body)),
+    ("patch", legacy_patch, lambda body: decode_model(ItemPatch, body)),
+]
+
+
+def bench(func, body: bytes) -> float:
+    timer = timeit.Timer(lambda: func(body))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=3, number=number)) / number
+
+
+def main():
+    decoder = "msgspec" if item_models.msgspec else "orjson" if item_models.orjson else "json"
+    print(f"decoder: {decoder}\n")
+    print(f"{'model':<10}{'body':<20}{'legacy':>12}{'typed':>12}{'speedup':>10}")
+    for name, legacy, typed in CASES:
+        for label, body in BODIES.items():
+            before = bench(legacy, body)
+            after = bench(typed, body)
+            print(f"{name:<10}{label:<20}{before * 1e6:>10.2f}us{after * 1e6:>10.2f}us{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+RPS לפי מספר ה-workers של uvicorn, כשכולם קוראים מאותו מאגר ב-shared memory
+
+לכל מספר workers: מעלה uvicorn עם HTTP_METHODS_SHM, יוצר ITEMS פריטים, בודק שכל
+החיבורים (שמגיעים ל-workers שונים) רואים את אותם פריטים, ואז מריץ GET /items/{id}
+מכמה תהליכי לקוח במקביל. בשורה הראשונה - worker אחד בלי shared memory (dict רגיל)
+להשוואה.
+
+הרצה: python bench_workers.py [--workers 1 2 4 8] [--duration 5] [--clients 4]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+from item_store import SharedItemStore
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+SHM_NAME = "bench_http_methods_items"
+ITEMS = 1_000
+CONNECTIONS_PER_CLIENT = 16
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def request(reader, writer, method: str, path: str, body: bytes = b""):
+    """HTTP/1.1 keep-alive על socket פתוח - בלי ספריית לקוח, כדי שהלקוח לא יהיה צוואר הבקבוק"""
+    headers = f"{method} {path} HTTP/1.1\r\nHost: bench\r\nContent-Length: {len(body)}\r\n"
+    if body:
+        headers += "Content-Type: application/json\r\n"
+    writer.write(headers.encode() + b"\r\n" + body)
+    status_line = await reader.readline()
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.partition(b":")
+        if name.lower() == b"content-length":
+            length = int(value)
+    payload = await reader.readexactly(length)
+    return int(status_line.split()[1]), payload
+
+
+async def client_load(port: int, duration: float, ids) -> int:
+    done = 0
+    deadline = time.monotonic() + duration
+
+    async def connection():
+        nonlocal done
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        rng = random.Random()
+        while time.monotonic() < deadline:
+            status, _ = await request(reader, writer, "GET", f"/items/{rng.choice(ids)}")
+            assert status == 200, status
+            done += 1
+        writer.close()
+
+    await asyncio.gather(*(connection() for _ in range(CONNECTIONS_PER_CLIENT)))
+    return done
+
+
+def client_process(port: int, duration: float, ids) -> int:
+    return asyncio.run(client_load(port, duration, ids))
+
+
+async def setup(port: int) -> list:
+    """יוצר פריטים, ובודק שכל החיבורים רואים את אותה רשימה - לא משנה לאיזה worker הגיעו"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    ids = []
+    for i in range(ITEMS):
+        status, payload = await request(reader, writer, "POST", "/items",
+                                        json.dumps({"name": f"Item {i}", "price": i}).encode())
+        assert status == 200, status
+        ids.append(json.loads(payload)["item"]["id"])
+    writer.close()
+
+    async def listing():
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        _, payload = await request(reader, writer, "GET", "/items")
+        writer.close()
+        return [item["id"] for item in json.loads(payload)["items"]]
+
+    listings = await asyncio.gather(*(listing() for _ in range(32)))
+    assert all(ids_seen == listings[0] for ids_seen in listings), "workers see different items"
+    assert set(ids) <= set(listings[0])
+    return ids
+
+
+def start_server(port: int, workers: int, shared: bool) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.pop("HTTP_METHODS_SHM", None)
+    if shared:
+        env["HTTP_METHODS_SHM"] = SHM_NAME
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", APP_DIR, "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        env=env,
+    )
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return proc
+        except OSError:
+            if time.monotonic() > deadline or proc.poll() is not None:
+                proc.kill()
+                raise RuntimeError("uvicorn did not start")
+            time.sleep(0.05)
+
+
+def unlink_shared():
+    try:
+        SharedItemStore.unlink(SHM_NAME)
+    except FileNotFoundError:
+        pass
+
+
+def run(workers: int, shared: bool, clients: int, duration: float) -> float:
+    unlink_shared()
+    port = free_port()
+    proc = start_server(port, workers, shared)
+    try:
+        ids = asyncio.run(setup(port))
+        with multiprocessing.Pool(clients) as pool:
+            counts = pool.starmap(client_process, [(port, duration, ids)] * clients)
+        return sum(counts) / duration
+    finally:
+        proc.terminate()
+        proc.wait()
+        unlink_shared()
+
+
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, cores} - {n for n in (2, 4) if n > cores}))
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--clients", type=int, default=max(2, cores // 2), help="load generator processes")
+    args = parser.parse_args()
+
+    print(f"GET /items/{{id}}, {ITEMS:,} items, {args.clients} client processes x "
+          f"{CONNECTIONS_PER_CLIENT} connections, {args.duration:.0f}s each, {cores} cores\n")
+    print(f"{'setup':<28}{'RPS':>10}{'vs 1 worker':>14}")
+    baseline = run(1, False, args.clients, args.duration)
+    print(f"{'1 worker, in-process dict':<28}{baseline:>10,.0f}{'':>14}")
+    single = None
+    for workers in args.workers:
+        rps = run(workers, True, args.clients, args.duration)
+        single = single or rps
+        label = f"{workers} worker{'s' if workers > 1 else ''}, shared memory"
+        print(f"{label:<28}{rps:>10,.0f}{rps / single:>13.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+מודלים מוקלדים לגוף הבקשות של /items ופענוח JSON מהיר
+
+- read_body: קורא את הגוף כ-stream ועוצר ברגע שעוברים את MAX_BODY_SIZE (413),
+  בלי לשמור בזיכרון גוף ענק. Content-Length גדול מדי נדחה עוד לפני הקריאה.
+- decode_model: msgspec אם מותקן (פענוח + בדיקת טיפוסים במעבר אחד),
+  אחרת orjson (ואם גם הוא לא מותקן - json הרגיל) ובדיקת טיפוסים ידנית.
+- json_body(Model): dependency ל-FastAPI שמחזיר מופע מוקלד של המודל.
+
+MAX_BODY_SIZE במשתני הסביבה (ברירת מחדל 64KB).
+"""
+import json
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import HTTPException, Request
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+MAX_BODY_SIZE = int(os.environ.get("MAX_BODY_SIZE", 64 * 1024))
+
+# רווחים מותרים לפני ה-JSON - כל תו אחר שאינו '{' אומר שהגוף לא אובייקט
+_JSON_WHITESPACE = b" \t\r\n"
+
+
+@dataclass(slots=True)
+class ItemCreate:
+    """POST ו-PUT - כל השדות, עם ברירות המחדל הישנות"""
+    name: str = "Unknown"
+    price: float = 0.0
+
+
+@dataclass(slots=True)
+class ItemPatch:
+    """PATCH - רק השדות שנשלחו (None = לא נשלח)"""
+    name: Optional[str] = None
+    price: Optional[float] = None
+
+
+# שדה -> הטיפוס הבסיסי שלו, לבדיקה הידנית כשאין msgspec (זהה בשני המודלים)
+_FIELD_TYPES = {"name": str, "price": float}
+
+
+class MalformedJSON(ValueError):
+    pass
+
+
+async def read_body(request: Request, max_size: int = None) -> bytes:
+    """קורא את הגוף chunk אחרי chunk ונכשל מוקדם - לפני שכל הגוף נטען לזיכרון"""
+    max_size = MAX_BODY_SIZE if max_size is None else max_size
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit() and int(content_length) > max_size:
+        raise HTTPException(status_code=413, detail=f"Request body larger than {max_size} bytes")
+
+    chunks = []
+    size = 0
+    started = False
+    async for chunk in request.stream():
+        if not chunk:
+            continue
+        size += len(chunk)
+        if size > max_size:
+            raise HTTPException(status_code=413, detail=f"Request body larger than {max_size} bytes")
+        if not started:
+            stripped = chunk.lstrip(_JSON_WHITESPACE)
+            if stripped:
+                started = True
+                if stripped[:1] != b"{":
+                    raise HTTPException(status_code=400, detail="Request body must be a JSON object")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def _loads(body: bytes):
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def _validate(model, data):
+    """בדיקת טיפוסים ידנית - int מתקבל כ-float, bool לא מתקבל כמספר"""
+    if not isinstance(data, dict):
+        raise ValueError("Expected a JSON object")
+    values = {}
+    for name, expected in _FIELD_TYPES.items():
+        if name not in data or (data[name] is None and model is ItemPatch):
+            continue
+        value = data[name]
+        if expected is float:
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"Expected `float`, got `{type(value).__name__}` - at `$.{name}`")
+            value = float(value)
+        elif not isinstance(value, str):
+            raise ValueError(f"Expected `str`, got `{type(value).__name__}` - at `$.{name}`")
+        values[name] = value
+    return model(**values)
+
+
+def decode_model(model, body: bytes):
+    """bytes -> מופע של model. MalformedJSON אם ה-JSON שבור, ValueError אם הטיפוסים לא מתאימים"""
+    if msgspec is not None:
+        try:
+            return msgspec.json.decode(body, type=model)
+        except msgspec.ValidationError as exc:
+            raise ValueError(str(exc)) from None
+        except msgspec.DecodeError:
+            raise MalformedJSON("Malformed JSON") from None
+    try:
+        data = _loads(body)
+    except ValueError:
+        raise MalformedJSON("Malformed JSON") from None
+    return _validate(model, data)
+
+
+def json_body(model):
+    """dependency: body: ItemCreate = Depends(json_body(ItemCreate))"""
+    async def dependency(request: Request):
+        body = await read_body(request)
+        try:
+            return decode_model(model, body)
+        except MalformedJSON as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from None
+        except ValueError as exc:
+            raise HTTPException(status_code=422, detail=str(exc)) from None
+    return dependency
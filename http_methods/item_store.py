@@ -0,0 +1,370 @@
+"""
+מאגר הפריטים - בזיכרון של התהליך (ברירת מחדל), או ב-shared memory לכמה workers
+
+uvicorn main:app --workers 4 מריץ 4 תהליכים, ולכל אחד dict משלו - כל worker רואה
+נתונים אחרים. עם HTTP_METHODS_SHM כל ה-workers עובדים על אותו מאגר (SharedItemStore):
+
+- segment אחד של multiprocessing.shared_memory בגודל קבוע: header ואחריו טבלת hash
+  (open addressing) של רשומות ברוחב קבוע - id, גרסה, מחיר ושם (UTF-8, עד NAME_SIZE bytes).
+- כתיבה: flock על קובץ נעילה (בין תהליכים) + RLock (בין threads באותו תהליך).
+- קריאה בלי נעילה (seqlock): הכותב מעלה מונה לאי-זוגי לפני שינוי ולזוגי אחריו, והקורא
+  קורא שוב אם המונה השתנה באמצע - קריאה עולה כמעט כמו dict רגיל.
+- הגרסה של כל פריט (ה-ETag) נשמרת ברשומה, והמונה שלה ב-header - משותף לכל ה-workers.
+
+משתני סביבה (open_store):
+    HTTP_METHODS_SHM=http_methods_items   שם ה-segment (מפעיל את המצב המשותף, לינוקס/macOS)
+    HTTP_METHODS_SHM_CAPACITY=65536       מספר הרשומות בטבלה (חזקה של 2)
+
+ה-segment נשאר אחרי שהשרת נכבה (כמו קובץ) - כך worker שעולה מחדש מוצא את הנתונים.
+למחיקה: SharedItemStore.unlink(name).
+"""
+import os
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from itertools import compress, count
+from typing import Iterable, List, Optional, Tuple
+
+MAGIC = b"HMITEMS1"
+# magic, capacity, record size, seq (seqlock), מונה גרסאות, ה-ID הגבוה, רשומות חיות, תאים בשימוש (כולל מחוקים)
+HEADER = struct.Struct("<8sIIqqqqq")
+HEADER_SIZE = 64
+SEQ_OFFSET, VERSION_OFFSET, MAX_ID_OFFSET, LIVE_OFFSET, USED_OFFSET = 16, 24, 32, 40, 48
+
+NAME_SIZE = 102
+# id, גרסה, מחיר, אורך השם, השם - 128 bytes לרשומה
+RECORD = struct.Struct(f"<qqdH{NAME_SIZE}s")
+INT64 = struct.Struct("<q")
+
+# ערכי id מיוחדים בטבלה
+EMPTY = 0
+DELETED = -1
+# מעל זה הטבלה נבנית מחדש (מחוקים נזרקים), ואם גם אז אין מקום - StoreFull
+MAX_LOAD = 0.75
+# קורא שרואה כתיבה באמצע כל כך הרבה פעמים (למשל כותב שנפל) לוקח את ה-lock.
+# מעבר על כל הטבלה ארוך יותר, ותחת כתיבות רצופות כמעט תמיד ייפגש בכתיבה - מוותרים מהר יותר
+MAX_READ_RETRIES = 1000
+MAX_SCAN_RETRIES = 3
+
+
+class StoreFull(Exception):
+    pass
+
+
+class ItemStore:
+    """בזיכרון של התהליך - worker אחד"""
+
+    def __init__(self, seed: Iterable[dict] = ()):
+        self._items = {}
+        # גרסה לכל פריט - עולה בכל שינוי ומשמשת כ-ETag.
+        # המונה גלובלי, כך שפריט שנמחק ונוצר מחדש עם אותו ID לא יקבל ETag ישן
+        self._versions = {}
+        self._version_counter = count(1)
+        self._lock = threading.RLock()
+        for item in seed:
+            self._items[item["id"]] = dict(item)
+            self._versions[item["id"]] = next(self._version_counter)
+
+    def lock(self):
+        """בדיקה וכתיבה (למשל If-Match ואז עדכון) בתוך הבלוק רצות בלי כתיבה מתחרה באמצע"""
+        return self._lock
+
+    def get(self, item_id: int) -> Optional[Tuple[dict, int]]:
+        """(פריט, גרסה) או None"""
+        # handlers סינכרוניים קוראים מה-threadpool בזמן שכתיבות רצות ב-event loop
+        with self._lock:
+            item = self._items.get(item_id)
+            if item is None:
+                return None
+            return dict(item), self._versions[item_id]
+
+    def values(self) -> List[dict]:
+        with self._lock:
+            return [dict(item) for item in self._items.values()]
+
+    def create(self, name: str, price: float) -> Tuple[dict, int]:
+        with self._lock:
+            new_id = max(self._items.keys()) + 1 if self._items else 1
+            return self._write(new_id, name, price)
+
+    def put(self, item_id: int, name: str, price: float) -> Tuple[dict, int]:
+        with self._lock:
+            return self._write(item_id, name, price)
+
+    def delete(self, item_id: int) -> Optional[dict]:
+        with self._lock:
+            self._versions.pop(item_id, None)
+            return self._items.pop(item_id, None)
+
+    def _write(self, item_id: int, name: str, price: float) -> Tuple[dict, int]:
+        item = {"id": item_id, "name": name, "price": price}
+        self._items[item_id] = item
+        self._versions[item_id] = next(self._version_counter)
+        return dict(item), self._versions[item_id]
+
+
+class SharedItemStore:
+    """טבלת פריטים ב-shared memory, משותפת לכל התהליכים שפותחים את אותו name"""
+
+    def __init__(self, name: str, capacity: int = 65536, seed: Iterable[dict] = ()):
+        import fcntl
+        from multiprocessing import shared_memory
+
+        if capacity & (capacity - 1):
+            raise ValueError("capacity must be a power of 2")
+        self._fcntl = fcntl
+        self._lock_fd = os.open(os.path.join(tempfile.gettempdir(), f"{name}.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._buf = None
+        with self.lock():
+            # פתיחה או יצירה תחת הנעילה - worker שני לא יראה טבלה שעוד לא אותחלה
+            try:
+                self._shm = shared_memory.SharedMemory(name=name)
+                created = False
+            except FileNotFoundError:
+                self._shm = shared_memory.SharedMemory(name=name, create=True, size=HEADER_SIZE + capacity * RECORD.size)
+                created = True
+            _untrack(self._shm)
+            self._buf = self._shm.buf
+            if created:
+                self._init(capacity, seed)
+            magic, capacity, record_size = HEADER.unpack_from(self._buf)[:3]
+            if magic != MAGIC or record_size != RECORD.size:
+                raise ValueError(f"shared memory {name!r} has an incompatible layout")
+            self.capacity = capacity
+            self._mask = capacity - 1
+
+    @staticmethod
+    def unlink(name: str):
+        from multiprocessing import shared_memory
+
+        # unlink מסיר את ה-segment גם מה-resource_tracker
+        shm = shared_memory.SharedMemory(name=name)
+        shm.close()
+        shm.unlink()
+
+    def close(self):
+        self._buf = None
+        self._shm.close()
+        os.close(self._lock_fd)
+
+    # ==================== נעילה ====================
+
+    @contextmanager
+    def lock(self):
+        """כמו ItemStore.lock - אבל גם מול שאר התהליכים. בתוך הבלוק אסור await"""
+        with self._thread_lock:
+            self._depth += 1
+            if self._depth == 1:
+                self._fcntl.flock(self._lock_fd, self._fcntl.LOCK_EX)
+                if self._buf is not None and self._read_int(SEQ_OFFSET) & 1:
+                    # כותב שנפל באמצע כתיבה - הטבלה במצב שהוא השאיר, ממשיכים ממנו
+                    self._write_int(SEQ_OFFSET, self._read_int(SEQ_OFFSET) + 1)
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._fcntl.flock(self._lock_fd, self._fcntl.LOCK_UN)
+
+    @contextmanager
+    def _writing(self):
+        """חייב לרוץ בתוך lock(). קוראים שמתחילים בזמן הזה ינסו שוב"""
+        seq = self._read_int(SEQ_OFFSET)
+        self._write_int(SEQ_OFFSET, seq + 1)
+        try:
+            yield
+        finally:
+            self._write_int(SEQ_OFFSET, seq + 2)
+
+    # ==================== קריאה ====================
+
+    def get(self, item_id: int) -> Optional[Tuple[dict, int]]:
+        """(פריט, גרסה) או None - בלי נעילה"""
+        buf = self._buf
+        # המקרה הנפוץ (אין כתיבה באמצע) בלי קריאות נוספות - ראו _read_consistent
+        seq = INT64.unpack_from(buf, SEQ_OFFSET)[0]
+        if not seq & 1:
+            try:
+                found = self._get(item_id)
+            except (UnicodeDecodeError, struct.error):
+                found = None
+            else:
+                if INT64.unpack_from(buf, SEQ_OFFSET)[0] == seq:
+                    return found
+        return self._read_consistent(lambda: self._get(item_id), MAX_READ_RETRIES)
+
+    def values(self) -> List[dict]:
+        return self._read_consistent(self._values, MAX_SCAN_RETRIES)
+
+    def _read_consistent(self, read, retries: int):
+        buf = self._buf
+        for _ in range(retries):
+            seq = INT64.unpack_from(buf, SEQ_OFFSET)[0]
+            if seq & 1:
+                time.sleep(0)
+                continue
+            try:
+                result = read()
+            except (UnicodeDecodeError, struct.error):
+                # רשומה שנכתבה באמצע הקריאה
+                continue
+            if INT64.unpack_from(buf, SEQ_OFFSET)[0] == seq:
+                return result
+        with self.lock():
+            return read()
+
+    def _get(self, item_id: int):
+        offset = self._find(item_id)
+        if offset is None:
+            return None
+        return _decode(self._buf, offset)
+
+    def _values(self) -> List[dict]:
+        buf = self._buf
+        items = [_decode(buf, HEADER_SIZE + index * RECORD.size)[0] for index in self._live_slots()]
+        items.sort(key=lambda item: item["id"])
+        return items
+
+    def _find(self, item_id: int) -> Optional[int]:
+        if item_id <= 0:
+            # 0 ו-1- מסמנים תא ריק או מחוק
+            return None
+        buf = self._buf
+        # IDs רצים - item_id & mask מפזר אותם בלי התנגשויות כל עוד הם בטווח של capacity
+        index = item_id & self._mask
+        for _ in range(self.capacity):
+            offset = HEADER_SIZE + index * RECORD.size
+            record_id = INT64.unpack_from(buf, offset)[0]
+            if record_id == item_id:
+                return offset
+            if record_id == EMPTY:
+                return None
+            index = (index + 1) & self._mask
+        return None
+
+    # ==================== כתיבה ====================
+
+    def create(self, name: str, price: float) -> Tuple[dict, int]:
+        with self.lock():
+            return self._put(self._read_int(MAX_ID_OFFSET) + 1, name, price)
+
+    def put(self, item_id: int, name: str, price: float) -> Tuple[dict, int]:
+        with self.lock():
+            return self._put(item_id, name, price)
+
+    def delete(self, item_id: int) -> Optional[dict]:
+        with self.lock():
+            offset = self._find(item_id)
+            if offset is None:
+                return None
+            item = _decode(self._buf, offset)[0]
+            with self._writing():
+                INT64.pack_into(self._buf, offset, DELETED)
+                self._write_int(LIVE_OFFSET, self._read_int(LIVE_OFFSET) - 1)
+                if item_id == self._read_int(MAX_ID_OFFSET):
+                    # כמו max(items) + 1 - ה-ID של הפריט האחרון שנמחק יינתן שוב
+                    self._write_int(MAX_ID_OFFSET, self._max_id())
+            return item
+
+    def _put(self, item_id: int, name: str, price: float) -> Tuple[dict, int]:
+        encoded = name.encode("utf-8")
+        if len(encoded) > NAME_SIZE:
+            raise ValueError(f"name is longer than {NAME_SIZE} bytes")
+        offset = self._find(item_id)
+        if offset is None:
+            if self._read_int(USED_OFFSET) + 1 > self.capacity * MAX_LOAD:
+                self._rehash()
+                if self._read_int(LIVE_OFFSET) + 1 > self.capacity * MAX_LOAD:
+                    raise StoreFull(f"item store is full ({self.capacity} slots)")
+            offset = self._free_slot(item_id)
+        version = self._read_int(VERSION_OFFSET) + 1
+        with self._writing():
+            if INT64.unpack_from(self._buf, offset)[0] <= 0:
+                if INT64.unpack_from(self._buf, offset)[0] == EMPTY:
+                    self._write_int(USED_OFFSET, self._read_int(USED_OFFSET) + 1)
+                self._write_int(LIVE_OFFSET, self._read_int(LIVE_OFFSET) + 1)
+                self._write_int(MAX_ID_OFFSET, max(self._read_int(MAX_ID_OFFSET), item_id))
+            RECORD.pack_into(self._buf, offset, item_id, version, price, len(encoded), encoded)
+            self._write_int(VERSION_OFFSET, version)
+        return {"id": item_id, "name": name, "price": price}, version
+
+    def _free_slot(self, item_id: int) -> int:
+        index = item_id & self._mask
+        while True:
+            offset = HEADER_SIZE + index * RECORD.size
+            if INT64.unpack_from(self._buf, offset)[0] <= 0:
+                return offset
+            index = (index + 1) & self._mask
+
+    def _rehash(self):
+        """בונה את הטבלה מחדש בלי הרשומות המחוקות (שמאריכות את החיפוש)"""
+        buf = self._buf
+        records = [
+            bytes(buf[HEADER_SIZE + index * RECORD.size:HEADER_SIZE + (index + 1) * RECORD.size])
+            for index in self._live_slots()
+        ]
+        with self._writing():
+            buf[HEADER_SIZE:HEADER_SIZE + self.capacity * RECORD.size] = bytes(self.capacity * RECORD.size)
+            for record in records:
+                offset = self._free_slot(INT64.unpack_from(record)[0])
+                buf[offset:offset + RECORD.size] = record
+            self._write_int(USED_OFFSET, len(records))
+
+    def _id_column(self):
+        """עמודת ה-id של כל הרשומות (כל 128 bytes) - בלי לפרק כל רשומה"""
+        return self._buf[HEADER_SIZE:HEADER_SIZE + self.capacity * RECORD.size].cast("q")[::RECORD.size // 8]
+
+    def _live_slots(self) -> List[int]:
+        ids = self._id_column().tolist()
+        # compress (ב-C) משאיר רק תאים שאינם ריקים; מתוכם מסננים את המחוקים
+        return [index for index in compress(range(self.capacity), ids) if ids[index] > 0]
+
+    def _max_id(self) -> int:
+        return max(max(self._id_column()), 0)
+
+    def _init(self, capacity: int, seed: Iterable[dict]):
+        buf = self._buf
+        buf[:HEADER_SIZE + capacity * RECORD.size] = bytes(HEADER_SIZE + capacity * RECORD.size)
+        # magic נכתב אחרון - טבלה בלי magic (יצירה שנקטעה) נדחית בפתיחה
+        HEADER.pack_into(buf, 0, b"\0" * 8, capacity, RECORD.size, 0, 0, 0, 0, 0)
+        self.capacity = capacity
+        self._mask = capacity - 1
+        for item in seed:
+            self._put(item["id"], item["name"], item["price"])
+        buf[:8] = MAGIC
+
+    def _read_int(self, offset: int) -> int:
+        return INT64.unpack_from(self._buf, offset)[0]
+
+    def _write_int(self, offset: int, value: int):
+        INT64.pack_into(self._buf, offset, value)
+
+
+def _decode(buf, offset: int) -> Tuple[dict, int]:
+    item_id, version, price, name_size, name = RECORD.unpack_from(buf, offset)
+    return {"id": item_id, "name": name[:name_size].decode("utf-8"), "price": price}, version
+
+
+def _untrack(shm):
+    """
+    ה-resource_tracker של multiprocessing מוחק segment כשהתהליך שפתח אותו יוצא.
+    כאן ה-segment משותף ל-workers שעולים ונופלים בנפרד, אז הוא לא שייך לאף אחד מהם
+    """
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+
+
+def open_store(seed: Iterable[dict] = ()):
+    """SharedItemStore אם מוגדר HTTP_METHODS_SHM, אחרת ItemStore בזיכרון של התהליך"""
+    name = os.environ.get("HTTP_METHODS_SHM")
+    if not name:
+        return ItemStore(seed)
+    capacity = int(os.environ.get("HTTP_METHODS_SHM_CAPACITY", 65536))
+    return SharedItemStore(name, capacity=capacity, seed=seed)
@@ -1,12 +1,76 @@
-from fastapi import FastAPI, Request
+from fastapi import Depends, FastAPI, HTTPException, Request, Response
+from typing import Optional
+import os
+import sys
 
-app = FastAPI()
+# מאפשר לייבא את המודולים של התיקייה גם כשמריצים מתיקייה אחרת
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# תיקיית השורש של הפרויקט - בשביל ה-middlewares המשותפים
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from middlewares import FastJSONResponse, trusted_response
+from item_models import ItemCreate, ItemPatch, json_body
+from item_store import StoreFull, open_store
 
-# מאגר דמו פשוט
-items = {
-    1: {"id": 1, "name": "Item 1", "price": 10.5},
-    2: {"id": 2, "name": "Item 2", "price": 20.0},
-}
+# סריאליזציה מהירה עם orjson (אם מותקן)
+app = FastAPI(default_response_class=FastJSONResponse)
+
+# מאגר דמו פשוט - בזיכרון של התהליך, או עם HTTP_METHODS_SHM ב-shared memory
+# שמשותף לכל ה-workers (uvicorn main:app --workers 4). ראו item_store.py
+store = open_store(seed=[
+    {"id": 1, "name": "Item 1", "price": 10.5},
+    {"id": 2, "name": "Item 2", "price": 20.0},
+])
+
+
+def item_etag(item_id: int, version: int) -> str:
+    """הגרסה עולה בכל שינוי (מונה גלובלי של המאגר) - פריט שנוצר מחדש לא יקבל ETag ישן"""
+    return f'"{item_id}-{version}"'
+
+
+def _etag_candidates(header: str):
+    return [candidate.strip() for candidate in header.split(",")]
+
+
+def get_existing_item(item_id: int):
+    """(פריט, גרסה) או 404"""
+    found = store.get(item_id)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    return found
+
+
+def check_if_match(request: Request, item_id: int, version: int):
+    """If-Match - עדכון אופטימי: אם הפריט השתנה מאז שהלקוח קרא אותו מחזירים 412"""
+    header = request.headers.get("if-match")
+    if header is None:
+        return
+    etag = item_etag(item_id, version)
+    # השוואה חזקה - ETag חלש (W/) לא מתאים ל-If-Match
+    if any(candidate == "*" or candidate == etag for candidate in _etag_candidates(header)):
+        return
+    raise HTTPException(status_code=412, detail="Item was modified", headers={"ETag": etag})
+
+
+def if_none_match(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return any(
+        candidate == "*" or candidate.removeprefix("W/") == etag
+        for candidate in _etag_candidates(header)
+    )
+
+
+def write_item(item_id: Optional[int], name: str, price: float):
+    """יצירה (item_id=None) או החלפה - שם ארוך מדי ל-shared memory הוא 422, מאגר מלא 507"""
+    try:
+        if item_id is None:
+            return store.create(name, price)
+        return store.put(item_id, name, price)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    except StoreFull as exc:
+        raise HTTPException(status_code=507, detail=str(exc))
 
 @app.get("/")
 def read_root():
@@ -16,64 +80,62 @@ def read_root():
 @app.get("/items")
 def get_all_items():
     """GET - קבלת כל הפריטים"""
-    return {"items": list(items.values())}
+    return trusted_response({"items": store.values()})
 
 @app.get("/items/{item_id}")
-def get_item(item_id: int):
-    """GET - קבלת פריט לפי ID"""
-    if item_id in items:
-        return items[item_id]
-    return {"error": "Item not found"}, 404
+def get_item(item_id: int, request: Request, response: Response):
+    """GET - קבלת פריט לפי ID (304 אם ה-ETag ב-If-None-Match עדיין עדכני)"""
+    item, version = get_existing_item(item_id)
+    etag = item_etag(item_id, version)
+    if if_none_match(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return item
 
 @app.post("/items")
-async def create_item(request: Request):
+async def create_item(response: Response, body: ItemCreate = Depends(json_body(ItemCreate))):
     """POST - יצירת פריט חדש"""
-    body = await request.json()
-    new_id = max(items.keys()) + 1 if items else 1
-    new_item = {
-        "id": new_id,
-        "name": body.get("name", "Unknown"),
-        "price": body.get("price", 0.0)
-    }
-    items[new_id] = new_item
+    new_item, version = write_item(None, body.name, body.price)
+    response.headers["ETag"] = item_etag(new_item["id"], version)
     return {"message": "Item created", "item": new_item}
 
 @app.put("/items/{item_id}")
-async def update_item_full(item_id: int, request: Request):
+async def update_item_full(
+    item_id: int, request: Request, response: Response, body: ItemCreate = Depends(json_body(ItemCreate))
+):
     """PUT - עדכון מלא של פריט (מחליף את כל השדות)"""
-    body = await request.json()
-    if item_id not in items:
-        return {"error": "Item not found"}, 404
-    
-    items[item_id] = {
-        "id": item_id,
-        "name": body.get("name", "Unknown"),
-        "price": body.get("price", 0.0)
-    }
-    return {"message": "Item fully updated", "item": items[item_id]}
+    # הבדיקות אחרי קריאת ה-body, ועד העדכון תחת store.lock (ובלי await) - אין עדכון
+    # מתחרה באמצע, גם לא מ-worker אחר
+    with store.lock():
+        _, version = get_existing_item(item_id)
+        check_if_match(request, item_id, version)
+        item, version = write_item(item_id, body.name, body.price)
+    response.headers["ETag"] = item_etag(item_id, version)
+    return {"message": "Item fully updated", "item": item}
 
 @app.patch("/items/{item_id}")
-async def update_item_partial(item_id: int, request: Request):
+async def update_item_partial(
+    item_id: int, request: Request, response: Response, body: ItemPatch = Depends(json_body(ItemPatch))
+):
     """PATCH - עדכון חלקי של פריט (רק שדות שנשלחו)"""
-    body = await request.json()
-    if item_id not in items:
-        return {"error": "Item not found"}, 404
-    
-    # עדכון רק השדות שנשלחו
-    if "name" in body:
-        items[item_id]["name"] = body["name"]
-    if "price" in body:
-        items[item_id]["price"] = body["price"]
-    
-    return {"message": "Item partially updated", "item": items[item_id]}
+    with store.lock():
+        item, version = get_existing_item(item_id)
+        check_if_match(request, item_id, version)
+
+        # עדכון רק השדות שנשלחו
+        name = body.name if body.name is not None else item["name"]
+        price = body.price if body.price is not None else item["price"]
+        item, version = write_item(item_id, name, price)
+    response.headers["ETag"] = item_etag(item_id, version)
+    return {"message": "Item partially updated", "item": item}
 
 @app.delete("/items/{item_id}")
-def delete_item(item_id: int):
+async def delete_item(item_id: int, request: Request):
     """DELETE - מחיקת פריט"""
-    if item_id not in items:
-        return {"error": "Item not found"}, 404
-    
-    deleted_item = items.pop(item_id)
+    with store.lock():
+        _, version = get_existing_item(item_id)
+        check_if_match(request, item_id, version)
+        deleted_item = store.delete(item_id)
     return {"message": "Item deleted", "item": deleted_item}
 
 
@@ -1,10 +1,41 @@
 from fastapi import FastAPI, Request, HTTPException
 import json
 import os
+import sys
 import uvicorn
 from datetime import datetime
 
-app = FastAPI()
+# תיקיית השורש של הפרויקט - בשביל ה-middlewares המשותפים
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from middlewares import MetricsMiddleware, RateLimitMiddleware, RateLimit, CompressionMiddleware, FastJSONResponse, trusted_response
+from middlewares import install_profiling, install_tracing, traced
+
+# סריאליזציה מהירה עם orjson (אם מותקן)
+app = FastAPI(default_response_class=FastJSONResponse)
+
+# דחיסת תשובות גדולות (/export, /users, /notes) - gzip, ו-brotli/zstd אם מותקנים
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+# הגבלת קצב לכל IP - נקודות הקצה הכבדות (קריאה/כתיבה של כל הקבצים) מוגבלות יותר
+app.add_middleware(
+    RateLimitMiddleware,
+    default=RateLimit(600, 60),
+    routes={
+        "/export": RateLimit(10, 60),
+        "/backup": RateLimit(10, 60),
+        "/import": RateLimit(10, 60),
+        "/metrics": None,
+    },
+)
+
+# מדדים (מספר בקשות, זמני תגובה) זמינים ב-/metrics
+app.add_middleware(MetricsMiddleware)
+
+# פרופיילינג לפי דרישה - פעיל רק כשמוגדר PROFILE_SECRET (אחרת אין שום עלות)
+install_profiling(app)
+
+# tracing (traceparent + spans סביב קריאה/כתיבה של קבצים) - פעיל רק כשמוגדר TRACE_EXPORT
+install_tracing(app, service_name="json_storage")
 
 # נתיב לקובץ JSON
 DATA_DIR = "data"
@@ -16,6 +47,7 @@ LOG_FILE = os.path.join(DATA_DIR, "activity_log.json")
 os.makedirs(DATA_DIR, exist_ok=True)
 
 
+@traced(kind="io")
 def load_json_file(filepath):
     """טוען קובץ JSON, אם לא קיים מחזיר רשימה ריקה"""
     if os.path.exists(filepath):
@@ -24,6 +56,7 @@ def load_json_file(filepath):
     return []
 
 
+@traced(kind="io")
 def save_json_file(filepath, data):
     """שומר נתונים לקובץ JSON"""
     with open(filepath, 'w', encoding='utf-8') as f:
@@ -62,7 +95,7 @@ def read_root():
 def get_users():
     """GET - קבלת כל המשתמשים מקובץ JSON"""
     users = load_json_file(USERS_FILE)
-    return {"count": len(users), "users": users}
+    return trusted_response({"count": len(users), "users": users})
 
 
 @app.get("/users/{user_id}")
@@ -140,7 +173,7 @@ def delete_user(user_id: int):
 def get_notes():
     """GET - קבלת כל ההערות"""
     notes = load_json_file(NOTES_FILE)
-    return {"count": len(notes), "notes": notes}
+    return trusted_response({"count": len(notes), "notes": notes})
 
 
 @app.post("/notes")
@@ -198,7 +231,7 @@ async def update_note(note_id: int, request: Request):
 def get_logs():
     """GET - קבלת כל הלוגים"""
     logs = load_json_file(LOG_FILE)
-    return {"count": len(logs), "logs": logs}
+    return trusted_response({"count": len(logs), "logs": logs})
 
 
 @app.delete("/logs")
@@ -235,12 +268,13 @@ def create_backup():
 @app.get("/export")
 def export_all_data():
     """GET - ייצוא כל הנתונים בפורמט JSON אחד"""
-    return {
+    # הנתונים נקראו מקבצי JSON, אז הם כבר מוכנים לסריאליזציה - בלי jsonable_encoder
+    return trusted_response({
         "exported_at": datetime.now().isoformat(),
         "users": load_json_file(USERS_FILE),
         "notes": load_json_file(NOTES_FILE),
         "logs": load_json_file(LOG_FILE)
-    }
+    })
 
 
 @app.post("/import")
@@ -0,0 +1,18 @@
+"""Middlewares משותפים (ASGI טהור) לכל האפליקציות בפרויקט"""
+from .metrics import MetricsMiddleware, MetricsRegistry, LatencyHistogram
+from .ratelimit import RateLimitMiddleware, RateLimit, MemoryStore, SharedMemoryStore, RedisStore
+from .compression import CompressionMiddleware
+from .responses import FastJSONResponse, trusted_response
+from .response_cache import ResponseCacheMiddleware, ResponseCache, static_response, cached_response
+from .profiling import ProfilingMiddleware, StackSampler, install_profiling
+from .tracing import TracingMiddleware, install_tracing, traced, span
+
+__all__ = [
+    "MetricsMiddleware", "MetricsRegistry", "LatencyHistogram",
+    "RateLimitMiddleware", "RateLimit", "MemoryStore", "SharedMemoryStore", "RedisStore",
+    "CompressionMiddleware",
+    "FastJSONResponse", "trusted_response",
+    "ResponseCacheMiddleware", "ResponseCache", "static_response", "cached_response",
+    "ProfilingMiddleware", "StackSampler", "install_profiling",
+    "TracingMiddleware", "install_tracing", "traced", "span",
+]
@@ -0,0 +1,80 @@
+"""
+מדידת CompressionMiddleware על רשימות גדולות (בסגנון GET /todos ו-/export)
+מדווח: גודל התשובה, זמן יצירה+דחיסה, וזמן העברה משוער ברוחב פס נתון
+
+הרצה מתיקיית השורש: python -m middlewares.bench_compression
+"""
+import asyncio
+import time
+
+from fastapi import FastAPI
+
+from middlewares.compression import CompressionMiddleware, available_encodings
+
+SIZES = (1_000, 10_000, 100_000)
+BANDWIDTHS_MBIT = (10, 100)
+
+
+def build_app(count: int) -> FastAPI:
+    todos = [
+        {
+            "id": i,
+            "title": f"Task number {i}",
+            "description": "Write the weekly report and send it to the team" if i % 3 else None,
+            "completed": i % 2 == 0,
+            "created_at": "2024-05-01 12:00:00",
+        }
+        for i in range(count)
+    ]
+    app = FastAPI()
+
+    @app.get("/todos")
+    def get_todos():
+        return todos
+
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    return app
+
+
+async def request(app, accept_encoding: str):
+    body = bytearray()
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.extend(message.get("body", b""))
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/todos", "raw_path": b"/todos", "root_path": "", "query_string": b"",
+        "headers": [(b"accept-encoding", accept_encoding.encode())] if accept_encoding else [],
+        "client": ("127.0.0.1", 1234), "server": ("127.0.0.1", 8000),
+    }
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    return len(body), time.perf_counter() - start
+
+
+async def main():
+    encodings = ["identity"] + list(available_encodings())
+    header = f"{'items':>8} {'encoding':<9}{'bytes':>12}{'ratio':>8}{'server ms':>11}"
+    header += "".join(f"{f'total@{mbit}Mbit':>16}" for mbit in BANDWIDTHS_MBIT)
+    print(header)
+    for count in SIZES:
+        app = build_app(count)
+        baseline = None
+        for encoding in encodings:
+            await request(app, encoding)
+            size, seconds = min([await request(app, encoding) for _ in range(3)], key=lambda result: result[1])
+            baseline = baseline or size
+            line = f"{count:>8} {encoding:<9}{size:>12,}{baseline / size:>7.1f}x{seconds * 1e3:>11.1f}"
+            for mbit in BANDWIDTHS_MBIT:
+                transfer = size * 8 / (mbit * 1_000_000)
+                line += f"{(seconds + transfer) * 1e3:>14.1f}ms"
+            print(line)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,76 @@
+"""
+מדידת התקורה של MetricsMiddleware לכל בקשה
+משווה: בלי middleware / MetricsMiddleware (ASGI טהור) / TimingMiddleware מהמדריך (BaseHTTPMiddleware)
+
+הרצה מתיקיית השורש: python -m middlewares.bench_metrics
+"""
+import asyncio
+import time
+
+from fastapi import FastAPI
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from middlewares.metrics import MetricsMiddleware, MetricsRegistry
+
+REQUESTS = 20_000
+
+
+class TimingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        start_time = time.time()
+        response = await call_next(request)
+        response.headers["X-Process-Time"] = str(time.time() - start_time)
+        return response
+
+
+def build_app(middleware=None, **options) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        return {"item_id": item_id}
+
+    if middleware is not None:
+        app.add_middleware(middleware, **options)
+    return app
+
+
+async def drive(app, count: int) -> float:
+    """שולח בקשות ישירות דרך ממשק ASGI, בלי רשת - כדי למדוד רק את התקורה"""
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for i in range(count):
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": f"/items/{i}", "raw_path": f"/items/{i}".encode(),
+            "root_path": "", "query_string": b"", "headers": [], "client": ("127.0.0.1", 1234),
+            "server": ("127.0.0.1", 8000),
+        }
+        await app(scope, receive, send)
+    return (time.perf_counter() - start) / count
+
+
+async def main():
+    variants = {
+        "no middleware": build_app(),
+        "MetricsMiddleware (pure ASGI)": build_app(MetricsMiddleware, registry=MetricsRegistry()),
+        "TimingMiddleware (BaseHTTPMiddleware)": build_app(TimingMiddleware),
+    }
+    # חימום
+    for app in variants.values():
+        await drive(app, 500)
+
+    baseline = None
+    for name, app in variants.items():
+        per_request = min([await drive(app, REQUESTS) for _ in range(3)])
+        baseline = per_request if baseline is None else baseline
+        print(f"{name:<40}{per_request * 1e6:>8.1f}us/request   overhead {(per_request - baseline) * 1e6:>6.1f}us")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+"""
+השוואת שכבת התשובות: לפני (json רגיל + validation של response_model) ואחרי (orjson + trusted_response)
+על GET /todos עם 100,000 משימות ועל /export של json_storage
+
+הרצה מתיקיית השורש: python -m middlewares.bench_responses
+"""
+import asyncio
+import importlib.util
+import json
+import os
+import tempfile
+import time
+
+from middlewares import responses
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ITEMS = 100_000
+
+
+def load_app(app_dir: str):
+    spec = importlib.util.spec_from_file_location(f"{app_dir}_main", os.path.join(ROOT, app_dir, "main.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+async def get(app, path: str, client_id: int):
+    size = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal size
+        if message["type"] == "http.response.body":
+            size += len(message.get("body", b""))
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        # כתובת שונה לכל בקשה - כדי לא להיתקע ב-rate limit של /export
+        "headers": [], "client": (f"10.0.{client_id // 256}.{client_id % 256}", 1234),
+        "server": ("127.0.0.1", 8000),
+    }
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    return time.perf_counter() - start, size
+
+
+async def measure(app, path: str, runs: int = 3):
+    results = [await get(app, path, i) for i in range(runs + 1)][1:]
+    return min(results)
+
+
+async def compare(label: str, app, path: str):
+    fast_orjson = responses.orjson
+    timings = {}
+    for mode, use_orjson, trusted in (("before", False, False), ("after", True, True)):
+        responses.orjson = fast_orjson if use_orjson else None
+        responses.TRUST_INTERNAL_DATA = trusted
+        timings[mode] = await measure(app, path)
+    responses.orjson = fast_orjson
+    responses.TRUST_INTERNAL_DATA = True
+
+    before, after = timings["before"][0], timings["after"][0]
+    print(f"{label:<34}before {before * 1e3:>8.1f}ms   after {after * 1e3:>8.1f}ms   "
+          f"{before / after:>5.1f}x   ({timings['after'][1]:,} bytes)")
+
+
+async def main():
+    if responses.orjson is None:
+        print("orjson is not installed - 'after' falls back to the stdlib json encoder")
+
+    todos = load_app("todos")
+    todos.store.load(
+        (todos.TodoRecord(i, f"Task {i}", "Some description" if i % 2 else None, i % 3 == 0, 1714564800)
+         for i in range(1, ITEMS + 1)),
+        next_id=ITEMS + 1,
+    )
+    await compare(f"GET /todos ({ITEMS:,} items)", todos.app, "/todos")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        storage = load_app("json_storage")
+        records = ITEMS // 3
+        with open(storage.USERS_FILE, "w", encoding="utf-8") as f:
+            json.dump([{"id": i, "name": f"User {i}", "email": f"user{i}@example.com", "age": 20 + i % 50,
+                        "created_at": "2024-05-01T12:00:00"} for i in range(records)], f)
+        with open(storage.NOTES_FILE, "w", encoding="utf-8") as f:
+            json.dump([{"id": i, "title": f"Note {i}", "content": "Lorem ipsum dolor sit amet",
+                        "tags": ["work", "todo"], "created_at": "2024-05-01T12:00:00"} for i in range(records)], f)
+        with open(storage.LOG_FILE, "w", encoding="utf-8") as f:
+            json.dump([{"timestamp": "2024-05-01T12:00:00", "action": "CREATE_USER",
+                        "details": f"Created user {i}"} for i in range(records)], f)
+        await compare(f"GET /export ({records * 3:,} records)", storage.app, "/export")
+        os.chdir(ROOT)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
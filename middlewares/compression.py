@@ -0,0 +1,201 @@
+"""
+דחיסת תשובות - ASGI טהור, gzip תמיד ו-brotli/zstd אם הספריות מותקנות
+
+- בוחר קידוד לפי Accept-Encoding של הלקוח (כולל q-values)
+- תשובה קטנה מ-minimum_size נשלחת כמו שהיא
+- תשובת streaming נדחסת חלק-אחר-חלק (כל chunk נשלח מיד, בלי לחכות לסוף)
+
+שימוש:
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+"""
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# סוגי תוכן שכבר דחוסים - אין טעם לדחוס שוב
+_SKIP_CONTENT_TYPES = (b"image/", b"video/", b"audio/", b"application/zip", b"application/gzip", b"text/event-stream")
+
+
+class _GzipCompressor:
+    def __init__(self, level: int):
+        # wbits=31 => פורמט gzip (header + crc)
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_FINISH)
+
+
+class _BrotliCompressor:
+    def __init__(self, level: int):
+        self._obj = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data) + self._obj.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._obj.process(data) + self._obj.finish()
+
+
+class _ZstdCompressor:
+    def __init__(self, level: int):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._obj.compress(data) + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+def available_encodings(gzip_level: int = 6, brotli_level: int = 4, zstd_level: int = 3) -> dict:
+    """קידודים זמינים לפי סדר העדפה של השרת: encoding -> factory"""
+    encodings = {}
+    if brotli is not None:
+        encodings["br"] = lambda: _BrotliCompressor(brotli_level)
+    if zstandard is not None:
+        encodings["zstd"] = lambda: _ZstdCompressor(zstd_level)
+    encodings["gzip"] = lambda: _GzipCompressor(gzip_level)
+    return encodings
+
+
+def parse_accept_encoding(header: str) -> dict:
+    """'gzip;q=0.8, br' -> {'gzip': 0.8, 'br': 1.0}"""
+    result = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        result[name] = q
+    return result
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = 1024, encodings: dict = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = encodings if encodings is not None else available_encodings()
+
+    def _choose(self, scope):
+        accept = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        if not accept:
+            return None
+        accepted = parse_accept_encoding(accept)
+        wildcard = accepted.get("*", 0.0)
+        best, best_q = None, 0.0
+        # סדר המילון = העדפת השרת, q של הלקוח מכריע
+        for encoding in self.encodings:
+            q = accepted.get(encoding, wildcard)
+            if q > best_q:
+                best, best_q = encoding, q
+        return best
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = self._choose(scope)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressingResponder(send, encoding, self.encodings[encoding], self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    """מחזיק את ה-start message עד שרואים את ה-chunk הראשון ומחליטים אם לדחוס"""
+
+    def __init__(self, send, encoding: str, factory, minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.factory = factory
+        self.minimum_size = minimum_size
+        self.start_message = None
+        self.compressor = None
+        self.passthrough = False
+
+    async def send(self, message):
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            self.start_message = message
+            headers = message.get("headers", [])
+            for name, value in headers:
+                if name == b"content-encoding" or (name == b"content-type" and value.startswith(_SKIP_CONTENT_TYPES)):
+                    self.passthrough = True
+                    break
+            if self.passthrough:
+                await self._send(message)
+            return
+
+        if message_type != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            if not more_body and len(body) < self.minimum_size:
+                # קטן מדי - שולחים בלי דחיסה
+                self.passthrough = True
+                await self._send(self.start_message)
+                await self._send(message)
+                return
+
+            self.compressor = self.factory()
+            headers = [
+                (name, value) for name, value in self.start_message.get("headers", [])
+                if name not in (b"content-length", b"content-encoding")
+            ]
+            headers.append((b"content-encoding", self.encoding.encode("ascii")))
+            headers = _add_vary(headers)
+
+            if not more_body:
+                # כל התשובה כבר כאן - דוחסים בבת אחת ושולחים עם content-length
+                compressed = self.compressor.finish(body)
+                headers.append((b"content-length", str(len(compressed)).encode("ascii")))
+                await self._send({**self.start_message, "headers": headers})
+                await self._send({"type": "http.response.body", "body": compressed})
+                return
+
+            await self._send({**self.start_message, "headers": headers})
+
+        if more_body:
+            chunk = self.compressor.compress(body) if body else b""
+            if chunk:
+                await self._send({"type": "http.response.body", "body": chunk, "more_body": True})
+        else:
+            await self._send({"type": "http.response.body", "body": self.compressor.finish(body)})
+
+
+def _add_vary(headers):
+    for index, (name, value) in enumerate(headers):
+        if name == b"vary":
+            if b"accept-encoding" not in value.lower():
+                headers[index] = (name, value + b", Accept-Encoding")
+            return headers
+    headers.append((b"vary", b"Accept-Encoding"))
+    return headers
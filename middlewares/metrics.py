@@ -0,0 +1,204 @@
+"""
+Middleware למדידת בקשות - ASGI טהור (בלי BaseHTTPMiddleware)
+
+סופר בקשות לפי route/method/status, מספר בקשות פעילות (in-flight),
+והיסטוגרמת זמני תגובה בסגנון HDR. הכל נחשף ב-/metrics בפורמט הטקסט של Prometheus.
+
+שימוש:
+    app.add_middleware(MetricsMiddleware)
+"""
+import time
+
+# גבולות ה-buckets שמוצגים ל-Prometheus (בשניות)
+PROMETHEUS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+# 16 תתי-buckets לכל חזקה של 2 => שגיאה יחסית של עד 1/16
+_SUB_BUCKET_BITS = 4
+_SUB_BUCKETS = 1 << _SUB_BUCKET_BITS
+_LINEAR_LIMIT = _SUB_BUCKETS * 2
+
+
+def _bucket_index(value: int) -> int:
+    if value < _LINEAR_LIMIT:
+        return value
+    shift = value.bit_length() - _SUB_BUCKET_BITS - 1
+    return (shift << _SUB_BUCKET_BITS) + (value >> shift)
+
+
+def _bucket_upper_bound(index: int) -> int:
+    if index < _LINEAR_LIMIT:
+        return index + 1
+    shift = (index >> _SUB_BUCKET_BITS) - 1
+    mantissa = (index & (_SUB_BUCKETS - 1)) + _SUB_BUCKETS
+    return (mantissa + 1) << shift
+
+
+class LatencyHistogram:
+    """
+    היסטוגרמה לוגריתמית-ליניארית (כמו HDR Histogram) של זמנים במיקרו-שניות
+    רישום הוא O(1) - חישוב אינדקס והגדלת מונה ברשימה
+    """
+
+    __slots__ = ("counts", "count", "total")
+
+    def __init__(self):
+        self.counts = []
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, seconds: float):
+        index = _bucket_index(int(seconds * 1_000_000))
+        counts = self.counts
+        if index >= len(counts):
+            counts.extend([0] * (index + 1 - len(counts)))
+        counts[index] += 1
+        self.count += 1
+        self.total += seconds
+
+    def quantile(self, q: float) -> float:
+        """ערך (בשניות) שמתחתיו נמצאים q מהמדידות - לפי הגבול העליון של ה-bucket"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if bucket_count and seen >= target:
+                return _bucket_upper_bound(index) / 1_000_000
+        return _bucket_upper_bound(len(self.counts) - 1) / 1_000_000
+
+    def cumulative(self, bounds):
+        """מספר המדידות שקטנות או שוות לכל גבול - בשביל buckets של Prometheus"""
+        result = []
+        seen = 0
+        index = 0
+        counts = self.counts
+        for bound in bounds:
+            limit = bound * 1_000_000
+            while index < len(counts) and _bucket_upper_bound(index) <= limit:
+                seen += counts[index]
+                index += 1
+            result.append(seen)
+        return result
+
+
+class MetricsRegistry:
+    """מאגר המדדים של תהליך אחד (כל worker מחזיק מאגר משלו)"""
+
+    def __init__(self):
+        self.requests = {}    # (method, route, status) -> count
+        self.latency = {}     # (method, route) -> LatencyHistogram
+        self.in_flight = 0
+        self.started_at = time.time()
+
+    def observe(self, method: str, route: str, status: int, seconds: float):
+        key = (method, route, status)
+        self.requests[key] = self.requests.get(key, 0) + 1
+        histogram = self.latency.get((method, route))
+        if histogram is None:
+            histogram = self.latency[(method, route)] = LatencyHistogram()
+        histogram.record(seconds)
+
+    def render(self) -> str:
+        """מחזיר את כל המדדים בפורמט הטקסט של Prometheus"""
+        lines = [
+            "# HELP http_requests_total Total HTTP requests by route, method and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status), count in sorted(self.requests.items()):
+            lines.append(f'http_requests_total{{method="{method}",route="{_escape(route)}",status="{status}"}} {count}')
+
+        lines += [
+            "# HELP http_requests_in_flight HTTP requests currently being served.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+            "# HELP http_request_duration_seconds HTTP request latency.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), histogram in sorted(self.latency.items()):
+            labels = f'method="{method}",route="{_escape(route)}"'
+            for bound, count in zip(PROMETHEUS_BUCKETS, histogram.cumulative(PROMETHEUS_BUCKETS)):
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {histogram.total:.6f}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {histogram.count}")
+
+        lines += [
+            "# HELP http_request_duration_quantile_seconds Latency quantiles from the HDR histogram.",
+            "# TYPE http_request_duration_quantile_seconds gauge",
+        ]
+        for (method, route), histogram in sorted(self.latency.items()):
+            labels = f'method="{method}",route="{_escape(route)}"'
+            for q in QUANTILES:
+                lines.append(f'http_request_duration_quantile_seconds{{{labels},quantile="{q}"}} {histogram.quantile(q):.6f}')
+
+        lines += [
+            "# HELP process_start_time_seconds Start time of the process since unix epoch.",
+            "# TYPE process_start_time_seconds gauge",
+            f"process_start_time_seconds {self.started_at:.3f}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _route_label(scope) -> str:
+    # FastAPI שם את ה-route שנבחר ב-scope - משתמשים בתבנית (/todos/{todo_id}) ולא בנתיב עצמו
+    route = scope.get("route")
+    if route is not None:
+        return getattr(route, "path_format", None) or getattr(route, "path", "<unknown>")
+    return "<unmatched>"
+
+
+class MetricsMiddleware:
+    """Middleware ASGI טהור - עוטף את send בלבד, לא קורא או מעתיק את גוף התשובה"""
+
+    def __init__(self, app, registry: MetricsRegistry = None, metrics_path: str = "/metrics"):
+        self.app = app
+        self.registry = registry if registry is not None else default_registry
+        self.metrics_path = metrics_path
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if scope["path"] == self.metrics_path:
+            await self._send_metrics(send)
+            return
+
+        registry = self.registry
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        registry.in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            registry.in_flight -= 1
+            registry.observe(scope["method"], _route_label(scope), status, time.perf_counter() - start)
+
+    async def _send_metrics(self, send):
+        body = self.registry.render().encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/plain; version=0.0.4; charset=utf-8"),
+                (b"content-length", str(len(body)).encode("ascii")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+# מאגר ברירת מחדל משותף לכל ה-middlewares באותו תהליך
+default_registry = MetricsRegistry()
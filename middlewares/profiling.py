@@ -0,0 +1,227 @@
+"""
+פרופיילינג לפי דרישה - ASGI טהור, sampling profiler בלי ספריות חיצוניות
+
+1. פרופיילינג של בקשה אחת: שולחים header  X-Profile: <secret>  (או ?profile=<secret>).
+   בזמן הבקשה thread נפרד דוגם את ה-stacks של כל ה-threads, והפלט מוחזר
+   במקום גוף התשובה (או נשמר לקובץ אם הוגדר output_dir).
+2. דגימה ברקע (background_interval): thread שדוגם כל הזמן ומצבר stacks חמים
+   על פני כל הבקשות. זמין ב-GET /admin/profile עם אותו header.
+
+הפלט הוא בפורמט folded stacks ("a;b;c 12") - מתאים ל-flamegraph.pl, speedscope וכו'.
+
+כשאין secret לא מוסיפים את ה-middleware בכלל, כך שאין שום עלות:
+    install_profiling(app)   # PROFILE_SECRET, PROFILE_OUTPUT_DIR, PROFILE_SAMPLE_INTERVAL
+"""
+import hmac
+import os
+import sys
+import threading
+import time
+import uuid
+from urllib.parse import parse_qs
+
+# פריימים שבהם thread ממתין (ולא עובד) - לא נספרים
+_IDLE_FILES = ("threading.py", "selectors.py", "queue.py")
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def fold_stack(frame):
+    """stack -> שורה אחת 'root;...;leaf', או None אם ה-thread ממתין"""
+    leaf = frame.f_code
+    if leaf.co_filename.endswith(_IDLE_FILES) or (leaf.co_name == "_worker" and leaf.co_filename.endswith("thread.py")):
+        return None
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.reverse()
+    return ";".join(labels)
+
+
+class StackSampler:
+    """thread שדוגם את כל ה-threads בתהליך כל interval שניות ומצבר ספירות לכל stack"""
+
+    def __init__(self, interval: float = 0.001, max_stacks: int = 10_000):
+        self.interval = interval
+        self.max_stacks = max_stacks
+        self.counts = {}
+        self.samples = 0
+        self.dropped = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.sample(own_ident)
+
+    def sample(self, exclude_ident: int = None):
+        frames = sys._current_frames()
+        with self._lock:
+            self.samples += 1
+            for ident, frame in frames.items():
+                if ident == exclude_ident:
+                    continue
+                stack = fold_stack(frame)
+                if stack is None:
+                    continue
+                if stack in self.counts:
+                    self.counts[stack] += 1
+                elif len(self.counts) < self.max_stacks:
+                    self.counts[stack] = 1
+                else:
+                    self.dropped += 1
+
+    def folded(self, top: int = None) -> str:
+        with self._lock:
+            items = sorted(self.counts.items(), key=lambda item: item[1], reverse=True)
+        if top is not None:
+            items = items[:top]
+        return "".join(f"{stack} {count}\n" for stack, count in items)
+
+    def reset(self):
+        with self._lock:
+            self.counts.clear()
+            self.samples = 0
+            self.dropped = 0
+
+
+class ProfilingMiddleware:
+    def __init__(
+        self,
+        app,
+        secret: str,
+        interval: float = 0.001,
+        output_dir: str = None,
+        background_interval: float = None,
+        admin_path: str = "/admin/profile",
+    ):
+        if not secret:
+            raise ValueError("ProfilingMiddleware requires a non-empty secret")
+        self.app = app
+        self.secret = secret.encode("utf-8")
+        self.interval = interval
+        self.output_dir = output_dir
+        self.admin_path = admin_path
+        self.background = None
+        if background_interval:
+            self.background = StackSampler(interval=background_interval).start()
+
+    def _authorized(self, scope) -> bool:
+        token = None
+        for name, value in scope["headers"]:
+            if name == b"x-profile":
+                token = value
+                break
+        if token is None and b"profile=" in scope.get("query_string", b""):
+            values = parse_qs(scope["query_string"].decode("latin-1")).get("profile")
+            token = values[0].encode("latin-1") if values else None
+        return token is not None and hmac.compare_digest(token, self.secret)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._authorized(scope):
+            await self.app(scope, receive, send)
+            return
+
+        if scope["path"] == self.admin_path:
+            await self._send_background(scope, send)
+            return
+
+        sampler = StackSampler(interval=self.interval).start()
+        start = time.perf_counter()
+        messages = []
+        path = None
+
+        if self.output_dir is None:
+            async def target(message):
+                messages.append(message)
+        else:
+            # שומרים לקובץ - התשובה המקורית נשלחת כרגיל, עם header שמצביע על הקובץ
+            path = os.path.join(self.output_dir, f"profile_{int(time.time())}_{uuid.uuid4().hex[:8]}.folded")
+
+            async def target(message):
+                if message["type"] == "http.response.start":
+                    message["headers"] = list(message.get("headers", [])) + [(b"x-profile-file", path.encode("utf-8"))]
+                await send(message)
+
+        try:
+            await self.app(scope, receive, target)
+        finally:
+            sampler.stop()
+        elapsed = time.perf_counter() - start
+
+        if path is not None:
+            os.makedirs(self.output_dir, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(sampler.folded())
+            return
+
+        # מחזירים את הפרופיל במקום התשובה המקורית
+        status = next((m["status"] for m in messages if m["type"] == "http.response.start"), 500)
+        await _send_text(send, sampler.folded().encode("utf-8"), [
+            (b"x-profile-samples", str(sampler.samples).encode("ascii")),
+            (b"x-profile-duration-ms", f"{elapsed * 1000:.1f}".encode("ascii")),
+            (b"x-profile-original-status", str(status).encode("ascii")),
+        ])
+
+    async def _send_background(self, scope, send):
+        if self.background is None:
+            await _send_text(send, b"background sampling is disabled\n", [], status=404)
+            return
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        top = _parse_top(query.get("top", [""])[0])
+        body = self.background.folded(top=top).encode("utf-8")
+        if "reset" in query:
+            self.background.reset()
+        await _send_text(send, body, [
+            (b"x-profile-samples", str(self.background.samples).encode("ascii")),
+            (b"x-profile-dropped", str(self.background.dropped).encode("ascii")),
+        ])
+
+
+def _parse_top(value: str, default: int = 50) -> int:
+    """?top= - ערך שאינו מספר חוזר לברירת המחדל, ולפחות 1"""
+    try:
+        return max(1, int(value))
+    except ValueError:
+        return default
+
+
+async def _send_text(send, body: bytes, extra_headers, status: int = 200):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"text/plain; charset=utf-8"),
+            (b"content-length", str(len(body)).encode("ascii")),
+        ] + extra_headers,
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def install_profiling(app):
+    """מוסיף ProfilingMiddleware אם מוגדר PROFILE_SECRET, אחרת לא עושה כלום"""
+    secret = os.environ.get("PROFILE_SECRET")
+    if not secret:
+        return False
+    app.add_middleware(
+        ProfilingMiddleware,
+        secret=secret,
+        output_dir=os.environ.get("PROFILE_OUTPUT_DIR"),
+        background_interval=float(os.environ.get("PROFILE_SAMPLE_INTERVAL", 0)) or None,
+    )
+    return True
@@ -0,0 +1,246 @@
+"""
+הגבלת קצב (rate limiting) - ASGI טהור, אלגוריתם GCRA
+
+במקום לשמור רשימת זמנים לכל IP (כמו RateLimitMiddleware במדריך),
+לכל מפתח נשמר מספר אחד בלבד - TAT (theoretical arrival time).
+כל בדיקה היא O(1), ומפתחות לא פעילים נמחקים מעת לעת.
+
+שימוש:
+    app.add_middleware(
+        RateLimitMiddleware,
+        default=RateLimit(100, 60),                  # 100 בקשות לדקה
+        routes={"/export": RateLimit(5, 60), "/docs": None},   # None = בלי הגבלה
+    )
+
+שיתוף מצב בין workers: store=SharedMemoryStore("myapp") או store=RedisStore(redis.asyncio.Redis())
+"""
+import hashlib
+import inspect
+import json
+import os
+import struct
+import tempfile
+import time
+from typing import NamedTuple
+
+
+class RateLimit:
+    """requests בקשות לכל period שניות, עם אפשרות ל-burst"""
+
+    __slots__ = ("requests", "period", "burst", "emission_interval", "tolerance")
+
+    def __init__(self, requests: int, period: float = 60.0, burst: int = None):
+        if requests <= 0 or period <= 0:
+            raise ValueError("requests and period must be positive")
+        self.requests = requests
+        self.period = period
+        self.burst = burst if burst is not None else requests
+        # מרווח הזמן "המגיע" לכל בקשה, וכמה מותר להקדים אותו
+        self.emission_interval = period / requests
+        self.tolerance = self.emission_interval * (self.burst - 1)
+
+
+class Decision(NamedTuple):
+    allowed: bool
+    remaining: int
+    retry_after: float
+
+
+def gcra(tat: float, now: float, limit: RateLimit):
+    """צעד GCRA אחד - מחזיר (ה-TAT החדש לשמירה או None אם נדחה, החלטה)"""
+    tat = max(tat, now)
+    if tat - now > limit.tolerance:
+        return None, Decision(False, 0, tat - limit.tolerance - now)
+    new_tat = tat + limit.emission_interval
+    remaining = int((limit.tolerance + limit.emission_interval - (new_tat - now)) / limit.emission_interval)
+    return new_tat, Decision(True, remaining, 0.0)
+
+
+class MemoryStore:
+    """מצב בזיכרון של תהליך אחד - המהיר ביותר, אבל כל worker סופר לעצמו"""
+
+    def __init__(self, sweep_interval: float = 60.0):
+        self._tats = {}
+        self.sweep_interval = sweep_interval
+        self._next_sweep = time.time() + sweep_interval
+
+    def hit(self, key: str, limit: RateLimit, now: float) -> Decision:
+        new_tat, decision = gcra(self._tats.get(key, now), now, limit)
+        if new_tat is not None:
+            self._tats[key] = new_tat
+        if now >= self._next_sweep:
+            self._sweep(now)
+        return decision
+
+    def _sweep(self, now: float):
+        # מפתח שה-TAT שלו עבר - הדלי שלו מלא, אפשר לשכוח אותו
+        self._tats = {key: tat for key, tat in self._tats.items() if tat > now}
+        self._next_sweep = now + self.sweep_interval
+
+    def __len__(self):
+        return len(self._tats)
+
+
+class SharedMemoryStore:
+    """
+    מצב משותף לכל ה-workers במכונה אחת (Linux/macOS)
+    טבלת hash בגודל קבוע ב-shared memory: כל slot = hash של המפתח (8 בתים) + TAT (8 בתים).
+    slot שה-TAT שלו עבר נחשב פנוי, כך שמפתחות לא פעילים מתפנים לבד.
+    """
+
+    _SLOT = struct.Struct("<Qd")
+    _PROBES = 8
+
+    def __init__(self, name: str, slots: int = 65536):
+        import fcntl
+        from multiprocessing import shared_memory
+
+        self._fcntl = fcntl
+        self.slots = slots
+        size = slots * self._SLOT.size
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            self._shm = shared_memory.SharedMemory(name=name)
+        _untrack(self._shm)
+        self._buf = self._shm.buf
+        self._lock_file = open(os.path.join(tempfile.gettempdir(), f"{name}.lock"), "a")
+
+    def hit(self, key: str, limit: RateLimit, now: float) -> Decision:
+        key_hash = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") or 1
+        start = key_hash % self.slots
+        self._fcntl.flock(self._lock_file, self._fcntl.LOCK_EX)
+        try:
+            target = None
+            oldest = None
+            for probe in range(self._PROBES):
+                index = (start + probe) % self.slots
+                stored_hash, tat = self._SLOT.unpack_from(self._buf, index * self._SLOT.size)
+                if stored_hash == key_hash:
+                    target, current = index, tat
+                    break
+                if oldest is None or tat < oldest[1]:
+                    oldest = (index, tat)
+            else:
+                # המפתח לא קיים - לוקחים את ה-slot הכי ישן (פנוי אם tat <= now)
+                target, current = oldest[0], now
+
+            new_tat, decision = gcra(current, now, limit)
+            if new_tat is not None:
+                self._SLOT.pack_into(self._buf, target * self._SLOT.size, key_hash, new_tat)
+            return decision
+        finally:
+            self._fcntl.flock(self._lock_file, self._fcntl.LOCK_UN)
+
+    def close(self, unlink: bool = False):
+        self._buf = None
+        self._shm.close()
+        self._lock_file.close()
+        if unlink:
+            # unlink מבטל רישום ב-resource_tracker, אז צריך לרשום שוב קודם
+            from multiprocessing import resource_tracker
+            resource_tracker.register(self._shm._name, "shared_memory")
+            self._shm.unlink()
+
+
+def _untrack(shm):
+    # ה-resource_tracker מוחק את ה-segment כשהתהליך נסגר - לא רוצים את זה כשהוא משותף
+    from multiprocessing import resource_tracker
+    resource_tracker.unregister(shm._name, "shared_memory")
+
+
+class RedisStore:
+    """
+    מצב משותף דרך Redis (או כל שרת תואם) - צריך client אסינכרוני עם eval,
+    למשל redis.asyncio.Redis. כל הלוגיקה רצה כסקריפט Lua אטומי בצד השרת.
+    """
+
+    _SCRIPT = """
+local tat = tonumber(redis.call('GET', KEYS[1]) or ARGV[1])
+local now = tonumber(ARGV[1])
+local interval = tonumber(ARGV[2])
+local tolerance = tonumber(ARGV[3])
+if tat < now then tat = now end
+if tat - now > tolerance then
+    return {0, 0, tostring(tat - tolerance - now)}
+end
+local new_tat = tat + interval
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+return {1, math.floor((tolerance + interval - (new_tat - now)) / interval), '0'}
+"""
+
+    def __init__(self, client, prefix: str = "ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def hit(self, key: str, limit: RateLimit, now: float) -> Decision:
+        allowed, remaining, retry_after = await self.client.eval(
+            self._SCRIPT, 1, self.prefix + key, now, limit.emission_interval, limit.tolerance
+        )
+        return Decision(bool(allowed), int(remaining), float(retry_after))
+
+
+def client_ip(scope) -> str:
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class RateLimitMiddleware:
+    """Middleware ASGI טהור - בודק את המגבלה לפני הבקשה, ומוסיף headers של X-RateLimit לתשובה"""
+
+    def __init__(self, app, default: RateLimit = None, routes: dict = None, store=None, key_func=client_ip):
+        self.app = app
+        self.default = default
+        # הקידומת הארוכה ביותר מנצחת
+        self.routes = sorted((routes or {}).items(), key=lambda item: len(item[0]), reverse=True)
+        self.store = store if store is not None else MemoryStore()
+        self.key_func = key_func
+
+    def _limit_for(self, path: str):
+        for prefix, limit in self.routes:
+            if path.startswith(prefix):
+                return prefix, limit
+        return "*", self.default
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        rule, limit = self._limit_for(scope["path"])
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        decision = self.store.hit(f"{rule}|{self.key_func(scope)}", limit, time.time())
+        if inspect.isawaitable(decision):
+            decision = await decision
+
+        limit_header = (b"x-ratelimit-limit", str(limit.requests).encode("ascii"))
+        if not decision.allowed:
+            await self._reject(send, decision, limit_header)
+            return
+
+        remaining_header = (b"x-ratelimit-remaining", str(decision.remaining).encode("ascii"))
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [limit_header, remaining_header]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _reject(self, send, decision: Decision, limit_header):
+        body = json.dumps({"detail": "Too many requests"}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("ascii")),
+                (b"retry-after", str(max(1, int(decision.retry_after + 0.999))).encode("ascii")),
+                limit_header,
+                (b"x-ratelimit-remaining", b"0"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,217 @@
+"""
+תשובות מוכנות מראש ל-routes סטטיים - ASGI טהור
+
+route שמסומן ב-@static_response (קבוע לכל חיי התהליך) או ב-@cached_response(ttl=...)
+מחושב פעם אחת: ה-GET הראשון (או הראשון אחרי invalidate / אחרי שה-ttl עבר) עובר
+ב-handler כרגיל, וה-bytes שיצאו נשמרים יחד עם ETag. מכאן כל בקשה מקבלת את אותם
+bytes ישירות מה-middleware - בלי routing, בלי ה-handler ובלי סריאליזציה - ו-If-None-Match
+תואם מקבל 304.
+
+- רק routes בלי path parameters. המפתח הוא ה-path + רק ה-query parameters שה-route מגדיר
+  (ממוינים), כך ש-/info?detailed=true נשמר בנפרד, ו-/?x=1 או /?x=2 הם אותה תשובה של /.
+  עד max_entries תשובות - כשמתמלא, התשובה שלא בוקשה הכי הרבה זמן נזרקת (LRU).
+- נשמרות רק תשובות 200 ל-GET. התשובה צריכה להיות תלויה רק ב-path וב-query
+  (לא ב-headers, cookies או משתמש) - זו ההתחייבות של מי שמסמן את ה-route.
+
+שימוש:
+    cache = ResponseCache()
+    app.add_middleware(ResponseCacheMiddleware, cache=cache)
+
+    @app.get("/users")
+    @static_response
+    def get_users(): ...
+
+    @app.get("/stats")
+    @cached_response(ttl=30)
+    def get_stats(): ...
+
+    cache.invalidate("/users")   # החישוב הבא יקרה בבקשה הבאה
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qsl
+
+# ה-attribute שהדקורטורים שמים על ה-handler - הערך הוא ה-ttl (None = בלי תפוגה)
+_MARK = "__response_cache_ttl__"
+_UNMARKED = object()
+
+
+def static_response(func):
+    """התשובה לא משתנה כל עוד התהליך רץ (או עד invalidate)"""
+    setattr(func, _MARK, None)
+    return func
+
+
+def cached_response(ttl: float):
+    """התשובה נשמרת ל-ttl שניות, ואז מחושבת מחדש בבקשה הבאה"""
+    def decorator(func):
+        setattr(func, _MARK, ttl)
+        return func
+    return decorator
+
+
+class _Entry:
+    __slots__ = ("start", "body", "etag", "not_modified", "expires")
+
+    def __init__(self, status: int, headers: list, body: bytes, ttl):
+        self.etag = b'"' + hashlib.blake2b(body, digest_size=16).hexdigest().encode("ascii") + b'"'
+        cache_control = b"no-cache" if ttl is None else f"public, max-age={int(ttl)}".encode("ascii")
+        extra = [(b"etag", self.etag), (b"cache-control", cache_control)]
+        headers = [(name, value) for name, value in headers if name.lower() not in (b"etag", b"cache-control")]
+        self.start = {"type": "http.response.start", "status": status, "headers": headers + extra}
+        self.body = {"type": "http.response.body", "body": body}
+        self.not_modified = {"type": "http.response.start", "status": 304, "headers": extra}
+        self.expires = None if ttl is None else time.monotonic() + ttl
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        # לפי סדר השימוש - הראשון הוא זה שלא בוקש הכי הרבה זמן
+        self._entries = OrderedDict()
+        self._counts = {"hits": 0, "misses": 0, "not_modified": 0, "evicted": 0}
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires is not None and entry.expires <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry: _Entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counts["evicted"] += 1
+
+    def invalidate(self, path: str = None):
+        """מוחק את התשובות של path (כל ה-query strings שלו), או את הכל"""
+        if path is None:
+            self._entries.clear()
+            return
+        for key in [key for key in self._entries if key[0] == path]:
+            del self._entries[key]
+
+    def record(self, kind: str):
+        """hits / misses / not_modified - נקרא מה-middleware"""
+        self._counts[kind] += 1
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), **self._counts}
+
+
+class ResponseCacheMiddleware:
+    def __init__(self, app, cache: ResponseCache = None):
+        self.app = app
+        self.cache = cache if cache is not None else default_cache
+        # path -> (ttl, שמות ה-query parameters של ה-route).
+        # נבנה בבקשה הראשונה, כשכל ה-routes כבר רשומים
+        self._routes = None
+
+    async def __call__(self, scope, receive, send):
+        # רק GET - HEAD עובר ל-app כרגיל, כך שהסטטוס שלו לא תלוי במה שיש ב-cache
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        if self._routes is None:
+            self._routes = _marked_routes(scope["app"])
+        marked = self._routes.get(scope["path"])
+        if marked is None:
+            await self.app(scope, receive, send)
+            return
+
+        ttl, params = marked
+        cache = self.cache
+        key = _cache_key(scope, params)
+        entry = cache.get(key)
+        if entry is not None:
+            if _etag_matches(scope, entry.etag):
+                cache.record("not_modified")
+                await send(entry.not_modified)
+                await send({"type": "http.response.body", "body": b""})
+                return
+            cache.record("hits")
+            await send(entry.start)
+            await send(entry.body)
+            return
+
+        cache.record("misses")
+        start = None
+        chunks = []
+
+        async def capture(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+        body = b"".join(chunks)
+        if start["status"] != 200:
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+            return
+        entry = _Entry(start["status"], start.get("headers", []), body, ttl)
+        cache.put(key, entry)
+        if _etag_matches(scope, entry.etag):
+            await send(entry.not_modified)
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await send(entry.start)
+        await send(entry.body)
+
+
+def _marked_routes(app) -> dict:
+    routes = {}
+    for route in getattr(app, "routes", []):
+        ttl = getattr(getattr(route, "endpoint", None), _MARK, _UNMARKED)
+        if ttl is _UNMARKED or "GET" not in (getattr(route, "methods", None) or ()):
+            continue
+        if route.param_convertors:
+            raise ValueError(f"{route.path}: cached routes can't have path parameters")
+        routes[route.path] = (ttl, _query_params(route))
+    return routes
+
+
+def _query_params(route) -> frozenset:
+    """שמות ה-query parameters שה-handler (כולל ה-dependencies שלו) מקבל"""
+    dependant = getattr(route, "dependant", None)
+    if dependant is None:
+        return frozenset()
+    try:
+        from fastapi.dependencies.utils import get_flat_dependant
+        dependant = get_flat_dependant(dependant)
+    except ImportError:
+        pass
+    return frozenset(param.alias for param in dependant.query_params)
+
+
+def _cache_key(scope, params: frozenset) -> tuple:
+    """parameters שה-route לא מכיר לא משנים את התשובה - ולכן גם לא את המפתח"""
+    if not params or not scope["query_string"]:
+        return (scope["path"], ())
+    query = parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True)
+    return (scope["path"], tuple(sorted(item for item in query if item[0] in params)))
+
+
+def _etag_matches(scope, etag: bytes) -> bool:
+    """If-None-Match (כולל רשימה, '*' ו-ETag חלש עם W/)"""
+    for name, value in scope["headers"]:
+        if name == b"if-none-match":
+            for candidate in value.split(b","):
+                candidate = candidate.strip()
+                if candidate.startswith(b"W/"):
+                    candidate = candidate[2:]
+                if candidate == b"*" or candidate == etag:
+                    return True
+    return False
+
+
+# מאגר ברירת מחדל משותף לכל ה-middlewares באותו תהליך
+default_cache = ResponseCache()
@@ -0,0 +1,46 @@
+"""
+שכבת תשובות JSON מהירה לכל האפליקציות
+
+- FastJSONResponse: משתמש ב-orjson אם מותקן (פי כמה מהיר מ-json הרגיל), אחרת נופל חזרה ל-JSONResponse
+- trusted_response: לנתונים פנימיים שהשרת עצמו בנה - מדלג על jsonable_encoder ועל
+  ה-validation של response_model בדרך החוצה. response_model נשאר בשביל התיעוד.
+
+שימוש:
+    app = FastAPI(default_response_class=FastJSONResponse)
+
+    @app.get("/todos", response_model=List[Todo])
+    async def get_all_todos():
+        return trusted_response(todos_db)
+
+TRUST_INTERNAL_DATA=0 במשתני הסביבה מחזיר את ההתנהגות הרגילה (validation מלא).
+"""
+import os
+
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+TRUST_INTERNAL_DATA = os.environ.get("TRUST_INTERNAL_DATA", "1") != "0"
+
+
+class FastJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def trusted_response(content, status_code: int = 200, headers: dict = None):
+    """
+    מחזיר את התוכן כ-FastJSONResponse מוכן, כך ש-FastAPI לא מריץ עליו validation וקידוד נוסף.
+    status_code צריך להתאים למה שמוגדר בדקורטור של ה-route.
+    """
+    if not TRUST_INTERNAL_DATA:
+        return content
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
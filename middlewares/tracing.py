@@ -0,0 +1,368 @@
+"""
+Tracing - ASGI טהור, תואם W3C traceparent, ייצוא ב-batches מ-thread ברקע
+
+- TracingMiddleware: מקבל traceparent מהלקוח (או יוצר חדש), פותח span לכל בקשה
+  ומחזיר traceparent ו-X-Trace-Id בתשובה.
+- @traced("name", kind="io"): span סביב פונקציה (למשל load_json_file/save_json_file).
+  בלי בקשה פעילה הדקורטור רק קורא לפונקציה - עלות של בדיקת contextvar אחת.
+- בסוף כל בקשה ה-span הראשי מקבל io.duration_ms ו-compute.duration_ms,
+  כך שרואים כמה מזמן הבקשה הלך על I/O וכמה על חישוב.
+- BatchSpanExporter: ה-spans נכנסים לתור, ו-thread ברקע כותב אותם ב-batches
+  לקובץ JSON lines (FileSink) או לשרת OTLP/HTTP (OTLPHttpSink). ה-thread נוצר בכל
+  תהליך ב-span הראשון שלו - בטוח גם כשה-app נטען לפני fork.
+
+הפעלה דרך משתני סביבה (install_tracing):
+    TRACE_EXPORT=file:traces.jsonl
+    TRACE_EXPORT=otlp:http://localhost:4318/v1/traces
+"""
+import atexit
+import contextvars
+import functools
+import json
+import os
+import secrets
+import threading
+import time
+import urllib.request
+from collections import deque
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+# ה-span הראשי של הבקשה הנוכחית - אליו מצטבר זמן ה-I/O
+_request_root = contextvars.ContextVar("request_root", default=None)
+# ה-exporter הפעיל (נקבע כשה-middleware נוצר)
+_exporter = None
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "attributes",
+                 "start_ns", "_start_perf", "duration_ns", "io_ns", "sampled")
+
+    def __init__(self, name: str, trace_id: str, parent_id: str = None, kind: str = "internal", sampled: bool = True):
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = {}
+        self.sampled = sampled
+        self.start_ns = time.time_ns()
+        self._start_perf = time.perf_counter_ns()
+        self.duration_ns = 0
+        # זמן I/O מצטבר של spans צאצאים (רק ב-span הראשי של הבקשה)
+        self.io_ns = 0
+
+    def end(self):
+        self.duration_ns = time.perf_counter_ns() - self._start_perf
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_ns": self.start_ns,
+            "duration_ns": self.duration_ns,
+            "attributes": self.attributes,
+        }
+
+
+def parse_traceparent(value: str):
+    """'00-<trace>-<parent>-<flags>' -> (trace_id, parent_id, sampled) או None אם לא תקין"""
+    parts = value.strip().split("-")
+    if len(parts) < 4 or len(parts[0]) != 2 or parts[0] == "ff":
+        return None
+    trace_id, parent_id, flags = parts[1], parts[2], parts[3]
+    if len(trace_id) != 32 or len(parent_id) != 16 or len(flags) != 2:
+        return None
+    try:
+        int(trace_id, 16), int(parent_id, 16)
+        sampled = bool(int(flags, 16) & 1)
+    except ValueError:
+        return None
+    if trace_id == "0" * 32 or parent_id == "0" * 16:
+        return None
+    return trace_id, parent_id, sampled
+
+
+# ==================== ייצוא ====================
+
+class FileSink:
+    """כותב כל span כשורת JSON לקובץ"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def write(self, spans):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(span, ensure_ascii=False) + "\n" for span in spans)
+
+
+class OTLPHttpSink:
+    """שולח batch בפורמט OTLP/JSON (למשל ל-OpenTelemetry Collector על פורט 4318)"""
+
+    def __init__(self, endpoint: str, service_name: str = "fastapi-app", timeout: float = 5.0):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.timeout = timeout
+
+    def write(self, spans):
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", self.service_name)]},
+                "scopeSpans": [{
+                    "scope": {"name": "middlewares.tracing"},
+                    "spans": [_otlp_span(span) for span in spans],
+                }],
+            }]
+        }
+        request = urllib.request.Request(
+            self.endpoint, data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"}, method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+_OTLP_KINDS = {"internal": 1, "server": 2, "client": 3, "io": 3}
+
+
+def _otlp_attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def _otlp_span(span: dict) -> dict:
+    result = {
+        "traceId": span["trace_id"],
+        "spanId": span["span_id"],
+        "name": span["name"],
+        "kind": _OTLP_KINDS.get(span["kind"], 1),
+        "startTimeUnixNano": str(span["start_ns"]),
+        "endTimeUnixNano": str(span["start_ns"] + span["duration_ns"]),
+        "attributes": [_otlp_attribute(key, value) for key, value in span["attributes"].items()],
+    }
+    if span["parent_id"]:
+        result["parentSpanId"] = span["parent_id"]
+    return result
+
+
+class BatchSpanExporter:
+    """
+    תור חסום + thread ברקע שכותב batches ל-sink.
+    כשהתור מלא spans חדשים נזרקים (ונספרים ב-dropped) במקום לחסום בקשות.
+    ה-thread מתחיל ב-export הראשון של כל תהליך - threads לא עוברים ב-fork, כך שגם
+    exporter שנוצר ב-master (gunicorn עם preload_app) מייצא מכל worker.
+    """
+
+    def __init__(self, sink, max_batch: int = 512, interval: float = 1.0, max_queue: int = 10_000):
+        self.sink = sink
+        self.max_batch = max_batch
+        self.interval = interval
+        self._queue = deque(maxlen=max_queue)
+        self.dropped = 0
+        self.exported = 0
+        self.failed = 0
+        self._reset()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+        atexit.register(self.shutdown)
+
+    def _reset(self):
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._start_lock = threading.Lock()
+        self._thread = None
+        # התהליך שה-thread רץ בו
+        self._pid = None
+
+    def _after_fork(self):
+        # ב-worker: ה-thread של ה-master לא קיים כאן, וה-locks אולי הועתקו תפוסים.
+        # spans שחיכו בתור שייכים ל-master - הוא ייצא אותם בעצמו
+        self._reset()
+        self._queue.clear()
+
+    def _ensure_thread(self):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid != os.getpid():
+                self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+                self._thread.start()
+                self._pid = os.getpid()
+
+    def export(self, span: Span):
+        self._ensure_thread()
+        if len(self._queue) == self._queue.maxlen:
+            self.dropped += 1
+            return
+        self._queue.append(span.to_dict())
+        if len(self._queue) >= self.max_batch:
+            self._wakeup.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        while self._queue:
+            batch = []
+            while self._queue and len(batch) < self.max_batch:
+                batch.append(self._queue.popleft())
+            try:
+                self.sink.write(batch)
+                self.exported += len(batch)
+            except Exception:
+                # ה-sink לא זמין - מוותרים על ה-batch ולא מפילים את השרת
+                self.failed += len(batch)
+
+    def shutdown(self):
+        if not self._stopped.is_set():
+            self._stopped.set()
+            self._wakeup.set()
+            if self._thread is not None and self._pid == os.getpid():
+                self._thread.join(timeout=5)
+            self.flush()
+
+
+# ==================== spans בקוד ====================
+
+class span:
+    """
+    span סביב בלוק קוד:
+        with span("parse", rows=len(rows)):
+            ...
+    kind="io" מוסיף את הזמן ל-io.duration_ms של הבקשה.
+    """
+
+    __slots__ = ("name", "kind", "attributes", "_span", "_token", "_root")
+
+    def __init__(self, name: str, kind: str = "internal", **attributes):
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self._span = None
+
+    def __enter__(self):
+        parent = _current_span.get()
+        if parent is None or _exporter is None:
+            return None
+        self._span = Span(self.name, parent.trace_id, parent.span_id, self.kind, parent.sampled)
+        self._span.attributes.update(self.attributes)
+        self._root = _request_root.get()
+        self._token = _current_span.set(self._span)
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._span is None:
+            return False
+        self._span.end()
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self._span.attributes["error"] = exc_type.__name__
+        if self.kind == "io" and self._root is not None:
+            self._root.io_ns += self._span.duration_ns
+        if self._span.sampled:
+            _exporter.export(self._span)
+        return False
+
+
+def traced(name: str = None, kind: str = "internal"):
+    """דקורטור - span סביב כל קריאה לפונקציה (sync בלבד)"""
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return func(*args, **kwargs)
+            with span(span_name, kind=kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ==================== Middleware ====================
+
+class TracingMiddleware:
+    def __init__(self, app, exporter: BatchSpanExporter, service_name: str = "fastapi-app"):
+        global _exporter
+        self.app = app
+        self.exporter = exporter
+        self.service_name = service_name
+        _exporter = exporter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        parent = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                parent = parse_traceparent(value.decode("latin-1"))
+                break
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id, sampled = secrets.token_hex(16), None, True
+
+        root = Span(f"{scope['method']} {scope['path']}", trace_id, parent_id, kind="server", sampled=sampled)
+        root.attributes["http.method"] = scope["method"]
+        root.attributes["http.target"] = scope["path"]
+        root.attributes["service.name"] = self.service_name
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"traceparent", root.traceparent().encode("ascii")),
+                    (b"x-trace-id", trace_id.encode("ascii")),
+                ]
+            await send(message)
+
+        span_token = _current_span.set(root)
+        root_token = _request_root.set(root)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_span.reset(span_token)
+            _request_root.reset(root_token)
+            root.end()
+            route = scope.get("route")
+            if route is not None:
+                root.name = f"{scope['method']} {getattr(route, 'path_format', route.path)}"
+            root.attributes["http.status_code"] = status
+            root.attributes["io.duration_ms"] = round(root.io_ns / 1e6, 3)
+            root.attributes["compute.duration_ms"] = round((root.duration_ns - root.io_ns) / 1e6, 3)
+            if sampled:
+                self.exporter.export(root)
+
+
+def install_tracing(app, service_name: str):
+    """מוסיף TracingMiddleware אם מוגדר TRACE_EXPORT (file:<path> או otlp:<url>), אחרת לא עושה כלום"""
+    target = os.environ.get("TRACE_EXPORT")
+    if not target:
+        return None
+    kind, _, location = target.partition(":")
+    if kind == "file":
+        sink = FileSink(location or "traces.jsonl")
+    elif kind == "otlp":
+        sink = OTLPHttpSink(location or "http://localhost:4318/v1/traces", service_name=service_name)
+    else:
+        raise ValueError(f"TRACE_EXPORT must start with 'file:' or 'otlp:', got {target!r}")
+    exporter = BatchSpanExporter(sink)
+    app.add_middleware(TracingMiddleware, exporter=exporter, service_name=service_name)
+    return exporter
@@ -0,0 +1,59 @@
+"""
+מדידת זמן עלייה - מהפעלת התהליך ועד התשובה הראשונה (time-to-first-request)
+הרצה: python bench_startup.py [מספר חזרות]
+"""
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_first_request(workers: int = 1, timeout: float = 30.0) -> float:
+    port = _free_port()
+    env = dict(os.environ, STRINGS_HOST="127.0.0.1", STRINGS_PORT=str(port), STRINGS_WORKERS=str(workers))
+    url = f"http://127.0.0.1:{port}/reverse?text=hello"
+
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(APP_DIR, "serve.py")],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.005)
+        raise TimeoutError(f"server did not answer within {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for workers in (1, os.cpu_count() or 1):
+        samples = [time_to_first_request(workers) for _ in range(runs)]
+        print(
+            f"workers={workers:<3} runs={runs} "
+            f"min={min(samples) * 1e3:.0f}ms "
+            f"median={statistics.median(samples) * 1e3:.0f}ms "
+            f"max={max(samples) * 1e3:.0f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+השוואת ביצועים: המימוש הישן (לולאה תו-אחר-תו) מול המסלול המהיר של string_ops
+הרצה: python bench_string_ops.py
+"""
+import timeit
+
+from string_ops import remove_vowels, to_upper, remove_every_third
+
+
+def legacy_remove_vowels(s: str):
+    vowels="aeuioAEIOU"
+    without_vowels=""
+    for char in s:
+        if char not in vowels:
+            without_vowels+=char
+    return {"normal_string":s,"without_vowels":without_vowels}
+
+
+def legacy_to_upper(text: str):
+    return {"normal_string":text,"uppercased":text.upper()}
+
+
+def legacy_remove_every_third(s: str):
+    new_string = ""
+    for idx,char in enumerate(s):
+        if (idx+1) %3 !=0:
+            new_string += char
+    return  { "original": s, "result": new_string}
+
+
+CASES = [
+    ("remove_vowels", legacy_remove_vowels, remove_vowels),
+    ("to_upper", legacy_to_upper, to_upper),
+    ("remove_every_third", legacy_remove_every_third, remove_every_third),
+]
+
+INPUTS = {
+    "ascii 1KB": "The quick brown fox jumps over the lazy dog. " * 23,
+    "ascii 1MB": "The quick brown fox jumps over the lazy dog. " * 23300,
+    "unicode 1MB": "שלום עולם, the quick brown fox! " * 33000,
+}
+
+
+def bench(func, text: str) -> float:
+    timer = timeit.Timer(lambda: func(text))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=3, number=number)) / number
+
+
+def main():
+    print(f"{'operation':<20}{'input':<14}{'legacy':>12}{'fast':>12}{'speedup':>10}")
+    for name, legacy, fast in CASES:
+        for label, text in INPUTS.items():
+            assert legacy(text) == fast(text)
+            before = bench(legacy, text)
+            after = bench(fast, text)
+            print(f"{name:<20}{label:<14}{before * 1e3:>10.3f}ms{after * 1e3:>10.3f}ms{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import hashlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# סמן לתוצאה שלא נמצאה במטמון (None הוא ערך חוקי)
+MISS = object()
+
+
+def _content_key(op: str, text: str):
+    """מפתח למטמון - שם הפעולה + hash של התוכן"""
+    digest = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+    return (op, len(text), digest)
+
+
+def _estimate_size(obj) -> int:
+    """הערכה גסה של גודל התוצאה בזיכרון (בבתים)"""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += _estimate_size(key) + _estimate_size(value)
+    elif isinstance(obj, (list, tuple)):
+        for value in obj:
+            size += _estimate_size(value)
+    return size
+
+
+class ResultCache:
+    """
+    מטמון LRU לתוצאות של פעולות על מחרוזות
+    מוגבל גם במספר הרשומות וגם בסך הבתים, עם TTL אופציונלי
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 8 * 1024 * 1024, ttl: float = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (value, size, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def lookup(self, op: str, text: str):
+        """מחזיר (key, value) - אם אין ערך תקף, value הוא MISS"""
+        key = _content_key(op, text)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, size, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return key, value
+                # פג תוקף - מוחקים ומחשבים מחדש
+                self._remove(key)
+                self.expirations += 1
+            self.misses += 1
+        return key, MISS
+
+    def get_or_compute(self, op: str, text: str, func):
+        """מחזיר תוצאה מהמטמון, ואם אין - מחשב אותה ושומר"""
+        key, value = self.lookup(op, text)
+        if value is MISS:
+            # החישוב עצמו מתבצע מחוץ לנעילה
+            value = func(text)
+            self.put(key, value)
+        return value
+
+    def put(self, key, value):
+        size = _estimate_size(value) + _estimate_size(key)
+        if size > self.max_bytes:
+            # תוצאה גדולה מדי - לא שומרים אותה בכלל
+            return
+        expires_at = None
+        if self.ttl is not None:
+            expires_at = time.monotonic() + self.ttl
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, expires_at)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "memory_bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
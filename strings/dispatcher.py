@@ -0,0 +1,119 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+
+def _timed_call(func, text):
+    """רץ בתוך תהליך ה-worker - מחזיר את התוצאה ואת זמן הריצה"""
+    start = time.perf_counter()
+    result = func(text)
+    return result, time.perf_counter() - start
+
+
+class _Timing:
+    """סטטיסטיקת זמני ריצה פשוטה (מספר, סכום, מקסימום)"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class OpDispatcher:
+    """
+    מריץ פעולות על מחרוזות לפי גודל הקלט:
+    קלט קטן רץ ב-threadpool (לא חוסם את ה-event loop), קלט גדול נשלח ל-ProcessPoolExecutor.
+    התור מוגבל - כשהוא מלא מוחזרת שגיאה 429 במקום לצבור עומס.
+    """
+
+    def __init__(self, threshold: int = 64 * 1024, max_workers: int = None, max_pending: int = 32):
+        self.threshold = threshold
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._pending = 0
+        self.peak_pending = 0
+        self.rejected = 0
+        self.inline = _Timing()
+        self.offloaded = _Timing()
+        self.queue_wait = _Timing()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # ה-pool נוצר רק בפעם הראשונה שבאמת צריך אותו
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    async def run(self, func, text: str):
+        if len(text) < self.threshold:
+            result, exec_time = await run_in_threadpool(_timed_call, func, text)
+            self.inline.add(exec_time)
+            return result
+
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=429,
+                detail="Server is busy processing large inputs, try again later",
+                headers={"Retry-After": "1"},
+            )
+
+        self._pending += 1
+        self.peak_pending = max(self.peak_pending, self._pending)
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, exec_time = await loop.run_in_executor(self._get_pool(), _timed_call, func, text)
+        finally:
+            self._pending -= 1
+        total = time.perf_counter() - start
+        self.offloaded.add(exec_time)
+        self.queue_wait.add(max(total - exec_time, 0.0))
+        return result
+
+    async def warm_up(self, func, text: str = ""):
+        """מעלה את כל תהליכי ה-pool מראש (כולל ייבוא func), כדי שהבקשה הגדולה הראשונה לא תשלם על זה"""
+        pool = self._get_pool()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(pool, _timed_call, func, text)
+            for _ in range(pool._max_workers)
+        ))
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> dict:
+        return {
+            "threshold_chars": self.threshold,
+            "max_workers": self.max_workers or (self._pool._max_workers if self._pool else None),
+            "max_pending": self.max_pending,
+            "queue_depth": self._pending,
+            "peak_queue_depth": self.peak_pending,
+            "rejected": self.rejected,
+            "inline": self.inline.as_dict(),
+            "offloaded": self.offloaded.as_dict(),
+            "queue_wait": self.queue_wait.as_dict(),
+        }
@@ -0,0 +1,24 @@
+"""
+הגדרות gunicorn לשירות המחרוזות (דורש pip install gunicorn)
+
+הרצה מתוך תיקיית strings:
+    gunicorn -c gunicorn_conf.py main:app
+"""
+import os
+
+from serve import server_options
+
+_options = server_options()
+
+bind = f"{_options['host']}:{_options['port']}"
+workers = _options["workers"]
+# UvicornWorker בוחר בעצמו uvloop/httptools כשהם מותקנים
+worker_class = "uvicorn.workers.UvicornWorker"
+# טעינת האפליקציה פעם אחת ב-master - ה-workers יורשים את המודולים המיובאים אחרי fork
+preload_app = True
+# בטוח עם preload: שום thread או process לא נוצר בזמן הייבוא - ה-process pool של dispatcher
+# נוצר רק כשצריך, וה-thread של ה-exporter (TRACE_EXPORT) מתחיל בכל worker ב-span הראשון שלו
+timeout = int(os.environ.get("STRINGS_TIMEOUT", 60))
+graceful_timeout = 30
+keepalive = 5
+accesslog = None
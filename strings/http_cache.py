@@ -0,0 +1,43 @@
+import hashlib
+
+from fastapi import Request, Response
+
+# להעלות כשמבנה התשובה משתנה - כך ETag-ים ישנים לא יתאימו יותר
+RESPONSE_VERSION = "1"
+
+# התשובה תלויה רק בטקסט, אז מותר ל-CDN ולדפדפן לשמור אותה
+CACHE_CONTROL = "public, max-age=86400, immutable"
+
+
+def content_etag(op: str, text: str) -> str:
+    """ETag דטרמיניסטי - נגזר משם הפעולה ומ-hash של הקלט, בלי לחשב את התוצאה"""
+    digest = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+    return f'"{op}-v{RESPONSE_VERSION}-{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """בודק If-None-Match (כולל רשימה, '*' ו-ETag חלש עם W/)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def set_cache_headers(response: Response, etag: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+
+def not_modified(etag: str) -> Response:
+    """תשובת 304 - בלי גוף, רק ה-headers"""
+    response = Response(status_code=304)
+    set_cache_headers(response, etag)
+    return response
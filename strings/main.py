@@ -1,39 +1,122 @@
-import uvicorn
-from string_ops import reverse_str,remove_every_third,to_upper,letter_counts_map,remove_vowels
-from fastapi import FastAPI
+import os
+import sys
+from contextlib import asynccontextmanager
 
+# מאפשר לייבא את המודולים של התיקייה גם כשמריצים מתיקייה אחרת
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# תיקיית השורש של הפרויקט - בשביל ה-middlewares המשותפים
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-app = FastAPI()
+from string_ops import reverse_str,remove_every_third,to_upper,count_letters,save_letter_counts,remove_vowels,warm_up
+from cache import ResultCache, MISS
+from dispatcher import OpDispatcher
+from http_cache import content_etag, etag_matches, set_cache_headers, not_modified
+from fastapi import APIRouter, FastAPI, Request, Response
+from starlette.concurrency import run_in_threadpool
+from middlewares import MetricsMiddleware, FastJSONResponse, install_profiling, install_tracing, traced
 
 
-@app.get("/reverse")
-def reverse_string(text: str):
-    return reverse_str(text)
+# מטמון לתוצאות - מחרוזות שחוזרות על עצמן לא מחושבות מחדש
+result_cache = ResultCache(max_entries=1024, max_bytes=8 * 1024 * 1024, ttl=None)
 
+# קלט גדול נשלח ל-process pool כדי לא לתקוע את השרת
+dispatcher = OpDispatcher(
+    threshold=int(os.environ.get("STRINGS_OFFLOAD_THRESHOLD", 64 * 1024)),
+    max_workers=int(os.environ["STRINGS_POOL_WORKERS"]) if os.environ.get("STRINGS_POOL_WORKERS") else None,
+    max_pending=int(os.environ.get("STRINGS_POOL_MAX_PENDING", 32)),
+)
 
-@app.get("/uppercase/{text}")
-def to_upper_str(text: str):
-    return to_upper(text)
-    
-@app.post("/remove-vowels")
-def remove_vowels_str(s: str): 
-    return remove_vowels(s)
+router = APIRouter()
 
+# כתיבת הקובץ נמדדת כ-I/O ב-tracing
+save_letter_counts_traced = traced("save_letter_counts", kind="io")(save_letter_counts)
 
-@app.post("/remove-every-third")
-def remove_every_third_str(s: str):
-    return remove_every_third(s)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # חימום לפני הבקשה הראשונה - כדי שזמן העלייה יהיה צפוי
+    warm_up()
+    if os.environ.get("STRINGS_PREWARM_POOL") == "1":
+        await dispatcher.warm_up(count_letters)
+    yield
+    dispatcher.shutdown()
+
+
+async def run_cached(op: str, text: str, func):
+    key, value = result_cache.lookup(op, text)
+    if value is MISS:
+        value = await dispatcher.run(func, text)
+        result_cache.put(key, value)
+    return value
+
+
+@router.get("/reverse")
+async def reverse_string(text: str, request: Request, response: Response):
+    etag = content_etag("reverse", text)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_cache_headers(response, etag)
+    return await run_cached("reverse", text, reverse_str)
+
+
+@router.get("/uppercase/{text}")
+async def to_upper_str(text: str):
+    return await dispatcher.run(to_upper, text)
+
+@router.post("/remove-vowels")
+async def remove_vowels_str(s: str):
+    return await run_cached("remove_vowels", s, remove_vowels)
+
+
+@router.post("/remove-every-third")
+async def remove_every_third_str(s: str):
+    return await dispatcher.run(remove_every_third, s)
+
+
+@router.get("/letter-counts/")
+async def letter_counts_map_str(text: str, request: Request, response: Response):
+    # ללקוח כבר יש את התשובה - לא מחשבים ולא כותבים לקובץ
+    etag = content_etag("letter_counts", text)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_cache_headers(response, etag)
+    # רק הספירה נשמרת במטמון - הקובץ עדיין נכתב בכל בקשה
+    counts = await run_cached("letter_counts", text, count_letters)
+    return await run_in_threadpool(save_letter_counts_traced, text, counts)
+
+
+@router.get("/cache/stats")
+def cache_stats():
+    return result_cache.stats()
+
+
+@router.get("/dispatcher/stats")
+def dispatcher_stats():
+    return dispatcher.stats()
+
+
+def create_app() -> FastAPI:
+    """App factory - כל worker בונה לעצמו אפליקציה"""
+    app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+    app.include_router(router)
+    # מדדים (מספר בקשות, זמני תגובה) זמינים ב-/metrics
+    app.add_middleware(MetricsMiddleware)
+    # פרופיילינג לפי דרישה - פעיל רק כשמוגדר PROFILE_SECRET (אחרת אין שום עלות)
+    install_profiling(app)
+    # tracing (traceparent + span לכל בקשה) - פעיל רק כשמוגדר TRACE_EXPORT
+    install_tracing(app, service_name="strings")
+    return app
+
+
+app = create_app()
 
 
-@app.get("/letter-counts/")
-def letter_counts_map_str(text: str):
-    return letter_counts_map(text)     
- 
-    
 def main_run():
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
-    
+    # uvicorn נטען רק כשבאמת מריצים את השרת מכאן
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=8000)
+
 
 
 if __name__ == "__main__":
-    main_run()
\ No newline at end of file
+    main_run()
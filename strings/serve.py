@@ -0,0 +1,46 @@
+"""
+משגר (launcher) לסביבת production של שירות המחרוזות
+
+הרצה:
+    python serve.py
+
+הגדרות דרך משתני סביבה:
+    STRINGS_HOST     - כתובת האזנה (ברירת מחדל 0.0.0.0)
+    STRINGS_PORT     - פורט (ברירת מחדל 8000)
+    STRINGS_WORKERS  - מספר תהליכי uvicorn (ברירת מחדל: מספר המעבדים)
+
+uvloop ו-httptools נבחרים אוטומטית אם הם מותקנים (uvicorn[standard]).
+להרצה עם gunicorn ראו gunicorn_conf.py.
+"""
+import importlib.util
+import os
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def server_options() -> dict:
+    workers = int(os.environ.get("STRINGS_WORKERS", os.cpu_count() or 1))
+    return {
+        "host": os.environ.get("STRINGS_HOST", "0.0.0.0"),
+        "port": int(os.environ.get("STRINGS_PORT", 8000)),
+        "workers": workers,
+        "loop": "uvloop" if _available("uvloop") else "asyncio",
+        "http": "httptools" if _available("httptools") else "h11",
+        "access_log": False,
+    }
+
+
+def main():
+    import uvicorn
+
+    # כל worker מייבא את main אחרי ה-fork ובונה את ה-app פעם אחת (ה-app ברמת המודול).
+    # לא factory=True - זה היה בונה app שני לכל worker (ועוד thread של exporter עם TRACE_EXPORT)
+    uvicorn.run("main:app", app_dir=APP_DIR, **server_options())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 
 import os
 import json
+from collections import Counter
 """   
 # Create data directory if it doesn't exist
  
@@ -18,37 +19,52 @@ def reverse_str(text: str):
 
 
 
+VOWELS = "aeuioAEIOU"
+ASCII_VOWELS = VOWELS.encode("ascii")
+
+
 def to_upper(text: str): 
+    # str.upper כבר עובד במהירות על ASCII, מעבר ל-bytes רק מאט
     return {"normal_string":text,"uppercased":text.upper()}
 
 
 
 def remove_vowels(s: str): 
-    vowels="aeuioAEIOU"
-    without_vowels=""
-    for char in s:
-        if char not in vowels:
-            without_vowels+=char
+    if s.isascii():
+        without_vowels = s.encode("ascii").translate(None, ASCII_VOWELS).decode("ascii")
+    else:
+        # בתים של תנועות ASCII לא מופיעים בתוך תו UTF-8 מרובה-בתים, אז אפשר למחוק אותם בבטחה
+        data = s.encode("utf-8", "surrogatepass")
+        without_vowels = data.translate(None, ASCII_VOWELS).decode("utf-8", "surrogatepass")
     return {"normal_string":s,"without_vowels":without_vowels}
 
 
 
+def _drop_every_third_bytes(data: bytes) -> bytearray:
+    # שומרים את אינדקסים 0,1 מכל שלישייה - שתי העתקות slice במקום לולאה
+    view = memoryview(data)
+    result = bytearray(len(data) - len(data) // 3)
+    result[0::2] = view[0::3]
+    result[1::2] = view[1::3]
+    return result
+
+
 def remove_every_third(s: str):
-    new_string = ""
-    for idx,char in enumerate(s):
-        if (idx+1) %3 !=0:
-            new_string += char   
-        
+    if s.isascii():
+        new_string = _drop_every_third_bytes(s.encode("ascii")).decode("ascii")
+    else:
+        first, second = s[0::3], s[1::3]
+        new_string = "".join(map(str.__add__, first, second)) + first[len(second):]
     
     return  { "original": s, "result": new_string}
 
 
-def letter_counts_map(text: str):
-    text_letter_counts = {}
-    set_text = set(text)
-    for letter in set_text:
-        text_letter_counts[letter] = text.count(letter)
-        
+def count_letters(text: str):
+    # מעבר אחד על הטקסט - לא text.count לכל תו שונה (O(n) לכל אחד)
+    return dict(Counter(text))
+
+
+def save_letter_counts(text: str, text_letter_counts: dict):
     object_to_save = {
         "original": text,
         "counts": text_letter_counts,   
@@ -66,4 +82,17 @@ def letter_counts_map(text: str):
         "counts": text_letter_counts,   
         "saved_to": "data/letter_counts.json"
     }
-  
+
+
+def letter_counts_map(text: str):
+    return save_letter_counts(text, count_letters(text))
+
+
+def warm_up():
+    """מריץ כל פעולה פעם אחת על קלט קטן (ASCII ו-Unicode) כדי לטעון codecs ו-error handlers מראש"""
+    for sample in ("warm up", "חימום"):
+        reverse_str(sample)
+        to_upper(sample)
+        remove_vowels(sample)
+        remove_every_third(sample)
+        count_letters(sample)
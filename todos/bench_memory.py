@@ -0,0 +1,64 @@
+"""
+זיכרון לכל משימה: dict עם created_at כמחרוזת (כמו קודם) מול TodoRecord עם __slots__,
+זמן כ-epoch וכותרות ב-sys.intern
+
+הרצה: python bench_memory.py
+"""
+import gc
+import random
+import time
+import tracemalloc
+
+from store import TodoRecord
+
+ITEMS = 1_000_000
+# כותרות שחוזרות על עצמן (משימות קבועות) לצד כותרות ייחודיות
+REPEATED_TITLES = ["Buy milk", "Daily standup", "Water the plants", "Review pull requests", "Gym"]
+
+
+def titles(rng):
+    for i in range(ITEMS):
+        # encode/decode - עותק חדש של המחרוזת, כמו כותרת שמגיעה מ-JSON של בקשה
+        yield rng.choice(REPEATED_TITLES).encode().decode() if i % 2 else f"Task number {i}"
+
+
+def build_dicts():
+    rng = random.Random(1)
+    start = time.time()
+    return [
+        {"id": i, "title": title, "description": None, "completed": i % 3 == 0,
+         "created_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(start + i // 100))}
+        for i, title in enumerate(titles(rng), 1)
+    ]
+
+
+def build_records():
+    rng = random.Random(1)
+    start = int(time.time())
+    return [
+        TodoRecord(i, title, None, i % 3 == 0, start + i // 100)
+        for i, title in enumerate(titles(rng), 1)
+    ]
+
+
+def measure(build) -> float:
+    gc.collect()
+    tracemalloc.start()
+    data = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+    return current / ITEMS
+
+
+def main():
+    before = measure(build_dicts)
+    after = measure(build_records)
+    print(f"{ITEMS:,} todos (half with repeated titles, ~100 created per second)\n")
+    print(f"{'dict + created_at string':<34}{before:>8.0f} bytes/todo")
+    print(f"{'TodoRecord (slots, epoch, intern)':<34}{after:>8.0f} bytes/todo")
+    print(f"{'saved':<34}{before - after:>8.0f} bytes/todo ({(1 - after / before) * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
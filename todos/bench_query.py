@@ -0,0 +1,68 @@
+"""
+השוואה: סינון/מיון/עמוד ראשון בסריקה מלאה של רשימה (כמו קודם) מול השאילתות של TodoStore
+
+הרצה: python bench_query.py
+"""
+import random
+import timeit
+
+from store import TodoRecord, TodoStore, encode_cursor, title_key
+
+ITEMS = 1_000_000
+LIMIT = 50
+
+WORDS = ["buy", "call", "fix", "write", "read", "clean", "plan", "review", "send", "book"]
+
+
+def make_todos():
+    rng = random.Random(7)
+    return [
+        {"id": i, "title": f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}", "description": None,
+         "completed": rng.random() < 0.3, "created_at": "2024-05-01 12:00:00"}
+        for i in range(1, ITEMS + 1)
+    ]
+
+
+def bench(func) -> float:
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=3, number=number)) / number
+
+
+def main():
+    todos = make_todos()
+    store = TodoStore()
+    store.load((TodoRecord.from_dict(todo) for todo in todos), ITEMS + 1)
+    # cursor באמצע הרשימה - העמוד ה-10,000 לפי כותרת
+    middle = sorted(todos, key=lambda todo: (title_key(todo["title"]), todo["id"]))[ITEMS // 2]
+    title_cursor = encode_cursor([title_key(middle["title"]), middle["id"]])
+
+    cases = [
+        ("first page, completed",
+         lambda: [t for t in todos if t["completed"]][:LIMIT],
+         lambda: store.query(completed=True, limit=LIMIT)),
+        ("newest first",
+         lambda: sorted(todos, key=lambda t: t["id"], reverse=True)[:LIMIT],
+         lambda: store.query(order="desc", limit=LIMIT)),
+        ("sort by title",
+         lambda: sorted(todos, key=lambda t: title_key(t["title"]))[:LIMIT],
+         lambda: store.query(sort="title", limit=LIMIT)),
+        ("sort by title, middle page",
+         lambda: sorted(todos, key=lambda t: (title_key(t["title"]), t["id"]))[ITEMS // 2 + 1:ITEMS // 2 + 1 + LIMIT],
+         lambda: store.query(sort="title", limit=LIMIT, cursor=title_cursor)),
+        ("prefix 'fix buy'",
+         lambda: [t for t in todos if title_key(t["title"]).startswith("fix buy")][:LIMIT],
+         lambda: store.query(prefix="fix buy", limit=LIMIT)),
+    ]
+
+    print(f"{ITEMS:,} todos, limit={LIMIT}\n")
+    print(f"{'query':<30}{'full scan':>14}{'indexed':>14}{'speedup':>10}")
+    for label, scan, indexed in cases:
+        assert [t["id"] for t in scan()] == [t.id for t in indexed()[0]], label
+        before = bench(scan)
+        after = bench(indexed)
+        print(f"{label:<30}{before * 1e3:>12.2f}ms{after * 1e3:>12.3f}ms{before / after:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
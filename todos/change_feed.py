@@ -0,0 +1,152 @@
+"""
+פיד שינויים למשימות - במקום לטעון את כל הרשימה כל שנייה, הלקוח מקבל רק את השינויים
+
+- כל שינוי (created / updated / toggled / deleted / cleared, ולפעולות מרובות
+  deleted_many / completed_many עם ids) מקבל מספר רץ (seq)
+  ונשמר ב-ring buffer בגודל קבוע.
+- since(seq): כל השינויים אחרי seq. אם seq כבר נזרק מה-buffer (או גדול מה-seq
+  הנוכחי, אחרי הפעלה מחדש) מחזירים None, והלקוח צריך לטעון מחדש את GET /todos.
+- subscribe(): מנוי חי (ל-SSE). לכל מנוי תור חסום; מנוי איטי שהתור שלו התמלא
+  מסומן כ-overflowed ומנותק, בלי לעכב את מי שכותב.
+- אפשר לפרסם גם מ-thread (handler רגיל - def): ה-buffer מוגן ב-lock, וכל שינוי (גם
+  מה-loop עצמו) מועבר לתור של המנוי דרך ה-event loop שלו - כך הסדר נשמר.
+"""
+import asyncio
+import threading
+from collections import deque
+from itertools import islice
+
+
+class Subscription:
+    def __init__(self, feed: "ChangeFeed", max_pending: int):
+        self._feed = feed
+        self._queue = asyncio.Queue(maxsize=max_pending)
+        self._loop = asyncio.get_running_loop()
+        # ה-seq של הפיד ברגע ההרשמה - כל מה שאחריו יגיע לתור (נקבע ב-subscribe, תחת ה-lock)
+        self.seq = 0
+        # התור התמלא - הלקוח פספס שינויים וצריך להתחבר מחדש עם since
+        self.overflowed = False
+
+    def _push(self, event: dict):
+        """נקרא תחת ה-lock של הפיד, לפי סדר ה-seq - מה-event loop או מ-thread"""
+        if self.overflowed:
+            return
+        # asyncio.Queue לא בטוח ל-threads, אז ההכנסה תמיד עוברת דרך ה-loop של המנוי -
+        # גם כשכבר נמצאים בו. מסלול אחד שומר על הסדר: הכנסה ישירה מה-loop הייתה
+        # יכולה לעקוף שינוי קודם שפורסם מ-thread ועדיין מחכה ב-call_soon_threadsafe
+        try:
+            self._loop.call_soon_threadsafe(self._enqueue, event)
+        except RuntimeError:
+            # ה-loop כבר נסגר
+            pass
+
+    def _enqueue(self, event: dict):
+        if self.overflowed:
+            return
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            self._feed._unsubscribe(self)
+
+    async def get(self, timeout: float = None):
+        """השינוי הבא, או None אם עבר timeout / המנוי נותק"""
+        if self.overflowed:
+            return None
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self._feed._unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ChangeFeed:
+    def __init__(self, capacity: int = 10_000, max_pending: int = 1_000):
+        self._buffer = deque(maxlen=capacity)
+        self._subscribers = set()
+        self.max_pending = max_pending
+        self.seq = 0
+        # RLock - מנוי שהתור שלו התמלא מסיר את עצמו מתוך _append
+        self._lock = threading.RLock()
+
+    def publish(self, op: str, todo=None, todo_id: int = None, **fields) -> dict:
+        """
+        רושם שינוי ושולח אותו לכל המנויים.
+        שומרים את המשימה כ-dict (to_dict) - ה-event מוכן ל-JSON ול-WAL.
+        """
+        with self._lock:
+            event = self._event(self.seq + 1, op, todo, todo_id, fields)
+            self._append(event)
+        return event
+
+    def _event(self, seq: int, op: str, todo, todo_id: int, fields: dict) -> dict:
+        event = {
+            "seq": seq,
+            "op": op,
+            "id": todo.id if todo is not None else todo_id,
+            "todo": todo.to_dict() if todo is not None and op != "deleted" else None,
+        }
+        # שינויים מרובים (deleted_many / completed_many) - ids ושדות נוספים
+        event.update(fields)
+        return event
+
+    def append(self, event: dict):
+        """מוסיף event שכבר יש לו seq (למשל מה-WAL בעלייה או מ-worker אחר)"""
+        with self._lock:
+            self._append(event)
+
+    def _append(self, event: dict):
+        # תחת ה-lock - כך שכל מנוי מקבל את השינויים לפי סדר ה-seq
+        self.seq = event["seq"]
+        self._buffer.append(event)
+        for subscription in list(self._subscribers):
+            subscription._push(event)
+
+    def reset(self, seq: int):
+        """מתחיל מ-seq חדש בלי היסטוריה (אחרי טעינת snapshot) - since ישן יקבל 410"""
+        with self._lock:
+            self._buffer.clear()
+            self.seq = seq
+
+    def since(self, seq: int, limit: int = None):
+        """השינויים עם seq גדול מ-seq (לפי הסדר), או None אם חלק מהם כבר לא ב-buffer"""
+        with self._lock:
+            if seq > self.seq:
+                # seq מהעתיד - השרת הופעל מחדש מאז שהלקוח קרא
+                return None
+            if seq == self.seq:
+                return []
+            count = self.seq - seq
+            if count > len(self._buffer):
+                return None
+            # הולכים מהסוף - O(מספר השינויים) ולא O(גודל ה-buffer)
+            events = list(islice(reversed(self._buffer), count))
+        events.reverse()
+        return events[:limit] if limit is not None else events
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self, self.max_pending)
+        with self._lock:
+            subscription.seq = self.seq
+            self._subscribers.add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def stats(self) -> dict:
+        return {
+            "seq": self.seq,
+            "buffered": len(self._buffer),
+            "capacity": self._buffer.maxlen,
+            "subscribers": len(self._subscribers),
+        }
@@ -0,0 +1,72 @@
+"""
+משימות רקע (jobs) לפעולות גדולות - הבקשה מחזירה 202 מיד, וההתקדמות זמינה לפי job_id
+
+הפעולה עצמה רצה ב-event loop בחלקים (ראו run_bulk_job ב-main.py), כך שבקשות אחרות
+ממשיכות להיענות בזמן שהיא רצה. נשמרים רק max_jobs ה-jobs האחרונים.
+במצב shared (כמה workers) הסטטוס ידוע רק ל-worker שהתחיל את ה-job.
+"""
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+
+
+class Job:
+    __slots__ = ("id", "kind", "status", "total", "processed", "result", "error", "started", "finished", "_task")
+
+    def __init__(self, kind: str, total: int):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = "running"
+        self.total = total
+        self.processed = 0
+        self.result = None
+        self.error = None
+        self.started = time.time()
+        self.finished = None
+        self._task = None
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "total": self.total,
+            "processed": self.processed,
+            "result": self.result,
+            "error": self.error,
+            "duration_seconds": round((self.finished or time.time()) - self.started, 3),
+        }
+
+
+class JobRegistry:
+    def __init__(self, max_jobs: int = 100):
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+        # הפניה חזקה ל-tasks שרצים - גם אם ה-job כבר נזרק מהרשימה
+        self._running = set()
+
+    def start(self, kind: str, total: int, run) -> Job:
+        """run(job) היא coroutine function שמעדכנת את job.processed ומחזירה את התוצאה"""
+        job = Job(kind, total)
+        self._jobs[job.id] = job
+        while len(self._jobs) > self.max_jobs:
+            self._jobs.popitem(last=False)
+        job._task = asyncio.create_task(self._run(job, run))
+        self._running.add(job._task)
+        job._task.add_done_callback(self._running.discard)
+        return job
+
+    async def _run(self, job: Job, run):
+        try:
+            job.result = await run(job)
+            job.status = "done"
+        except Exception as exc:
+            job.status = "failed"
+            job.error = f"{type(exc).__name__}: {exc}"
+        finally:
+            job.finished = time.time()
+            job._task = None
+
+    def get(self, job_id: str):
+        return self._jobs.get(job_id)
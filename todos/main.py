@@ -1,16 +1,67 @@
 # ייבוא הספריות הנדרשות
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Literal
+from contextlib import asynccontextmanager, contextmanager
 from datetime import datetime
+import asyncio
+import json
+import os
+import sys
+
+# מאפשר לייבא את המודולים של התיקייה גם כשמריצים מתיקייה אחרת
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# תיקיית השורש של הפרויקט - בשביל ה-middlewares המשותפים
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from middlewares import MetricsMiddleware, CompressionMiddleware, FastJSONResponse, trusted_response, install_tracing
+from change_feed import ChangeFeed
+from persistence import TodoJournal
+from store import TodoRecord, TodoStore
+from jobs import JobRegistry
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """טעינת המשימות מהדיסק בעלייה ו-snapshot בכיבוי (רק כשמוגדר TODOS_DATA_DIR)"""
+    sync_task = None
+    if journal is not None:
+        journal.open()
+        if journal.shared:
+            # כדי שגם מנויי SSE יקבלו שינויים מ-workers אחרים בלי לחכות לבקשה
+            sync_task = asyncio.create_task(sync_loop())
+    yield
+    if sync_task is not None:
+        sync_task.cancel()
+    if journal is not None:
+        journal.close()
+
+async def sync_with_workers():
+    """מצב shared: משלים שינויים שעשו workers אחרים לפני כל בקשה"""
+    if journal is not None and journal.shared:
+        with store.lock:
+            journal.sync()
 
 # יצירת אפליקציית FastAPI
 app = FastAPI(
     title="Todo API",
     description="API פשוטה לניהול משימות",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    dependencies=[Depends(sync_with_workers)],
+    # סריאליזציה מהירה עם orjson (אם מותקן)
+    default_response_class=FastJSONResponse
 )
 
+# דחיסת תשובות גדולות (למשל רשימת כל המשימות) - gzip, ו-brotli/zstd אם מותקנים
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+# מדדים (מספר בקשות, זמני תגובה) זמינים ב-/metrics
+app.add_middleware(MetricsMiddleware)
+
+# tracing (traceparent + span לכל בקשה) - פעיל רק כשמוגדר TRACE_EXPORT
+install_tracing(app, service_name="todos")
+
 # === מודלים (Models) ===
 
 class TodoBase(BaseModel):
@@ -38,6 +89,19 @@ class TodoUpdate(BaseModel):
     description: Optional[str] = None
     completed: Optional[bool] = None
 
+class BulkFilter(BaseModel):
+    """
+    מודל לבחירת משימות לפעולה מרובה
+    שדה שלא נשלח לא מסנן - משימה צריכה להתאים לכל השדות שנשלחו
+    """
+    ids: Optional[List[int]] = None  # רק המשימות האלה
+    completed: Optional[bool] = None  # רק לפי סטטוס השלמה
+    created_before: Optional[datetime] = None  # רק משימות שנוצרו לפני הזמן הזה
+
+class BulkToggle(BaseModel):
+    """מודל להפיכת הסטטוס של כמה משימות"""
+    ids: List[int]
+
 class Todo(TodoBase):
     """
     מודל מלא של משימה כולל ID ותאריך יצירה
@@ -50,12 +114,170 @@ class Todo(TodoBase):
         # מאפשר המרה אוטומטית מ-dictionary
         from_attributes = True
 
-# === אחסון זמני בזיכרון ===
-# במקום מסד נתונים, נשתמש ברשימה פשוטה
-# שימו לב: הנתונים יאבדו כשהשרת יכבה
-todos_db: List[dict] = []
-# מונה למתן ID ייחודי לכל משימה
-todo_counter = 1
+# === אחסון בזיכרון ===
+# במקום מסד נתונים - dict לפי ID עם אינדקסים למיון ולחיפוש (store.py)
+# בלי TODOS_DATA_DIR הנתונים יאבדו כשהשרת יכבה
+# בטוח גם ל-handlers רגילים (def) שרצים ב-threads: שינויים תחת store.lock,
+# ורשימות גדולות נבנות מ-snapshot בלי לעצור כתיבות
+store = TodoStore()
+
+# פיד השינויים - כל יצירה/עדכון/מחיקה נרשמים כאן עם מספר רץ
+change_feed = ChangeFeed(capacity=10_000, max_pending=1_000)
+# כל כמה שניות נשלח ping ב-SSE כשאין שינויים (כדי שפרוקסי לא יסגור את החיבור)
+SSE_HEARTBEAT_SECONDS = 15
+# מצב shared: כל כמה שניות לבדוק ברקע אם workers אחרים כתבו
+SYNC_INTERVAL_SECONDS = float(os.environ.get("TODOS_SYNC_INTERVAL", 0.05))
+
+# === שמירה לדיסק (snapshot + WAL) ===
+
+def load_state(state: Optional[dict]):
+    """מחליף את כל המצב בזיכרון במה שנטען מ-snapshot"""
+    if state:
+        store.load((TodoRecord.from_dict(todo) for todo in state["todos"]), state["todo_counter"])
+    else:
+        store.clear()
+    change_feed.reset(state["seq"] if state else 0)
+
+def apply_event(event: dict):
+    """מחיל שינוי מה-WAL (בעלייה, או שינוי של worker אחר) - ומעביר אותו גם לפיד השינויים"""
+    op = event["op"]
+    if op == "cleared":
+        store.clear()
+    elif op == "deleted":
+        store.remove(event["id"])
+    elif op == "deleted_many":
+        for todo_id in event["ids"]:
+            store.remove(todo_id)
+    elif op == "completed_many":
+        for todo_id in event["ids"]:
+            store.update(todo_id, completed=event["completed"])
+    else:
+        store.put(TodoRecord.from_dict(event["todo"]))
+    change_feed.append(event)
+
+def dump_state() -> dict:
+    return {"todo_counter": store.next_id, "todos": [todo.to_dict() for todo in store.values()]}
+
+journal = TodoJournal.from_env(load_state, apply_event, dump_state)
+
+@contextmanager
+def write_lock():
+    """
+    כל שינוי רץ בתוך הבלוק הזה: store.lock (מול threads ו-coroutines אחרים בתהליך),
+    ובמצב shared גם נעילת ה-WAL והשלמת שינויים של workers אחרים
+    """
+    with store.lock:
+        if journal is None:
+            yield
+            return
+        with journal.write_lock():
+            yield
+
+def record(op: str, todo: TodoRecord = None, todo_id: int = None, **fields):
+    """שינוי שכבר בוצע בזיכרון -> פיד השינויים + WAL"""
+    event = change_feed.publish(op, todo, todo_id, **fields)
+    if journal is not None:
+        journal.append(event)
+
+async def sync_loop():
+    while True:
+        with store.lock:
+            journal.sync()
+        await asyncio.sleep(SYNC_INTERVAL_SECONDS)
+
+# === פעולות מרובות ===
+
+# במצב background: כמה משימות בכל חלק. בין החלקים ה-event loop פנוי לבקשות אחרות
+BULK_CHUNK_SIZE = 10_000
+jobs = JobRegistry(max_jobs=100)
+
+def _epoch(moment: Optional[datetime]) -> Optional[float]:
+    # datetime בלי אזור זמן מתפרש כשעון מקומי - כמו created_at
+    return moment.timestamp() if moment is not None else None
+
+def _matches(todo: TodoRecord, completed: Optional[bool], before: Optional[float]) -> bool:
+    if completed is not None and todo.completed != completed:
+        return False
+    return before is None or todo.created < before
+
+def select_ids(selection: BulkFilter) -> List[int]:
+    """מעבר אחד: לפי ids אם נשלחו, לפי סדר היצירה (עד created_before) אם נשלח, אחרת על הכל"""
+    before = _epoch(selection.created_before)
+    if selection.ids is not None:
+        candidates = (store.get(todo_id) for todo_id in dict.fromkeys(selection.ids))
+    elif before is not None:
+        candidates = store.created_before(before)
+    else:
+        candidates = store.values()
+    return [
+        todo.id for todo in candidates
+        if todo is not None and _matches(todo, selection.completed, before)
+    ]
+
+def bulk_delete(ids: List[int], selection: BulkFilter) -> int:
+    before = _epoch(selection.created_before)
+    with write_lock():
+        # בודקים שוב - במצב background המשימה יכלה להשתנות מאז הבחירה
+        deleted = [
+            todo_id for todo_id in ids
+            if (todo := store.get(todo_id)) is not None and _matches(todo, selection.completed, before)
+        ]
+        for todo_id in deleted:
+            store.remove(todo_id)
+        if deleted:
+            record("deleted_many", ids=deleted)
+    return len(deleted)
+
+def bulk_complete(ids: List[int], selection: BulkFilter) -> int:
+    before = _epoch(selection.created_before)
+    with write_lock():
+        changed = []
+        for todo_id in ids:
+            todo = store.get(todo_id)
+            if todo is not None and not todo.completed and _matches(todo, selection.completed, before):
+                store.update(todo_id, completed=True)
+                changed.append(todo_id)
+        if changed:
+            record("completed_many", ids=changed, completed=True)
+    return len(changed)
+
+def bulk_toggle(ids: List[int]) -> int:
+    with write_lock():
+        done, undone = [], []
+        for todo_id in ids:
+            todo = store.get(todo_id)
+            if todo is None:
+                continue
+            todo = store.update(todo_id, completed=not todo.completed)
+            (done if todo.completed else undone).append(todo_id)
+        # ב-event הערך החדש מפורש, כדי שמי שמקבל את השינוי לא יצטרך לדעת את הקודם
+        if done:
+            record("completed_many", ids=done, completed=True)
+        if undone:
+            record("completed_many", ids=undone, completed=False)
+    return len(done) + len(undone)
+
+async def run_bulk_job(job, ids: List[int], apply_chunk) -> int:
+    count = 0
+    for start in range(0, len(ids), BULK_CHUNK_SIZE):
+        count += apply_chunk(ids[start:start + BULK_CHUNK_SIZE])
+        job.processed = min(start + BULK_CHUNK_SIZE, len(ids))
+        await asyncio.sleep(0)
+    return count
+
+def run_bulk(kind: str, ids: List[int], apply_chunk, make_result, background: bool):
+    """מריץ מיד ומחזיר את התוצאה, או (background) מתחיל job ומחזיר 202 עם ה-job_id"""
+    if not background:
+        return make_result(apply_chunk(ids))
+
+    async def run(job):
+        return make_result(await run_bulk_job(job, ids, apply_chunk))
+
+    job = jobs.start(kind, len(ids), run)
+    return FastJSONResponse(
+        status_code=202,
+        content={"job_id": job.id, "status_url": f"/todos/jobs/{job.id}", "total": len(ids)}
+    )
 
 # === נקודות קצה (Endpoints) ===
 
@@ -70,22 +292,173 @@ async def root():
     }
 
 @app.get("/todos", response_model=List[Todo], tags=["משימות"])
-async def get_all_todos(completed: Optional[bool] = None):
+async def get_all_todos(
+    response: Response,
+    completed: Optional[bool] = None,
+    sort: Literal["created_at", "title"] = "created_at",
+    order: Literal["asc", "desc"] = "asc",
+    prefix: Optional[str] = Query(None, min_length=1),
+    q: Optional[str] = Query(None, min_length=1),
+    limit: Optional[int] = Query(None, ge=1, le=10_000),
+    cursor: Optional[str] = None
+):
     """
-    מחזיר את כל המשימות
-    
-    פרמטרים:
-    - completed (אופציונלי): סינון לפי סטטוס השלמה
-      - True: רק משימות שהושלמו
-      - False: רק משימות שלא הושלמו
-      - None: כל המשימות
-    """
-    if completed is None:
-        # מחזיר את כל המשימות
-        return todos_db
+    מחזיר את המשימות
     
-    # מסנן משימות לפי סטטוס
-    return [todo for todo in todos_db if todo["completed"] == completed]
+    פרמטרים (כולם אופציונליים):
+    - completed: סינון לפי סטטוס השלמה (true/false)
+    - sort: created_at (ברירת מחדל) או title
+    - order: asc או desc
+    - prefix: כותרות שמתחילות ב-prefix (בלי הבדל אותיות גדולות/קטנות)
+    - q: כותרות שמכילות את q
+    - limit: כמה משימות בעמוד. כשיש עוד, ה-header X-Next-Cursor מכיל את ה-cursor לעמוד הבא
+    - cursor: ה-cursor מהעמוד הקודם (עם אותם sort/order/סינונים)
+    """
+    def build():
+        try:
+            todos, next_cursor = store.query(
+                completed=completed, sort=sort, order=order, prefix=prefix, q=q, limit=limit, cursor=cursor
+            )
+        except ValueError:
+            raise HTTPException(status_code=400, detail="cursor לא תקין")
+
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+        if headers:
+            response.headers.update(headers)
+        # הנתונים נבנו על ידי השרת עצמו - אין צורך לאמת אותם שוב מול Todo
+        return trusted_response([todo.to_dict() for todo in todos], headers=headers)
+
+    if limit is None:
+        # כל הרשימה: נבנית מ-snapshot ב-thread, וה-event loop ממשיך לטפל בכתיבות בינתיים
+        return await run_in_threadpool(build)
+    return build()
+
+@app.get("/todos/changes", tags=["שינויים"])
+async def get_changes(
+    since: Optional[int] = Query(None, ge=0),
+    limit: int = Query(1000, ge=1, le=10_000)
+):
+    """
+    השינויים מאז seq מסוים - במקום לטעון את כל הרשימה מחדש
+
+    - בלי since: רק ה-seq הנוכחי (נקודת התחלה לפני GET /todos)
+    - 410 אם השינויים כבר נזרקו מה-buffer - צריך לטעון מחדש את GET /todos
+    """
+    if since is None:
+        return {"seq": change_feed.seq, "changes": []}
+    changes = change_feed.since(since, limit)
+    if changes is None:
+        raise HTTPException(status_code=410, detail="השינויים כבר לא זמינים - יש לטעון מחדש את /todos")
+    return trusted_response({"seq": change_feed.seq, "changes": changes})
+
+def _sse_event(event: dict) -> str:
+    return f"id: {event['seq']}\nevent: {event['op']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+@app.get("/todos/changes/stream", tags=["שינויים"])
+async def stream_changes(request: Request, since: Optional[int] = Query(None, ge=0)):
+    """
+    Server-Sent Events - כל שינוי נשלח ברגע שהוא קורה
+
+    - since (או Last-Event-ID בהתחברות מחדש): שולח קודם את השינויים שפוספסו
+    - לקוח איטי שלא עומד בקצב מקבל event: overflow עם ה-seq האחרון שקיבל, והחיבור נסגר
+    """
+    last_event_id = request.headers.get("last-event-id")
+    if since is None and last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+
+    # נרשמים לפני שמחשבים את ההשלמה, כדי לא לפספס שינוי שקורה ביניהם
+    subscription = change_feed.subscribe()
+    backlog = change_feed.since(since) if since is not None else []
+    if backlog is None:
+        subscription.close()
+        raise HTTPException(status_code=410, detail="השינויים כבר לא זמינים - יש לטעון מחדש את /todos")
+
+    async def events():
+        with subscription:
+            # לא change_feed.seq - שינוי שפורסם מאז ההרשמה כבר בתור ואסור לדלג עליו
+            last_seq = since if since is not None else subscription.seq
+            for event in backlog:
+                last_seq = event["seq"]
+                yield _sse_event(event)
+            while True:
+                event = await subscription.get(timeout=SSE_HEARTBEAT_SECONDS)
+                if subscription.overflowed:
+                    yield f"event: overflow\ndata: {json.dumps({'seq': last_seq})}\n\n"
+                    return
+                if event is None:
+                    yield ": ping\n\n"
+                    continue
+                if event["seq"] <= last_seq:
+                    continue
+                last_seq = event["seq"]
+                yield _sse_event(event)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def require_filter(selection: BulkFilter, hint: str):
+    """גוף ריק (או עם שדות בשם שגוי) לא משנה את כל הרשימה בשקט - 400"""
+    if selection.ids is None and selection.completed is None and selection.created_before is None:
+        raise HTTPException(status_code=400, detail=f"יש לשלוח לפחות סינון אחד ({hint})")
+
+@app.post("/todos/bulk/delete", tags=["פעולות מרובות"])
+async def bulk_delete_todos(selection: BulkFilter, background: bool = False):
+    """
+    מחיקת כל המשימות שמתאימות לסינון
+
+    Body (לפחות שדה אחד):
+    - ids: רשימת IDs
+    - completed: למשל true - מחיקת כל המשימות שהושלמו
+    - created_before: רק משימות שנוצרו לפני הזמן הזה
+
+    background=true: מחזיר 202 עם job_id, וההתקדמות ב-GET /todos/jobs/{job_id}
+    """
+    require_filter(selection, "למחיקת הכל: DELETE /todos")
+    ids = select_ids(selection)
+    return run_bulk(
+        "delete", ids, lambda chunk: bulk_delete(chunk, selection),
+        lambda count: {"deleted": count}, background
+    )
+
+@app.post("/todos/bulk/complete", tags=["פעולות מרובות"])
+async def bulk_complete_todos(selection: BulkFilter, background: bool = False):
+    """
+    סימון כל המשימות שמתאימות לסינון כהושלמו (למשל כל מה שנוצר לפני created_before)
+
+    Body (לפחות שדה אחד): ids / completed / created_before - כמו ב-bulk/delete
+
+    מחזיר כמה משימות השתנו (משימות שכבר הושלמו לא נספרות)
+    """
+    require_filter(selection, "לסימון הכל: {\"completed\": false}")
+    ids = select_ids(selection)
+    return run_bulk(
+        "complete", ids, lambda chunk: bulk_complete(chunk, selection),
+        lambda count: {"updated": count}, background
+    )
+
+@app.post("/todos/bulk/toggle", tags=["פעולות מרובות"])
+async def bulk_toggle_todos(body: BulkToggle, background: bool = False):
+    """
+    הפיכת סטטוס ההשלמה של כל המשימות ברשימה
+
+    מחזיר כמה משימות השתנו וכמה IDs לא נמצאו
+    """
+    ids = list(dict.fromkeys(body.ids))
+    return run_bulk(
+        "toggle", ids, bulk_toggle,
+        lambda count: {"toggled": count, "not_found": len(ids) - count}, background
+    )
+
+@app.get("/todos/jobs/{job_id}", tags=["פעולות מרובות"])
+async def get_job(job_id: str):
+    """סטטוס של פעולה מרובה שרצה ברקע (background=true)"""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"job {job_id} לא נמצא")
+    return job.to_dict()
 
 @app.get("/todos/{todo_id}", response_model=Todo, tags=["משימות"])
 async def get_todo(todo_id: int):
@@ -97,10 +470,10 @@ async def get_todo(todo_id: int):
     
     זורק שגיאה 404 אם המשימה לא נמצאה
     """
-    # חיפוש המשימה ברשימה
-    for todo in todos_db:
-        if todo["id"] == todo_id:
-            return todo
+    # חיפוש המשימה לפי ID
+    todo = store.get(todo_id)
+    if todo is not None:
+        return todo.to_dict()
     
     # אם לא נמצא - זריקת שגיאה
     raise HTTPException(
@@ -120,24 +493,21 @@ async def create_todo(todo: TodoCreate):
     
     מחזיר את המשימה שנוצרה עם ID ותאריך יצירה
     """
-    global todo_counter
-    
-    # יצירת אובייקט משימה חדש
-    new_todo = {
-        "id": todo_counter,
-        "title": todo.title,
-        "description": todo.description,
-        "completed": todo.completed,
-        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    }
-    
-    # הוספת המשימה לרשימה
-    todos_db.append(new_todo)
-    
-    # הגדלת המונה למשימה הבאה
-    todo_counter += 1
-    
-    return new_todo
+    with write_lock():
+        # יצירת אובייקט משימה חדש
+        new_todo = TodoRecord(
+            id=store.next_id,
+            title=todo.title,
+            description=todo.description,
+            completed=todo.completed,
+            created=store.now()
+        )
+
+        # הוספת המשימה (המונה של ה-ID עולה לבד)
+        store.put(new_todo)
+
+        record("created", new_todo)
+    return new_todo.to_dict()
 
 @app.put("/todos/{todo_id}", response_model=Todo, tags=["משימות"])
 async def update_todo(todo_id: int, todo_update: TodoUpdate):
@@ -154,18 +524,13 @@ async def update_todo(todo_id: int, todo_update: TodoUpdate):
     
     מעדכן רק את השדות שנשלחו
     """
-    # חיפוש המשימה
-    for todo in todos_db:
-        if todo["id"] == todo_id:
-            # עדכון רק השדות שנשלחו
-            if todo_update.title is not None:
-                todo["title"] = todo_update.title
-            if todo_update.description is not None:
-                todo["description"] = todo_update.description
-            if todo_update.completed is not None:
-                todo["completed"] = todo_update.completed
-            
-            return todo
+    # עדכון רק השדות שנשלחו
+    changes = todo_update.model_dump(exclude_none=True)
+    with write_lock():
+        todo = store.update(todo_id, **changes)
+        if todo is not None:
+            record("updated", todo)
+            return todo.to_dict()
     
     # אם לא נמצא - זריקת שגיאה
     raise HTTPException(
@@ -181,15 +546,14 @@ async def delete_todo(todo_id: int):
     פרמטרים:
     - todo_id: מספר המזהה של המשימה למחיקה
     """
-    global todos_db
-    
     # חיפוש ומחיקת המשימה
-    for i, todo in enumerate(todos_db):
-        if todo["id"] == todo_id:
-            deleted_todo = todos_db.pop(i)
+    with write_lock():
+        deleted_todo = store.remove(todo_id)
+        if deleted_todo is not None:
+            record("deleted", todo_id=todo_id)
             return {
                 "message": "המשימה נמחקה בהצלחה",
-                "deleted_todo": deleted_todo
+                "deleted_todo": deleted_todo.to_dict()
             }
     
     # אם לא נמצא - זריקת שגיאה
@@ -206,11 +570,13 @@ async def toggle_todo_completion(todo_id: int):
     פרמטרים:
     - todo_id: מספר המזהה של המשימה
     """
-    for todo in todos_db:
-        if todo["id"] == todo_id:
+    with write_lock():
+        todo = store.get(todo_id)
+        if todo is not None:
             # הפיכת הסטטוס
-            todo["completed"] = not todo["completed"]
-            return todo
+            todo = store.update(todo_id, completed=not todo.completed)
+            record("toggled", todo)
+            return todo.to_dict()
     
     raise HTTPException(
         status_code=404,
@@ -223,12 +589,11 @@ async def delete_all_todos():
     מחיקת כל המשימות
     זהירות: פעולה זו בלתי הפיכה!
     """
-    global todos_db, todo_counter
-    
-    deleted_count = len(todos_db)
-    todos_db = []
-    todo_counter = 1
-    
+    with write_lock():
+        deleted_count = len(store)
+        store.clear()
+
+        record("cleared")
     return {
         "message": f"{deleted_count} משימות נמחקו בהצלחה",
         "remaining_todos": 0
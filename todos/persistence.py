@@ -0,0 +1,254 @@
+"""
+שמירת המשימות לדיסק - snapshot + WAL (write-ahead log)
+
+- כל שינוי נכתב כשורת JSON ל-todos.wal לפני שהבקשה מסתיימת (אותו event של פיד השינויים).
+- כל snapshot_every שינויים (ובכיבוי) נכתב snapshot מלא ל-todos.snapshot.json
+  וה-WAL מתחיל מחדש. עלייה = טעינת ה-snapshot + הרצה של מה שב-WAL אחריו.
+- שורה חתוכה בסוף ה-WAL (קריסה באמצע כתיבה) מתעלמים ממנה.
+
+מצב shared (כמה workers של uvicorn/gunicorn):
+  כל ה-workers כותבים לאותו WAL תחת flock, וכל אחד מחזיק עותק מלא בזיכרון.
+  לפני כל בקשה (ופעם ב-sync_interval ברקע) worker קורא רק את מה שנוסף ל-WAL מאז
+  הפעם הקודמת - בדיקה של fstat כשאין שינויים, כך שקריאות נשארות במהירות של זיכרון.
+  כתיבה: נעילה, השלמת הפער, ואז השינוי - כך ש-ID ו-seq לא מתנגשים בין workers.
+
+משתני סביבה (TodoJournal.from_env):
+    TODOS_DATA_DIR=./data        מפעיל שמירה לדיסק (בלעדיו הכל בזיכרון כמו קודם)
+    TODOS_SHARED=1               מצב shared לכמה workers
+    TODOS_SNAPSHOT_EVERY=10000   כל כמה שינויים לכתוב snapshot
+    TODOS_WAL_FSYNC=1            fsync אחרי כל שינוי (איטי יותר, שורד גם נפילת חשמל)
+"""
+import json
+import os
+from contextlib import contextmanager
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _dumps(value) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False).encode("utf-8")
+
+
+def _loads(data: bytes):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class TodoJournal:
+    SNAPSHOT_FILE = "todos.snapshot.json"
+    WAL_FILE = "todos.wal"
+    LOCK_FILE = "todos.lock"
+
+    def __init__(self, data_dir: str, load_state, apply_event, dump_state,
+                 shared: bool = False, snapshot_every: int = 10_000, fsync: bool = False):
+        """
+        load_state(state): מחליף את כל המצב בזיכרון (מ-snapshot, או None למצב ריק)
+        apply_event(event): מחיל שינוי אחד מה-WAL על הזיכרון
+        dump_state(): המצב הנוכחי כ-dict לשמירה ב-snapshot
+        """
+        self.data_dir = data_dir
+        self.snapshot_path = os.path.join(data_dir, self.SNAPSHOT_FILE)
+        self.wal_path = os.path.join(data_dir, self.WAL_FILE)
+        self._load_state = load_state
+        self._apply_event = apply_event
+        self._dump_state = dump_state
+        self.shared = shared
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        # ה-seq האחרון שהוחל על הזיכרון בתהליך הזה
+        self.seq = 0
+        self._wal_fd = None
+        self._wal_inode = None
+        self._offset = 0
+        self._records = 0
+        self._lock_fd = None
+        self._fcntl = None
+        self._locked = False
+
+    @classmethod
+    def from_env(cls, load_state, apply_event, dump_state):
+        data_dir = os.environ.get("TODOS_DATA_DIR")
+        if not data_dir:
+            return None
+        return cls(
+            data_dir, load_state, apply_event, dump_state,
+            shared=os.environ.get("TODOS_SHARED") == "1",
+            snapshot_every=int(os.environ.get("TODOS_SNAPSHOT_EVERY", 10_000)),
+            fsync=os.environ.get("TODOS_WAL_FSYNC") == "1",
+        )
+
+    # ==================== עלייה וסגירה ====================
+
+    def open(self):
+        """טעינת ה-snapshot והרצת ה-WAL - נקרא פעם אחת בעליית השרת"""
+        os.makedirs(self.data_dir, exist_ok=True)
+        if self.shared:
+            import fcntl
+            self._fcntl = fcntl
+            self._lock_fd = os.open(os.path.join(self.data_dir, self.LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+        with self._lock():
+            self._load_snapshot()
+            if not os.path.exists(self.wal_path):
+                self._write_new_wal()
+            self._open_wal()
+            self._replay()
+            self._drop_torn_tail()
+
+    def close(self):
+        if self._wal_fd is None:
+            return
+        if self._records:
+            with self._lock():
+                self._catch_up()
+                self.snapshot()
+        os.close(self._wal_fd)
+        self._wal_fd = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    # ==================== נעילה (מצב shared) ====================
+
+    @contextmanager
+    def _lock(self, exclusive: bool = True):
+        if not self.shared or self._locked:
+            yield
+            return
+        self._fcntl.flock(self._lock_fd, self._fcntl.LOCK_EX if exclusive else self._fcntl.LOCK_SH)
+        self._locked = True
+        try:
+            yield
+        finally:
+            self._locked = False
+            self._fcntl.flock(self._lock_fd, self._fcntl.LOCK_UN)
+
+    @contextmanager
+    def write_lock(self):
+        """
+        עוטף כל שינוי: במצב shared נועל ומשלים קודם את מה ששאר ה-workers כתבו.
+        בתוך הבלוק אסור await - ה-flock חוסם את ה-event loop.
+        """
+        with self._lock():
+            self._catch_up()
+            if self.shared:
+                self._drop_torn_tail()
+            yield
+
+    def sync(self):
+        """מצב shared: משלים שינויים של workers אחרים. כשאין שינויים זה fstat אחד"""
+        if not self.shared:
+            return
+        if self._wal_unchanged():
+            return
+        with self._lock(exclusive=False):
+            self._catch_up()
+
+    # ==================== כתיבה ====================
+
+    def append(self, event: dict):
+        """רושם event שכבר הוחל על הזיכרון. חייב לרוץ בתוך write_lock"""
+        line = _dumps(event) + b"\n"
+        os.write(self._wal_fd, line)
+        if self.fsync:
+            os.fsync(self._wal_fd)
+        self._offset += len(line)
+        self.seq = event["seq"]
+        self._records += 1
+        if self._records >= self.snapshot_every:
+            self.snapshot()
+
+    def snapshot(self):
+        """כותב snapshot מלא ומתחיל WAL חדש. חייב לרוץ בתוך write_lock"""
+        state = self._dump_state()
+        state["seq"] = self.seq
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_dumps(state))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        # גם אם נופלים כאן, ה-WAL הישן מכיל רק seq שכבר ב-snapshot ומדולג בעלייה
+        self._write_new_wal()
+        os.close(self._wal_fd)
+        self._open_wal()
+        self._records = 0
+
+    # ==================== קריאה ====================
+
+    def _load_snapshot(self):
+        state = None
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "rb") as f:
+                state = _loads(f.read())
+        self._load_state(state)
+        self.seq = state["seq"] if state else 0
+
+    def _write_new_wal(self):
+        """WAL חדש שמתחיל בשורת header עם ה-seq של ה-snapshot שלפניו"""
+        tmp_path = self.wal_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_dumps({"snapshot_seq": self.seq}) + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.wal_path)
+
+    def _open_wal(self):
+        self._wal_fd = os.open(self.wal_path, os.O_RDWR | os.O_APPEND)
+        self._wal_inode = os.fstat(self._wal_fd).st_ino
+        self._offset = 0
+        self._records = 0
+
+    def _drop_torn_tail(self):
+        """שורה חתוכה בסוף (כותב שקרס באמצע) - חותכים אותה כדי שהכתיבה הבאה תתחיל בשורה נקייה"""
+        if os.fstat(self._wal_fd).st_size != self._offset:
+            os.ftruncate(self._wal_fd, self._offset)
+
+    def _wal_unchanged(self) -> bool:
+        try:
+            stat = os.stat(self.wal_path)
+        except FileNotFoundError:
+            return True
+        return stat.st_ino == self._wal_inode and stat.st_size == self._offset
+
+    def _catch_up(self):
+        if not self.shared or self._wal_unchanged():
+            return
+        if os.stat(self.wal_path).st_ino != self._wal_inode:
+            # worker אחר כתב snapshot והתחיל WAL חדש
+            os.close(self._wal_fd)
+            self._open_wal()
+        self._replay()
+
+    def _replay(self):
+        """מריץ את השורות השלמות מ-offset ועד סוף ה-WAL ומקדם את ה-offset"""
+        size = os.fstat(self._wal_fd).st_size
+        data = os.pread(self._wal_fd, size - self._offset, self._offset)
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            record = _loads(line)
+            if "snapshot_seq" in record:
+                if record["snapshot_seq"] > self.seq:
+                    # פספסנו שינויים שכבר נכנסו ל-snapshot - טוענים אותו מחדש
+                    self._load_snapshot()
+                continue
+            if record["seq"] <= self.seq:
+                continue
+            self._apply_event(record)
+            self.seq = record["seq"]
+            self._records += 1
+        self._offset += end
+
+    def stats(self) -> dict:
+        return {
+            "data_dir": self.data_dir,
+            "shared": self.shared,
+            "seq": self.seq,
+            "wal_records": self._records,
+            "wal_bytes": self._offset,
+        }
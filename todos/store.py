@@ -0,0 +1,386 @@
+"""
+מאגר המשימות בזיכרון עם אינדקסים לשאילתות
+
+- TodoRecord: רשומה קומפקטית עם __slots__ במקום dict לכל משימה. הזמן נשמר כ-epoch
+  (int) ומפורמט רק ביציאה, וכותרות עוברות sys.intern - כותרות שחוזרות נשמרות פעם אחת.
+- todos: dict לפי ID. ה-IDs עולים, אז סדר ה-dict הוא גם סדר היצירה (created_at) -
+  אין צורך באינדקס נפרד למיון לפי תאריך.
+- _ids: רשימת ה-IDs הממוינת (רק append) - בשביל cursor: bisect במקום לסרוק מההתחלה.
+- _titles: רשימה ממוינת של (כותרת באותיות קטנות, ID) - מיון לפי כותרת, וחיפוש prefix
+  הוא טווח רציף ברשימה (bisect), כמו תת-עץ ב-trie.
+
+מחיקה ושינוי כותרת לא מזיזים את הרשימות - הרשומה הישנה מסומנת כמתה (בודקים מול todos
+בזמן הקריאה), והרשימות נבנות מחדש כשיש בהן יותר רשומות מתות מחיות.
+
+מקביליות (asyncio וגם handlers רגילים - def - שרצים ב-threads):
+- רשומה לא משתנה אחרי שנכנסה למאגר - עדכון יוצר רשומה חדשה (replace) ומחליף אותה.
+- כל שינוי רץ תחת lock (RLock - אפשר להחזיק אותו מבחוץ לאורך כמה שינויים).
+- snapshot(): tuple של כל המשימות ברגע מסוים (copy-on-write - נבנה מחדש רק אחרי
+  שינוי). קריאה גדולה עוברת על ה-snapshot בלי lock, ואפשר אפילו ב-thread אחר,
+  כך שהיא לא עוצרת כתיבות ולא רואה חצי שינוי. שאילתה בלי limit רצה באותו אופן על
+  עותק של האינדקסים (_view) - תחת ה-lock רק מעתיקים הפניות.
+"""
+import base64
+import bisect
+import json
+import sys
+import threading
+import time
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, Optional
+
+CREATED_AT_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+# משימות שנוצרו באותה שנייה חולקות את אותה מחרוזת - הפורמט מחושב פעם אחת
+@lru_cache(maxsize=4096)
+def format_created_at(created: int) -> str:
+    return time.strftime(CREATED_AT_FORMAT, time.localtime(created))
+
+
+@lru_cache(maxsize=4096)
+def parse_created_at(created_at: str) -> int:
+    return int(time.mktime(time.strptime(created_at, CREATED_AT_FORMAT)))
+
+
+class TodoRecord:
+    """משימה אחת. created_at (מחרוזת) מחושב מ-created (epoch) רק כשצריך"""
+
+    __slots__ = ("id", "title", "description", "completed", "created")
+
+    def __init__(self, id: int, title: str, description: Optional[str], completed: bool, created: int):
+        self.id = id
+        self.title = sys.intern(title)
+        self.description = description
+        self.completed = completed
+        self.created = created
+
+    def replace(self, **changes) -> "TodoRecord":
+        """עותק עם השדות ששונו - הרשומה המקורית לא משתנה (מי שמחזיק snapshot ממשיך לראות אותה)"""
+        return TodoRecord(
+            self.id,
+            changes.get("title", self.title),
+            changes.get("description", self.description),
+            changes.get("completed", self.completed),
+            self.created,
+        )
+
+    @property
+    def created_at(self) -> str:
+        return format_created_at(self.created)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "title": self.title,
+            "description": self.description,
+            "completed": self.completed,
+            "created_at": format_created_at(self.created),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TodoRecord":
+        return cls(data["id"], data["title"], data.get("description"), data["completed"],
+                   parse_created_at(data["created_at"]))
+
+
+def title_key(title: str) -> str:
+    return title.casefold()
+
+
+def encode_cursor(position) -> str:
+    return base64.urlsafe_b64encode(json.dumps(position, ensure_ascii=False).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str):
+    """ValueError אם ה-cursor לא תקין"""
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid cursor") from None
+
+
+def _parse_position(cursor: str, sort: str):
+    """cursor -> [ID] (מיון לפי תאריך) או [כותרת, ID] (מיון לפי כותרת)"""
+    position = decode_cursor(cursor)
+    if sort == "title":
+        valid = (isinstance(position, list) and len(position) == 2
+                 and isinstance(position[0], str) and type(position[1]) is int)
+    else:
+        valid = isinstance(position, list) and len(position) == 1 and type(position[0]) is int
+    if not valid:
+        raise ValueError("Invalid cursor")
+    return position
+
+
+class TodoStore:
+    def __init__(self):
+        self.todos: Dict[int, TodoRecord] = {}
+        # ה-ID הבא שיינתן
+        self.next_id = 1
+        self._ids = []
+        self._titles = []
+        self._dead_ids = 0
+        self._dead_titles = 0
+        # כל השינויים (ושאילתות שעוברות על האינדקסים) רצים תחת ה-lock
+        self.lock = threading.RLock()
+        # tuple של כל המשימות ועותק של האינדקסים - None אחרי שינוי, נבנים מחדש בקריאה הבאה
+        self._snapshot = ()
+        self._frozen = None
+
+    def __len__(self):
+        return len(self.todos)
+
+    def get(self, todo_id: int) -> Optional[TodoRecord]:
+        return self.todos.get(todo_id)
+
+    def values(self):
+        """כל המשימות לפי סדר היצירה - snapshot, בטוח לעבור עליו בזמן שיש שינויים"""
+        return self.snapshot()
+
+    def snapshot(self) -> tuple:
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self.lock:
+                snapshot = self._snapshot
+                if snapshot is None:
+                    snapshot = self._snapshot = tuple(self.todos.values())
+        return snapshot
+
+    def _view(self) -> "TodoStore":
+        """
+        עותק של המאגר לשאילתה ארוכה בלי lock. מעתיקים רק הפניות (הרשומות עצמן לא משתנות),
+        כך שתחת ה-lock זה העתקה של זיכרון ולא מיון או סינון
+        """
+        view = self._frozen
+        if view is None:
+            with self.lock:
+                view = self._frozen
+                if view is None:
+                    view = TodoStore.__new__(TodoStore)
+                    view.todos = self.todos.copy()
+                    view._ids = self._ids.copy()
+                    view._titles = self._titles.copy()
+                    self._frozen = view
+        return view
+
+    def _changed(self):
+        self._snapshot = None
+        self._frozen = None
+
+    def now(self) -> int:
+        """זמן יצירה למשימה חדשה - לעולם לא לפני המשימה האחרונה, כך שסדר ה-ID הוא גם סדר הזמן"""
+        now = int(time.time())
+        if self.todos:
+            now = max(now, next(reversed(self.todos.values())).created)
+        return now
+
+    def created_before(self, created: int):
+        """המשימות שנוצרו לפני created - מההתחלה ועד הראשונה שלא, בלי לסרוק את השאר"""
+        for todo in self.snapshot():
+            if todo.created >= created:
+                return
+            yield todo
+
+    # ==================== שינויים ====================
+
+    def put(self, todo: TodoRecord):
+        """מוסיף משימה או מחליף קיימת (באותו ID)"""
+        with self.lock:
+            todo_id = todo.id
+            old = self.todos.get(todo_id)
+            self.todos[todo_id] = todo
+            self._changed()
+            if old is None:
+                self._add_id(todo_id)
+                self.next_id = max(self.next_id, todo_id + 1)
+            elif title_key(old.title) == title_key(todo.title):
+                return
+            else:
+                self._dead_titles += 1
+            self._add_title(title_key(todo.title), todo_id)
+            self._maybe_compact()
+
+    def update(self, todo_id: int, **changes) -> Optional[TodoRecord]:
+        """מחליף את המשימה בעותק עם השדות ששונו. מחזיר את הרשומה החדשה, או None אם אין כזו"""
+        with self.lock:
+            todo = self.todos.get(todo_id)
+            if todo is None:
+                return None
+            todo = todo.replace(**changes)
+            self.put(todo)
+            return todo
+
+    def remove(self, todo_id: int) -> Optional[TodoRecord]:
+        with self.lock:
+            todo = self.todos.pop(todo_id, None)
+            if todo is not None:
+                self._changed()
+                self._dead_ids += 1
+                self._dead_titles += 1
+                self._maybe_compact()
+            return todo
+
+    def clear(self):
+        with self.lock:
+            self.todos = {}
+            self._changed()
+            self.next_id = 1
+            self._ids = []
+            self._titles = []
+            self._dead_ids = self._dead_titles = 0
+
+    def load(self, todos, next_id: int):
+        """טעינה מלאה (למשל מ-snapshot) - בונה את האינדקסים פעם אחת"""
+        with self.lock:
+            self.clear()
+            self.todos.update((todo.id, todo) for todo in todos)
+            self._changed()
+            self.next_id = next_id
+            self._rebuild()
+
+    def _add_id(self, todo_id: int):
+        ids = self._ids
+        if not ids or todo_id > ids[-1]:
+            ids.append(todo_id)
+            return
+        index = bisect.bisect_left(ids, todo_id)
+        if index < len(ids) and ids[index] == todo_id:
+            # ID שנמחק וחזר - הרשומה כבר ברשימה
+            self._dead_ids -= 1
+        else:
+            ids.insert(index, todo_id)
+
+    def _add_title(self, key: str, todo_id: int):
+        entry = (key, todo_id)
+        index = bisect.bisect_left(self._titles, entry)
+        if index < len(self._titles) and self._titles[index] == entry:
+            # חזרה לכותרת קודמת - הרשומה הישנה חוזרת להיות חיה
+            self._dead_titles -= 1
+        else:
+            self._titles.insert(index, entry)
+
+    def _rebuild(self):
+        self._ids = sorted(self.todos)
+        self._titles = sorted((title_key(todo.title), todo_id) for todo_id, todo in self.todos.items())
+        self._dead_ids = self._dead_titles = 0
+
+    def _maybe_compact(self):
+        live = len(self.todos)
+        if self._dead_ids > live + 1024 or self._dead_titles > live + 1024:
+            self._rebuild()
+
+    def _live_title(self, entry) -> Optional[TodoRecord]:
+        todo = self.todos.get(entry[1])
+        if todo is None or title_key(todo.title) != entry[0]:
+            return None
+        return todo
+
+    # ==================== שאילתות ====================
+
+    def query(self, completed: bool = None, sort: str = "created_at", order: str = "asc",
+              prefix: str = None, q: str = None, limit: int = None, cursor: str = None):
+        """
+        מחזיר (משימות, cursor לעמוד הבא או None).
+        עם limit: על האינדקסים, תחת ה-lock - הסריקה עוצרת ברגע שיש limit תוצאות.
+        בלי limit: על עותק של האינדקסים (_view), בלי lock - כתיבות ממשיכות בזמן שהרשימה נבנית.
+        """
+        descending = order == "desc"
+        position = _parse_position(cursor, sort) if cursor is not None else None
+        needle = title_key(q) if q else None
+        prefix = title_key(prefix) if prefix else None
+        if limit is None:
+            return self._view()._query_indexes(completed, sort, descending, prefix, needle, position, limit)
+        with self.lock:
+            return self._query_indexes(completed, sort, descending, prefix, needle, position, limit)
+
+    def _query_indexes(self, completed, sort, descending, prefix, needle, position, limit):
+        prefix_filter = None
+        if prefix:
+            lo, hi = self._prefix_bounds(prefix)
+            # מיון לפי תאריך עם prefix נפוץ: סריקה לפי הסדר עם סינון תגיע ל-limit מהר יותר
+            # (בערך limit * n / m רשומות) מאשר למיין את כל m ה-IDs שבטווח
+            if sort != "title" and limit is not None and limit * len(self.todos) < (hi - lo) ** 2:
+                prefix_filter = prefix
+                candidates = self._by_created(descending, position)
+            else:
+                candidates = self._prefix_range(lo, hi, sort, descending, position)
+        elif sort == "title":
+            candidates = self._by_title(descending, position)
+        else:
+            candidates = self._by_created(descending, position)
+
+        def matches(todo):
+            if completed is not None and todo.completed != completed:
+                return False
+            if prefix_filter is not None and not title_key(todo.title).startswith(prefix_filter):
+                return False
+            return needle is None or needle in title_key(todo.title)
+
+        selected = (todo for todo in candidates if matches(todo))
+        if limit is None:
+            return list(selected), None
+        # לוקחים אחד נוסף כדי לדעת אם יש עמוד הבא
+        page = list(islice(selected, limit + 1))
+        if len(page) <= limit:
+            return page, None
+        page = page[:limit]
+        last = page[-1]
+        next_position = [title_key(last.title), last.id] if sort == "title" else [last.id]
+        return page, encode_cursor(next_position)
+
+    def _by_created(self, descending: bool, position):
+        ids = self._ids
+        if position is None:
+            # בלי cursor - ישירות על ה-dict, בלי לבדוק רשומות מתות
+            yield from (reversed(self.todos.values()) if descending else self.todos.values())
+            return
+        last_id = position[0]
+        if descending:
+            indexes = range(bisect.bisect_left(ids, last_id) - 1, -1, -1)
+        else:
+            indexes = range(bisect.bisect_right(ids, last_id), len(ids))
+        for index in indexes:
+            todo = self.todos.get(ids[index])
+            if todo is not None:
+                yield todo
+
+    def _title_indexes(self, lo: int, hi: int, descending: bool, position):
+        titles = self._titles
+        if position is not None:
+            key = tuple(position)
+            if descending:
+                hi = min(hi, bisect.bisect_left(titles, key, lo, hi))
+            else:
+                lo = max(lo, bisect.bisect_right(titles, key, lo, hi))
+        return range(hi - 1, lo - 1, -1) if descending else range(lo, hi)
+
+    def _by_title(self, descending: bool, position):
+        for index in self._title_indexes(0, len(self._titles), descending, position):
+            todo = self._live_title(self._titles[index])
+            if todo is not None:
+                yield todo
+
+    def _prefix_bounds(self, prefix: str):
+        """כל הכותרות שמתחילות ב-prefix הן טווח רציף ב-_titles"""
+        lo = bisect.bisect_left(self._titles, (prefix,))
+        # התו הגבוה ביותר אחרי ה-prefix - סוף הטווח
+        hi = bisect.bisect_left(self._titles, (prefix + "\U0010ffff",), lo)
+        return lo, hi
+
+    def _prefix_range(self, lo: int, hi: int, sort: str, descending: bool, position):
+        titles = self._titles
+        if sort == "title":
+            for index in self._title_indexes(lo, hi, descending, position):
+                todo = self._live_title(titles[index])
+                if todo is not None:
+                    yield todo
+            return
+        # מיון לפי תאריך: ממיינים רק את ה-IDs שבטווח
+        ids = sorted(entry[1] for entry in titles[lo:hi] if self._live_title(entry) is not None)
+        if position is not None:
+            last_id = position[0]
+            ids = ids[:bisect.bisect_left(ids, last_id)] if descending else ids[bisect.bisect_right(ids, last_id):]
+        for todo_id in (reversed(ids) if descending else ids):
+            yield self.todos[todo_id]
@@ -0,0 +1,203 @@
+"""
+בדיקת עומס למקביליות של המאגר: יצירות, עדכונים, מחיקות וקריאות במקביל
+
+1. threads: כמה כותבים וכמה קוראים ישירות על TodoStore (כמו handlers רגילים - def).
+   כל snapshot שקורא רואה חייב להיות עקבי: IDs עולים בלי כפילויות, ורשומות שלמות
+   (כותרת ותיאור תמיד מאותו עדכון).
+2. asyncio: בקשות במקביל לאפליקציה (httpx + ASGI) - יצירות, מחיקות ורשימות מלאות
+   (שנבנות ב-thread), ולצידן threads שכותבים דרך write_lock של main.py.
+
+בסוף בודקים שהמספרים מסתדרים: כמה משימות נשארו, ה-seq של פיד השינויים,
+והאינדקסים (מיון לפי כותרת) מול סריקה מלאה.
+
+הרצה: python stress_store.py
+"""
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from store import TodoRecord, TodoStore
+
+WRITERS = 4
+READERS = 4
+OPS_PER_WRITER = 20_000
+REQUESTS = 2_000
+CONCURRENCY = 50
+
+
+def check_snapshot(todos):
+    last_id = 0
+    for todo in todos:
+        assert todo.id > last_id, f"IDs לא עולים: {todo.id} אחרי {last_id}"
+        last_id = todo.id
+        # writer מעדכן כותרת ותיאור יחד - רשומה חצי מעודכנת תיראה כאן
+        assert todo.description == f"rev {todo.title.rsplit(' ', 1)[-1]}", f"רשומה לא עקבית: {todo.id}"
+
+
+def check_indexes(store: TodoStore):
+    indexed, cursor = [], None
+    while True:
+        page, cursor = store.query(sort="title", limit=10_000, cursor=cursor)
+        indexed.extend(todo.id for todo in page)
+        if cursor is None:
+            break
+    scanned = [todo.id for todo in store.query(sort="title")[0]]
+    assert indexed == scanned, "האינדקס לפי כותרת לא תואם לסריקה"
+    assert [todo.id for todo in store.query(order="desc", limit=10_000)[0]] == \
+        [todo.id for todo in store.query(order="desc")[0]][:10_000]
+
+
+def stress_threads():
+    store = TodoStore()
+    stop = threading.Event()
+    errors = []
+    counts = {"created": 0, "deleted": 0, "snapshots": 0}
+
+    def writer(seed: int):
+        rng = random.Random(seed)
+        mine = []
+        try:
+            for _ in range(OPS_PER_WRITER):
+                action = rng.random()
+                if action < 0.5 or not mine:
+                    with store.lock:
+                        todo = TodoRecord(store.next_id, f"task {rng.choice('abcdef')} 0", "rev 0", False, store.now())
+                        store.put(todo)
+                        counts["created"] += 1
+                    mine.append(todo.id)
+                elif action < 0.8:
+                    todo_id = rng.choice(mine)
+                    with store.lock:
+                        todo = store.get(todo_id)
+                        revision = int(todo.description.split()[1]) + 1
+                        prefix = rng.choice("abcdef")
+                        store.update(todo_id, title=f"task {prefix} {revision}", description=f"rev {revision}")
+                else:
+                    todo_id = mine.pop(rng.randrange(len(mine)))
+                    assert store.remove(todo_id) is not None
+                    with store.lock:
+                        counts["deleted"] += 1
+        except Exception as exc:
+            errors.append(exc)
+
+    def reader(seed: int):
+        rng = random.Random(seed)
+        try:
+            while not stop.is_set():
+                check_snapshot(store.values())
+                store.query(sort="title", limit=50)
+                store.query(prefix=rng.choice("abcdef"), limit=50, order="desc")
+                todos, _ = store.query(completed=False, prefix="task", sort=rng.choice(["created_at", "title"]))
+                with store.lock:
+                    counts["snapshots"] += 1
+        except Exception as exc:
+            errors.append(exc)
+
+    writers = [threading.Thread(target=writer, args=(i,)) for i in range(WRITERS)]
+    readers = [threading.Thread(target=reader, args=(100 + i,)) for i in range(READERS)]
+    start = time.perf_counter()
+    for thread in readers + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    stop.set()
+    for thread in readers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    if errors:
+        raise errors[0]
+    check_snapshot(store.values())
+    assert len(store) == counts["created"] - counts["deleted"] == len(store.snapshot())
+    check_indexes(store)
+    print(f"threads: {WRITERS} writers x {OPS_PER_WRITER:,} ops + {READERS} readers "
+          f"({counts['snapshots']:,} full reads) in {elapsed:.1f}s - "
+          f"{counts['created']:,} created, {counts['deleted']:,} deleted, {len(store):,} left - OK")
+
+
+async def stress_app():
+    import main
+
+    transport = httpx.ASGITransport(app=main.app)
+    created_ids = []
+    deleted = 0
+    thread_created = 0
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    stop = threading.Event()
+
+    def thread_writer():
+        # כמו handler רגיל (def) שרץ ב-threadpool
+        nonlocal thread_created
+        while not stop.is_set():
+            with main.write_lock():
+                todo = TodoRecord(main.store.next_id, "from thread", None, False, main.store.now())
+                main.store.put(todo)
+                main.record("created", todo)
+                thread_created += 1
+            time.sleep(0.001)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        async def create(i: int):
+            async with semaphore:
+                response = await client.post("/todos", json={"title": f"request {i}"})
+                assert response.status_code == 201, response.text
+                created_ids.append(response.json()["id"])
+
+        async def delete():
+            nonlocal deleted
+            async with semaphore:
+                if not created_ids:
+                    return
+                todo_id = created_ids.pop(random.randrange(len(created_ids)))
+                response = await client.delete(f"/todos/{todo_id}")
+                assert response.status_code == 200, response.text
+                deleted += 1
+
+        async def read():
+            async with semaphore:
+                response = await client.get("/todos")
+                assert response.status_code == 200
+                ids = [todo["id"] for todo in response.json()]
+                assert ids == sorted(set(ids)), "רשימה עם IDs כפולים או לא ממוינים"
+
+        threads = [threading.Thread(target=thread_writer) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        start = time.perf_counter()
+        tasks = []
+        for i in range(REQUESTS):
+            tasks.append(create(i))
+            if i % 3 == 0:
+                tasks.append(delete())
+            if i % 10 == 0:
+                tasks.append(read())
+        random.shuffle(tasks)
+        await asyncio.gather(*tasks)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        final = (await client.get("/todos")).json()
+    expected = REQUESTS + thread_created - deleted
+    ids = [todo["id"] for todo in final]
+    assert len(ids) == len(set(ids)) == expected, (len(ids), expected)
+    assert main.change_feed.seq == REQUESTS + thread_created + deleted
+    check_indexes(main.store)
+    print(f"app: {len(tasks):,} concurrent requests + {thread_created:,} creates from threads "
+          f"in {elapsed:.1f}s - {len(ids):,} todos, seq {main.change_feed.seq:,} - OK")
+
+
+def main():
+    stress_threads()
+    asyncio.run(stress_app())
+
+
+if __name__ == "__main__":
+    main()